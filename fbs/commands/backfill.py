@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Run a backfill across processes and machines with a shared lease-based work queue.
+
+Dates are enqueued once, and any number of workers on any number of machines claim
+them with expiring leases.  A worker that crashes loses its lease and its date is
+claimed again by another worker, which resumes from the checkpointed bills.  For a
+multi-machine backfill, put the queue and the ~/.cache/fbs bill store on a shared
+filesystem, e.g., by symlinking ~/.cache/fbs to a shared mount on every machine.  The
+bill locks live in the bill store, so the filesystem must support advisory locks, as
+NFSv4 does.
+
+The --max-rpm and --max-tpm limits apply to each machine and are split evenly across its
+worker processes, so give each machine its share of the provider limits.
+
+Usage:
+    python3 -m fbs.commands.backfill enqueue --start-date YYYY-MM-DD --end-date YYYY-MM-DD
+    python3 -m fbs.commands.backfill enqueue --pending
+    python3 -m fbs.commands.backfill work --processes 4
+    python3 -m fbs.commands.backfill status
+"""
+
+# standard library imports
+import argparse
+import datetime
+import multiprocessing
+import sys
+from pathlib import Path
+
+# project imports
+from fbs.commands.parse_bills import (
+    MODEL_CHOICES,
+    PHASE_CHOICES,
+    get_model_stack,
+    search_bills,
+)
+from fbs.llm.scheduler import (
+    DEFAULT_MAX_RPM,
+    DEFAULT_MAX_TPM,
+    DEFAULT_MAX_WORKERS,
+    LLMScheduler,
+)
+from fbs.logger import LOGGER
+from fbs.sources.govinfo.govinfo_parser import DEFAULT_SECTION_MODE, SECTION_MODES
+from fbs.sources.govinfo.govinfo_source import GovInfoSource
+from fbs.utils.work_queue import (
+    DEFAULT_LEASE_SECONDS,
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_QUEUE_PATH,
+    LeaseHeartbeat,
+    WorkQueue,
+    WorkUnit,
+    get_worker_id,
+)
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed command line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Run a backfill across processes and machines with a shared work queue."
+    )
+    parser.add_argument(
+        "step",
+        choices=["enqueue", "work", "status"],
+        help="Add work to the queue, work on the queue, or show the queue status",
+    )
+    parser.add_argument(
+        "--queue-path",
+        type=str,
+        default=str(DEFAULT_QUEUE_PATH),
+        help="Path to the SQLite work queue, on a shared filesystem for several machines",
+    )
+
+    # enqueue arguments
+    parser.add_argument(
+        "--start-date",
+        type=str,
+        help="First date to enqueue (YYYY-MM-DD)",
+    )
+    parser.add_argument(
+        "--end-date",
+        type=str,
+        help="Last date to enqueue (YYYY-MM-DD)",
+    )
+    parser.add_argument(
+        "--pending",
+        action="store_true",
+        help="Enqueue the cached bills whose LLM fields are pending",
+    )
+
+    # work arguments
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Number of worker processes to run on this machine",
+    )
+    parser.add_argument(
+        "--max-units",
+        type=int,
+        default=None,
+        help="Maximum number of units each worker process handles before exiting",
+    )
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=DEFAULT_LEASE_SECONDS,
+        help="Lease duration; a crashed worker's unit is claimed again after this",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=DEFAULT_MAX_ATTEMPTS,
+        help="Attempts before a unit is marked failed",
+    )
+    parser.add_argument(
+        "--phase",
+        type=str,
+        choices=PHASE_CHOICES,
+        default="all",
+        help="Parse bill statistics, fill in pending LLM fields, or both for date units",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        choices=MODEL_CHOICES,
+        default="gpt-4o",
+        help="LLM model to use for analysis",
+    )
+    parser.add_argument(
+        "--fallback-model",
+        type=str,
+        choices=MODEL_CHOICES,
+        default=None,
+        help="LLM model to fail over to when a call fails or exceeds its deadline",
+    )
+    parser.add_argument(
+        "--max-rpm",
+        type=int,
+        default=DEFAULT_MAX_RPM,
+        help="Maximum LLM requests per minute on this machine, split across its processes",
+    )
+    parser.add_argument(
+        "--max-tpm",
+        type=int,
+        default=DEFAULT_MAX_TPM,
+        help="Maximum LLM prompt tokens per minute on this machine, split across its processes",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help="Maximum number of concurrent LLM requests for each worker process",
+    )
+    parser.add_argument(
+        "--section-mode",
+        type=str,
+        choices=SECTION_MODES,
+        default=DEFAULT_SECTION_MODE,
+        help="How to batch section summary and audit prompts",
+    )
+
+    # status arguments
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Return failed units to the queue",
+    )
+
+    return parser.parse_args()
+
+
+def enqueue(args: argparse.Namespace, queue: WorkQueue) -> None:
+    """
+    Add date units or pending bill units to the queue.
+
+    Args:
+        args: Parsed command line arguments
+        queue: Work queue
+    """
+    if args.start_date:
+        start_date = datetime.date.fromisoformat(args.start_date)
+        end_date = datetime.date.fromisoformat(
+            args.end_date or datetime.date.today().isoformat()
+        )
+        dates = [
+            start_date + datetime.timedelta(days=offset)
+            for offset in range((end_date - start_date).days + 1)
+        ]
+        num_added = queue.add(
+            "date",
+            (
+                (f"date:{date.isoformat()}", {"date": date.isoformat()})
+                for date in dates
+            ),
+        )
+        LOGGER.info("Enqueued %d of %d dates", num_added, len(dates))
+
+    if args.pending:
+        with GovInfoSource() as govinfo:
+            package_ids = govinfo.get_pending_package_ids()
+        num_added = queue.add(
+            "package",
+            (
+                (f"package:{package_id}", {"package_id": package_id})
+                for package_id in package_ids
+            ),
+        )
+        LOGGER.info("Enqueued %d of %d pending bills", num_added, len(package_ids))
+
+
+def run_unit(
+    unit: WorkUnit,
+    govinfo: GovInfoSource,
+    model,
+    phase: str,
+) -> None:
+    """
+    Process a work unit.
+
+    Date units parse every bill on the date and, unless the phase is stats, fill in
+    their LLM fields.  Package units fill in the LLM fields of a cached bill.  Bills are
+    checkpointed as they are processed, so a unit that is claimed again resumes.
+
+    Args:
+        unit: Work unit
+        govinfo: GovInfo source
+        model: LLM model
+        phase: Processing phase for date units
+    """
+    if unit.kind == "package":
+        govinfo.analyze_cached_bill(unit.payload["package_id"], model)
+        return
+
+    date = datetime.date.fromisoformat(unit.payload["date"])
+    for result in search_bills(govinfo, date):
+        if phase in ("all", "stats"):
+            govinfo.get_bill_data(result)
+        if phase in ("all", "llm"):
+            govinfo.analyze_cached_bill(result.packageId, model)
+
+
+def work(args: argparse.Namespace) -> None:
+    """
+    Claim and process units until the queue is empty or max_units is reached.
+
+    Args:
+        args: Parsed command line arguments
+    """
+    owner = get_worker_id()
+    queue = WorkQueue(Path(args.queue_path))
+
+    # split this machine's rate limits evenly across its worker processes
+    num_processes = max(1, args.processes)
+    scheduler = LLMScheduler(
+        max_rpm=max(1, args.max_rpm // num_processes),
+        max_tpm=max(1, args.max_tpm // num_processes),
+        max_workers=args.max_concurrency,
+    )
+    model, usage_model = get_model_stack(
+        args.model, scheduler, fallback_model_name=args.fallback_model
+    )
+
+    num_units = 0
+    with GovInfoSource(scheduler=scheduler, section_mode=args.section_mode) as govinfo:
+        while args.max_units is None or num_units < args.max_units:
+            unit = queue.claim(owner, args.lease_seconds, args.max_attempts)
+            if unit is None:
+                break
+
+            LOGGER.info(
+                "Worker %s claimed %s (attempt %d)", owner, unit.unit_id, unit.attempts
+            )
+            try:
+                with LeaseHeartbeat(
+                    queue, unit, owner, args.lease_seconds
+                ) as heartbeat:
+                    run_unit(unit, govinfo, model, args.phase)
+            except KeyboardInterrupt:
+                queue.release(unit.unit_id, owner)
+                raise
+            except Exception as e:
+                LOGGER.error("Error processing %s: %s", unit.unit_id, str(e))
+                queue.fail(unit.unit_id, owner, str(e), args.max_attempts)
+                continue
+
+            if heartbeat.lease_lost or not queue.complete(unit.unit_id, owner):
+                LOGGER.warning(
+                    "Worker %s lost the lease on %s; another worker will redo it",
+                    owner,
+                    unit.unit_id,
+                )
+            num_units += 1
+
+    LOGGER.info("Worker %s processed %d units", owner, num_units)
+    LOGGER.info("LLM usage stats: %s", usage_model.get_stats())
+    queue.close()
+
+
+def main() -> None:
+    """
+    Main entry point.
+    """
+    args = parse_args()
+
+    try:
+        if args.step == "enqueue":
+            queue = WorkQueue(Path(args.queue_path))
+            enqueue(args, queue)
+            queue.close()
+        elif args.step == "work":
+            if args.processes <= 1:
+                work(args)
+                return
+
+            # run several local workers against the same queue
+            context = multiprocessing.get_context("spawn")
+            processes = [
+                context.Process(target=work, args=(args,))
+                for _ in range(args.processes)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+        else:
+            queue = WorkQueue(Path(args.queue_path))
+            if args.retry_failed:
+                LOGGER.info("Returned %d failed units", queue.retry_failed())
+            LOGGER.info("Queue status: %s", queue.get_counts(args.max_attempts))
+            queue.close()
+
+    except Exception as e:
+        LOGGER.error("Error: %s", str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Parse bills for historical backfills with the provider's batch API.
+
+Each round collects every prompt that is ready but not yet in the LLM response cache,
+submits them as batch jobs, and waits for the results to be written into the cache.
+Prompts that read earlier results wait for the next round, so a bill needs one round for
+its sections, one for the summary and issues, one for the prompts that read them, and
+one for the ELI5 explanation.  Bills whose section summaries must be map-reduced to fit
+the context window need one more round per reduction level, and packed sections missing
+from a packed response need one more.  State is kept on disk, so every step can be
+interrupted and resumed.
+
+Usage:
+    python3 -m fbs.commands.batch_bills collect --start-date YYYY-MM-DD --end-date YYYY-MM-DD
+    python3 -m fbs.commands.batch_bills submit
+    python3 -m fbs.commands.batch_bills poll
+    python3 -m fbs.commands.batch_bills run --start-date YYYY-MM-DD --end-date YYYY-MM-DD
+"""
+
+# standard library imports
+import argparse
+import datetime
+import sys
+import time
+from pathlib import Path
+
+# project imports
+from fbs.commands.parse_bills import MODEL_CHOICES, get_model, search_bills
+from fbs.llm.batch import (
+    DEFAULT_BATCH_BASE_URL,
+    DEFAULT_BATCH_PATH,
+    DEFAULT_MAX_BATCH_REQUESTS,
+    BatchClient,
+    BatchJobStore,
+    BatchRecordingModel,
+    PendingBatchRequest,
+    poll_jobs,
+    submit_requests,
+)
+from fbs.llm.cache import CachedAIModel
+from fbs.llm.scheduler import DEFAULT_MAX_WORKERS, LLMScheduler
+from fbs.logger import LOGGER
+from fbs.sources.govinfo.govinfo_parser import DEFAULT_SECTION_MODE, SECTION_MODES
+from fbs.sources.govinfo.govinfo_source import GovInfoSource
+
+# constants
+DEFAULT_POLL_INTERVAL = 300.0
+DEFAULT_MAX_ROUNDS = 10
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed command line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Parse bills for historical backfills with the batch API."
+    )
+    parser.add_argument(
+        "step",
+        choices=["collect", "submit", "poll", "run"],
+        help="Step to run; run repeats collect, submit, and poll until all bills complete",
+    )
+    parser.add_argument(
+        "--date",
+        type=str,
+        help="Date to parse bills for (YYYY-MM-DD)",
+    )
+    parser.add_argument(
+        "--start-date",
+        type=str,
+        help="Start date to parse bills for (YYYY-MM-DD)",
+    )
+    parser.add_argument(
+        "--end-date",
+        type=str,
+        help="End date to parse bills for (YYYY-MM-DD)",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        choices=MODEL_CHOICES,
+        default="gpt-4o",
+        help="LLM model to use for analysis",
+    )
+    parser.add_argument(
+        "--section-mode",
+        type=str,
+        choices=SECTION_MODES,
+        default=DEFAULT_SECTION_MODE,
+        help="How to batch section summary and audit prompts",
+    )
+    parser.add_argument(
+        "--batch-path",
+        type=Path,
+        default=DEFAULT_BATCH_PATH,
+        help="Path to the batch job store",
+    )
+    parser.add_argument(
+        "--base-url",
+        type=str,
+        default=DEFAULT_BATCH_BASE_URL,
+        help="Base URL of the OpenAI-compatible batch API",
+    )
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=DEFAULT_MAX_BATCH_REQUESTS,
+        help="Maximum number of requests per batch job",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help="Seconds between polls in the run step",
+    )
+    parser.add_argument(
+        "--max-rounds",
+        type=int,
+        default=DEFAULT_MAX_ROUNDS,
+        help="Maximum number of collect/submit/poll rounds in the run step",
+    )
+
+    args = parser.parse_args()
+
+    if args.start_date and not args.end_date:
+        args.end_date = datetime.date.today().isoformat()
+
+    if not args.date and not args.start_date:
+        args.date = datetime.date.today().isoformat()
+
+    return args
+
+
+def get_date_range(args: argparse.Namespace) -> tuple[datetime.date, datetime.date]:
+    """
+    Get the date range from command line arguments.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        tuple[datetime.date, datetime.date]: Start and end dates
+    """
+    if args.date:
+        date = datetime.date.fromisoformat(args.date)
+        return date, date
+
+    start_date = datetime.date.fromisoformat(args.start_date)
+    end_date = datetime.date.fromisoformat(args.end_date)
+    if end_date < start_date:
+        raise ValueError("End date must be after start date")
+    return start_date, end_date
+
+
+def collect(
+    args: argparse.Namespace, store: BatchJobStore, llm_cache: CachedAIModel
+) -> tuple[int, int]:
+    """
+    Parse all bills in the date range, recording uncached prompts as batch requests.
+
+    Args:
+        args: Parsed command line arguments
+        store: Batch job store
+        llm_cache: LLM response cache wrapping the recording model
+
+    Returns:
+        tuple[int, int]: Number of completed and pending bills
+    """
+    start_date, end_date = get_date_range(args)
+    scheduler = LLMScheduler(max_workers=DEFAULT_MAX_WORKERS)
+    store.reload()
+    num_completed, num_pending = 0, 0
+
+    try:
+        with GovInfoSource(
+            scheduler=scheduler, section_mode=args.section_mode
+        ) as govinfo:
+            current_date = start_date
+            while current_date <= end_date:
+                for result in search_bills(govinfo, current_date):
+                    try:
+                        govinfo.get_bill(result, llm_cache)
+                        num_completed += 1
+                    except PendingBatchRequest:
+                        num_pending += 1
+                    except Exception as e:
+                        LOGGER.error(
+                            "Error processing bill %s: %s", result.packageId, str(e)
+                        )
+                current_date += datetime.timedelta(days=1)
+    finally:
+        scheduler.shutdown()
+
+    LOGGER.info(
+        "Collected %d requests: %d bills completed, %d bills pending",
+        len(store.get_requests()),
+        num_completed,
+        num_pending,
+    )
+    return num_completed, num_pending
+
+
+def main() -> None:
+    """
+    Main entry point.
+    """
+    args = parse_args()
+
+    try:
+        store = BatchJobStore(args.batch_path)
+        llm_cache = CachedAIModel(BatchRecordingModel(get_model(args.model), store))
+        client = BatchClient(base_url=args.base_url)
+
+        try:
+            if args.step == "collect":
+                collect(args, store, llm_cache)
+            elif args.step == "submit":
+                submit_requests(store, client, max_requests=args.max_requests)
+            elif args.step == "poll":
+                num_pending = poll_jobs(store, client, llm_cache)
+                LOGGER.info("%d batch jobs pending", num_pending)
+            else:
+                num_pending = 0
+                for round_number in range(1, args.max_rounds + 1):
+                    LOGGER.info("Starting batch round %d", round_number)
+
+                    # wait for any jobs left over from an interrupted run
+                    while poll_jobs(store, client, llm_cache) > 0:
+                        time.sleep(args.poll_interval)
+
+                    _, num_pending = collect(args, store, llm_cache)
+                    if num_pending == 0:
+                        break
+
+                    submit_requests(store, client, max_requests=args.max_requests)
+                    while poll_jobs(store, client, llm_cache) > 0:
+                        time.sleep(args.poll_interval)
+
+                if num_pending > 0:
+                    LOGGER.warning(
+                        "%d bills were pending in the last of %d rounds; run again to finish them",
+                        num_pending,
+                        args.max_rounds,
+                    )
+        finally:
+            client.close()
+
+    except Exception as e:
+        LOGGER.error("Error: %s", str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
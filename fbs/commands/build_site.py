@@ -7,11 +7,10 @@ Usage:
 """
 
 # Standard library imports
-import gzip
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, NamedTuple
+from typing import Dict, List, Any, NamedTuple, Optional
 
 # packages
 import markdown
@@ -20,6 +19,7 @@ from xml.etree import ElementTree as ET
 
 # project
 from fbs.logger import LOGGER
+from fbs.sources.govinfo.govinfo_store import BillStore
 from fbs.sources.govinfo.govinfo_types import get_bill_slug, BILL_VERSION_CODES
 
 # Constants
@@ -39,25 +39,28 @@ class BillGroup(NamedTuple):
     bills: List[Dict[str, Any]]
 
 
-def load_bills(bills_path: Path = DEFAULT_BILLS_PATH) -> List[Dict[str, Any]]:
+def load_bills(
+    bills_path: Path = DEFAULT_BILLS_PATH,
+    bill_mtimes: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
     """
     Load all bill JSON data from the bills directory.
 
     Args:
         bills_path: Path to bills directory
+        bill_mtimes: Optional dictionary to fill with file modification times by
+            package id from the manifest
 
     Returns:
         List of bill data dictionaries
     """
     bills = []
-    for file_path in bills_path.rglob("*"):
-        try:
-            with gzip.open(file_path, "rt") as f:
-                bill_data = json.load(f)
-                bills.append(bill_data)
-        except Exception as e:
-            LOGGER.error(f"Error loading bill {file_path}: {str(e)}")
-            continue
+    with BillStore(bills_path) as bill_store:
+        # missing and corrupt bills are skipped
+        for entry, bill_data in bill_store.iter_bills():
+            bills.append(bill_data)
+            if bill_mtimes is not None:
+                bill_mtimes[entry.package_id] = entry.mtime
     return bills
 
 
@@ -134,10 +137,11 @@ def group_bills_by_month(bills: List[Dict[str, Any]]) -> Dict[str, BillGroup]:
                 ),
                 "title": bill["title"],
                 "date": bill["date"],
+                "package_id": bill.get("package_id"),
                 "num_pages": bill.get("num_pages", 0),
                 "num_sections": bill.get("num_sections", 0),
                 "num_tokens": bill.get("num_tokens", 0),
-                "eli5": markdown.markdown(bill.get("eli5", "")),
+                "eli5": markdown.markdown(bill.get("eli5") or ""),
                 "slug": get_bill_slug(
                     bill["legis_num"], bill["title"], bill["bill_version"]
                 ),
@@ -176,6 +180,31 @@ def generate_month_index(
         output_path.write(html)
 
 
+def is_month_index_current(
+    month_group: BillGroup, bill_mtimes: Dict[str, float], output_path: Path
+) -> bool:
+    """
+    Check whether a month index exists and is newer than all of its bill files.
+
+    Args:
+        month_group: BillGroup containing month's bills
+        bill_mtimes: Dictionary of bill file modification times by package id
+        output_path: Output directory path
+
+    Returns:
+        True if the month index does not need to be generated again
+    """
+    index_path = output_path / f"index-{month_group.year_month}.html"
+    if not index_path.exists():
+        return False
+
+    index_mtime = index_path.stat().st_mtime
+    return all(
+        bill_mtimes.get(bill["package_id"], float("inf")) <= index_mtime
+        for bill in month_group.bills
+    )
+
+
 def generate_main_index(
     bill_groups: Dict[str, BillGroup], template_dir: Path, output_path: Path
 ) -> None:
@@ -314,7 +343,8 @@ def main() -> None:
     try:
         # Load all bills
         LOGGER.info("Loading bills...")
-        bills = load_bills()
+        bill_mtimes: Dict[str, float] = {}
+        bills = load_bills(bill_mtimes=bill_mtimes)
         LOGGER.info(f"Loaded {len(bills)} bills")
 
         # Create output directory
@@ -334,6 +364,9 @@ def main() -> None:
         # Generate month indexes
         LOGGER.info("Generating month indexes...")
         for group in bill_groups.values():
+            # only months with new or updated bills need to be generated again
+            if is_month_index_current(group, bill_mtimes, DEFAULT_OUTPUT_PATH):
+                continue
             generate_month_index(group, DEFAULT_TEMPLATE_DIR, DEFAULT_OUTPUT_PATH)
 
         # Generate main index
@@ -5,7 +5,6 @@ Update the statistics for all parsed bills.
 
 # Standard library imports
 import json
-import gzip
 from pathlib import Path
 from typing import Dict, List, Any
 from collections import defaultdict
@@ -15,7 +14,9 @@ import statistics
 
 # Project imports
 from fbs.logger import LOGGER
+from fbs.sources.govinfo.govinfo_store import BillStore
 from fbs.utils.readability import get_ari_raw, get_ari_years_education
+from fbs.utils.store import atomic_write_bytes
 
 # Constants
 DEFAULT_BILLS_PATH = Path.home() / ".cache" / "fbs" / "bills"
@@ -94,19 +95,15 @@ def update_stats(bills_path: Path = DEFAULT_BILLS_PATH) -> None:
     LOGGER.info(f"Updating statistics from bills in {bills_path}")
 
     all_metrics = []
-    for file_path in bills_path.rglob("*"):
-        try:
+    with BillStore(bills_path) as bill_store:
+        # corrupt bills are quarantined and left out of the statistics
+        for entry, bill_data in bill_store.iter_bills():
             try:
-                with gzip.open(file_path, "rt") as input_file:
-                    bill_data = json.load(input_file)
-            except Exception:
-                with open(file_path, "rt") as input_file:
-                    bill_data = json.load(input_file)
-            metrics = get_metrics(bill_data)
-            all_metrics.append(metrics)
-        except Exception as e:
-            LOGGER.error(f"Error processing {file_path}: {str(e)}")
-            raise e
+                metrics = get_metrics(bill_data)
+                all_metrics.append(metrics)
+            except Exception as e:
+                LOGGER.error(f"Error processing {entry.path}: {str(e)}")
+                raise e
 
     LOGGER.info(f"Processed {len(all_metrics)} bill files")
 
@@ -120,9 +117,9 @@ def update_stats(bills_path: Path = DEFAULT_BILLS_PATH) -> None:
         for metric_data in all_metrics:
             aggregate_stats[metric]["values"].append(metric_data[metric])
 
-    STATS_OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(STATS_OUTPUT_PATH, "wt") as output_file:
-        json.dump(aggregate_stats, output_file, indent=2)
+    atomic_write_bytes(
+        STATS_OUTPUT_PATH, json.dumps(aggregate_stats, indent=2).encode("utf-8")
+    )
 
     LOGGER.info(f"Statistics updated and saved to {STATS_OUTPUT_PATH}")
 
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Compute new or updated metrics for all cached bills from the stored spacy annotations.
+
+The annotations are loaded from the DocBin shards in the section cache with a blank
+vocab, so no spacy pipeline is loaded and bills are processed in parallel on CPU.
+Bill-level metrics are computed over the docs of all sections of the bill.
+
+Usage:
+    python3 -m fbs.commands.compute_metrics
+    python3 -m fbs.commands.compute_metrics --metrics ari_raw lexical_density --force
+"""
+
+# standard library imports
+import argparse
+import concurrent.futures
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+# packages
+from spacy.vocab import Vocab
+
+# project imports
+from fbs.logger import LOGGER
+from fbs.sources.govinfo.govinfo_cache import DEFAULT_SECTION_CACHE_PATH, SectionCache
+from fbs.sources.govinfo.govinfo_store import DEFAULT_BILLS_PATH, BillStore
+from fbs.utils.metrics import DOC_METRICS, compute_doc_metrics, get_metric_version
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed command line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Compute metrics for all cached bills from the stored spacy annotations."
+    )
+    parser.add_argument(
+        "--path",
+        type=str,
+        default=str(DEFAULT_BILLS_PATH),
+        help="Path to bills cache directory",
+    )
+    parser.add_argument(
+        "--section-cache-path",
+        type=str,
+        default=str(DEFAULT_SECTION_CACHE_PATH),
+        help="Path to the section cache with the stored annotations",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=str,
+        nargs="+",
+        choices=sorted(DOC_METRICS),
+        default=sorted(DOC_METRICS),
+        help="Metrics to compute",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Recompute metrics whose stored version is current",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Maximum number of bills to process in parallel",
+    )
+    return parser.parse_args()
+
+
+def update_bill_metrics(
+    bill_data: dict[str, Any],
+    metric_names: list[str],
+    section_cache: SectionCache,
+    counts: dict[str, int],
+    force: bool = False,
+) -> Optional[dict[str, Any]]:
+    """
+    Compute metrics for a bill and its sections and write them into the bill data.
+
+    The metric versions are recorded even if some sections have no stored annotations,
+    together with those sections, so the bill is only computed again once one of them
+    has been annotated.
+
+    Args:
+        bill_data: Bill data
+        metric_names: Metrics to compute
+        section_cache: Section cache with the stored annotations
+        counts: Numbers of sections computed and missing annotations to update
+        force: Recompute metrics whose stored version is current
+
+    Returns:
+        Optional[dict[str, Any]]: Updated bill data, or None if every metric is current
+    """
+    # skip metrics that were already computed with the current version, unless
+    # sections that had no annotations have been annotated since
+    metric_versions = {name: get_metric_version(name) for name in metric_names}
+    stored_metrics = bill_data.get("provenance", {}).get("metrics", {})
+    stored_versions = stored_metrics.get("versions", {})
+    if not force and not any(
+        section_cache.has_docs(content_hash, nlp_profile)
+        for content_hash, nlp_profile in stored_metrics.get("missing_sections", [])
+    ):
+        metric_names = [
+            name
+            for name in metric_names
+            if stored_versions.get(name) != metric_versions[name]
+        ]
+    if not metric_names:
+        return None
+
+    vocab = Vocab()
+    bill_docs = []
+    nlp_profiles = set()
+    missing_sections = []
+    for section_data in bill_data.get("sections", []):
+        nlp_profile = section_data.get("provenance", {}).get("nlp_profile")
+        docs = None
+        if nlp_profile is not None and section_data.get("content_hash"):
+            docs = section_cache.get_docs(
+                section_data["content_hash"], nlp_profile, vocab
+            )
+            if docs is None:
+                missing_sections.append([section_data["content_hash"], nlp_profile])
+        if docs is None:
+            counts["missing"] += 1
+            continue
+
+        section_data.setdefault("metrics", {}).update(
+            compute_doc_metrics(docs, metric_names)
+        )
+        bill_docs.extend(docs)
+        nlp_profiles.add(nlp_profile)
+        counts["sections"] += 1
+
+    # bill-level metrics are only meaningful when every section was annotated
+    if counts["missing"] == 0 and bill_docs:
+        bill_data.setdefault("metrics", {}).update(
+            compute_doc_metrics(bill_docs, metric_names)
+        )
+
+    bill_data.setdefault("provenance", {})["metrics"] = {
+        "nlp_profile": ", ".join(sorted(nlp_profiles)),
+        "versions": {
+            **stored_versions,
+            **{name: metric_versions[name] for name in metric_names},
+        },
+        "missing_sections": missing_sections,
+    }
+    return bill_data
+
+
+def compute_bill_metrics(
+    package_id: str,
+    metric_names: list[str],
+    bills_path: Path,
+    section_cache_path: Path,
+    force: bool = False,
+) -> dict[str, int]:
+    """
+    Compute metrics for a cached bill and its sections and write them into the bill.
+
+    Args:
+        package_id: Package id of the bill
+        metric_names: Metrics to compute
+        bills_path: Path to the bill store
+        section_cache_path: Path to the section cache
+        force: Recompute metrics whose stored version is current
+
+    Returns:
+        dict[str, int]: Numbers of sections computed and missing annotations
+    """
+    counts = {"sections": 0, "missing": 0}
+    section_cache = SectionCache(section_cache_path)
+
+    # update under the bill's lock so concurrent writers are not overwritten
+    with BillStore(bills_path) as bill_store:
+        bill_store.update(
+            package_id,
+            lambda bill_data: update_bill_metrics(
+                bill_data, metric_names, section_cache, counts, force
+            ),
+        )
+
+    return counts
+
+
+def main() -> None:
+    """Main function to compute metrics for all cached bills."""
+    args = parse_args()
+
+    with BillStore(Path(args.path)) as bill_store:
+        package_ids = [entry.package_id for entry in bill_store.select()]
+    LOGGER.info(f"Computing {', '.join(args.metrics)} for {len(package_ids)} bills")
+
+    num_sections = 0
+    num_missing = 0
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=args.max_workers
+    ) as executor:
+        futures = {
+            executor.submit(
+                compute_bill_metrics,
+                package_id,
+                args.metrics,
+                Path(args.path),
+                Path(args.section_cache_path),
+                args.force,
+            ): package_id
+            for package_id in package_ids
+        }
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                counts = future.result()
+                num_sections += counts["sections"]
+                num_missing += counts["missing"]
+            except Exception as e:
+                LOGGER.error(f"Error computing metrics for {futures[future]}: {str(e)}")
+
+    LOGGER.info(
+        f"Computed metrics for {num_sections} sections; "
+        f"{num_missing} sections have no stored annotations"
+    )
+
+
+if __name__ == "__main__":
+    main()
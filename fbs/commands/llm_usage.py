@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Report LLM token usage, cost, and latency from the accounting store.
+
+Usage:
+    python3 -m fbs.commands.llm_usage
+    python3 -m fbs.commands.llm_usage --start-date YYYY-MM-DD --end-date YYYY-MM-DD --by prompt
+"""
+
+# standard library imports
+import argparse
+import bisect
+import datetime
+import statistics
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+# project imports
+from fbs.llm.accounting import (
+    DEFAULT_ACCOUNTING_PATH,
+    AccountingStore,
+    get_record_cost,
+)
+
+# report groupings
+REPORT_GROUPS = ("prompt", "decile", "day")
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed command line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Report LLM token usage, cost, and latency."
+    )
+    parser.add_argument(
+        "--start-date",
+        type=str,
+        help="First day to include (YYYY-MM-DD)",
+    )
+    parser.add_argument(
+        "--end-date",
+        type=str,
+        help="Last day to include (YYYY-MM-DD)",
+    )
+    parser.add_argument(
+        "--by",
+        type=str,
+        choices=REPORT_GROUPS,
+        action="append",
+        help="Grouping to report, may be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--accounting-path",
+        type=Path,
+        default=DEFAULT_ACCOUNTING_PATH,
+        help="Path to the accounting store",
+    )
+    return parser.parse_args()
+
+
+def get_size_decile_function(
+    records: list[dict[str, Any]],
+) -> Callable[[dict[str, Any]], str]:
+    """
+    Get a function that maps a record to the size decile of its bill, with deciles
+    computed over the distinct bills in the records.
+
+    Args:
+        records: Accounting records.
+
+    Returns:
+        Callable[[dict[str, Any]], str]: Decile label function.
+    """
+    bill_tokens = {
+        record["package_id"]: record["bill_tokens"]
+        for record in records
+        if record.get("package_id") and record.get("bill_tokens") is not None
+    }
+    if len(bill_tokens) < 2:
+        return lambda record: "all"
+
+    deciles = statistics.quantiles(bill_tokens.values(), n=10, method="inclusive")
+
+    def get_decile(record: dict[str, Any]) -> str:
+        if record.get("bill_tokens") is None:
+            return "unknown"
+        return f"d{bisect.bisect_left(deciles, record['bill_tokens']) + 1:02d}"
+
+    return get_decile
+
+
+def summarize_records(
+    records: list[dict[str, Any]], get_group: Callable[[dict[str, Any]], Optional[str]]
+) -> dict[str, dict[str, Any]]:
+    """
+    Summarize records by group.
+
+    Args:
+        records: Accounting records.
+        get_group: Function that maps a record to its group.
+
+    Returns:
+        dict[str, dict[str, Any]]: Summary by group.
+    """
+    grouped_records = defaultdict(list)
+    for record in records:
+        grouped_records[str(get_group(record))].append(record)
+
+    summaries = {}
+    for group, group_records in sorted(grouped_records.items()):
+        latencies = sorted(record.get("latency", 0.0) for record in group_records)
+        costs = [get_record_cost(record) for record in group_records]
+        summaries[group] = {
+            "calls": len(group_records),
+            "errors": sum(1 for record in group_records if record["status"] != "ok"),
+            "bills": len({record.get("package_id") for record in group_records}),
+            "prompt_tokens": sum(r.get("prompt_tokens", 0) for r in group_records),
+            "cached_tokens": sum(r.get("cached_tokens", 0) for r in group_records),
+            "completion_tokens": sum(
+                r.get("completion_tokens", 0) for r in group_records
+            ),
+            "cost": sum(cost for cost in costs if cost is not None),
+            "unpriced": sum(1 for cost in costs if cost is None),
+            "latency_mean": statistics.mean(latencies),
+            "latency_p95": latencies[int(0.95 * (len(latencies) - 1))],
+        }
+
+    return summaries
+
+
+def print_summary(title: str, summaries: dict[str, dict[str, Any]]) -> None:
+    """
+    Print a summary table.
+
+    Args:
+        title: Table title.
+        summaries: Summary by group.
+    """
+    print(f"\n{title}")
+    print(
+        f"{'group':<28} {'calls':>7} {'errors':>6} {'bills':>6} {'prompt':>12} "
+        f"{'cached':>12} {'completion':>11} {'cost':>10} {'mean s':>7} {'p95 s':>7}"
+    )
+    for group, summary in summaries.items():
+        print(
+            f"{group[:28]:<28} {summary['calls']:>7} {summary['errors']:>6} "
+            f"{summary['bills']:>6} {summary['prompt_tokens']:>12} "
+            f"{summary['cached_tokens']:>12} {summary['completion_tokens']:>11} "
+            f"{summary['cost']:>10.2f} {summary['latency_mean']:>7.1f} "
+            f"{summary['latency_p95']:>7.1f}"
+            + (f"  ({summary['unpriced']} unpriced)" if summary["unpriced"] else "")
+        )
+
+
+def main() -> None:
+    """
+    Main entry point.
+    """
+    args = parse_args()
+
+    store = AccountingStore(args.accounting_path)
+    records = list(
+        store.iter_records(
+            start_date=(
+                datetime.date.fromisoformat(args.start_date)
+                if args.start_date
+                else None
+            ),
+            end_date=(
+                datetime.date.fromisoformat(args.end_date) if args.end_date else None
+            ),
+        )
+    )
+    if len(records) == 0:
+        print("No LLM usage records found.")
+        return
+
+    print_summary("Total", summarize_records(records, lambda record: "all"))
+
+    groups = args.by or REPORT_GROUPS
+    if "prompt" in groups:
+        print_summary(
+            "By prompt",
+            summarize_records(records, lambda record: record.get("prompt_name")),
+        )
+    if "decile" in groups:
+        print_summary(
+            "By bill size decile",
+            summarize_records(records, get_size_decile_function(records)),
+        )
+    if "day" in groups:
+        print_summary(
+            "By day",
+            summarize_records(records, lambda record: record["timestamp"][:10]),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,34 @@
 # imports
-import gzip
-import json
 from pathlib import Path
 
+# project
+from fbs.sources.govinfo.govinfo_store import BillStore
 
-if __name__ == "__main__":
-    # Get all JSON and gzipped JSON files
-    bills_path = Path.home() / ".cache" / "fbs" / "bills"
-    json_files = list(bills_path.rglob("*"))
 
-    for json_file in json_files:
-        data = {}
-        with gzip.open(json_file, "rt") as input_file:
-            data.update(json.load(input_file))
-            if "num_characters" not in data:
-                data["num_characters"] = len(data["text"])
+def add_num_characters(data: dict) -> dict:
+    """
+    Add character counts to a bill and its sections.
+
+    Args:
+        data (dict): Bill data.
+
+    Returns:
+        dict: Updated bill data.
+    """
+    if "num_characters" not in data:
+        data["num_characters"] = len(data["text"])
+
+    for section_data in data["sections"]:
+        if "num_characters" not in section_data:
+            section_data["num_characters"] = len(section_data["text"])
 
-            for section_data in data["sections"]:
-                if "num_characters" not in section_data:
-                    section_data["num_characters"] = len(section_data["text"])
+    return data
+
+
+if __name__ == "__main__":
+    bills_path = Path.home() / ".cache" / "fbs" / "bills"
 
-        with gzip.open(json_file, "wt") as output_file:
-            json.dump(data, output_file)
+    # update each bill under its lock so concurrent writers are not overwritten
+    with BillStore(bills_path) as bill_store:
+        for entry in bill_store.select():
+            bill_store.update(entry.package_id, add_num_characters)
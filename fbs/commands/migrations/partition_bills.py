@@ -0,0 +1,22 @@
+"""
+Move bills from the flat blake2b-named layout into the partitioned bill store and
+rebuild its manifest.
+
+Usage:
+    python3 -m fbs.commands.migrations.partition_bills
+"""
+
+# imports
+from pathlib import Path
+
+# project
+from fbs.logger import LOGGER
+from fbs.sources.govinfo.govinfo_store import BillStore
+
+if __name__ == "__main__":
+    bills_path = Path.home() / ".cache" / "fbs" / "bills"
+
+    with BillStore(bills_path) as bill_store:
+        num_bills = bill_store.rebuild()
+
+    LOGGER.info("Recorded %d bills in the manifest", num_bills)
@@ -5,24 +5,52 @@ Parse bills from GovInfo and store them in the filesystem cache.
 Usage:
     python3 -m fbs.commands.parse_bills --date YYYY-MM-DD
     python3 -m fbs.commands.parse_bills --start-date YYYY-MM-DD --end-date YYYY-MM-DD
+    python3 -m fbs.commands.parse_bills --phase stats --date YYYY-MM-DD
+    python3 -m fbs.commands.parse_bills --phase llm
 """
 
 # standard library imports
 import argparse
 import datetime
 import sys
-import time
+from typing import Iterator, List, Optional
 
 # third party imports
 from alea_llm_client import OpenAIModel, GrokModel
 
 # project imports
+from fbs.llm.accounting import AccountingAIModel, AccountingStore
+from fbs.llm.cache import CachedAIModel
+from fbs.llm.hedging import DEFAULT_DEADLINE, DEFAULT_HEDGE_PERCENTILE, HedgedAIModel
+from fbs.llm.routing import RoutedAIModel
+from fbs.llm.scheduler import (
+    DEFAULT_MAX_RPM,
+    DEFAULT_MAX_TPM,
+    DEFAULT_MAX_WORKERS,
+    LLMScheduler,
+    ScheduledAIModel,
+)
+from fbs.llm.usage import UsageAIModel
 from fbs.logger import LOGGER
+from fbs.sources.govinfo.govinfo_parser import DEFAULT_SECTION_MODE, SECTION_MODES
 from fbs.sources.govinfo.govinfo_source import GovInfoSource
+from fbs.sources.govinfo.govinfo_types import SearchResult
+from fbs.utils.workers import (
+    DEFAULT_MAX_TASKS_PER_WORKER,
+    DEFAULT_MAX_WORKER_RSS,
+    WorkerPool,
+)
 
 # constants
 DEFAULT_PAGE_SIZE = 100
-DEFAULT_SLEEP = 1.0
+PHASE_CHOICES = ["all", "stats", "llm"]
+MODEL_CHOICES = [
+    "grok-2-1212",
+    "gpt-4o",
+    "gpt-4o-mini",
+    "claude-3.5-sonnet",
+    "gemini-2.0",
+]
 
 
 def parse_args() -> argparse.Namespace:
@@ -54,15 +82,116 @@ def parse_args() -> argparse.Namespace:
         help="End date to parse bills for (YYYY-MM-DD)",
     )
 
+    # Add processing phase argument
+    parser.add_argument(
+        "--phase",
+        type=str,
+        choices=PHASE_CHOICES,
+        default="all",
+        help="Parse bill statistics, fill in pending LLM fields, or both in turn",
+    )
+
     # Add model selection argument
     parser.add_argument(
         "--model",
         type=str,
-        choices=["grok-2-1212", "gpt-4o", "claude-3.5-sonnet", "gemini-2.0"],
+        choices=MODEL_CHOICES,
         default="gpt-4o",
         help="LLM model to use for analysis",
     )
 
+    # Add fast model routing arguments
+    parser.add_argument(
+        "--fast-model",
+        type=str,
+        choices=MODEL_CHOICES,
+        default=None,
+        help="Fast LLM model for section, keyword, and entity prompts",
+    )
+    parser.add_argument(
+        "--fast-max-tokens",
+        type=int,
+        default=None,
+        help="Route prompts larger than this many tokens to the primary model",
+    )
+
+    # Add LLM rate limit arguments
+    parser.add_argument(
+        "--max-rpm",
+        type=int,
+        default=DEFAULT_MAX_RPM,
+        help="Maximum LLM requests per minute",
+    )
+    parser.add_argument(
+        "--max-tpm",
+        type=int,
+        default=DEFAULT_MAX_TPM,
+        help="Maximum LLM prompt tokens per minute",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help="Maximum number of concurrent LLM requests",
+    )
+
+    # Add tail-latency control arguments
+    parser.add_argument(
+        "--llm-deadline",
+        type=float,
+        default=DEFAULT_DEADLINE,
+        help="Deadline for each LLM call in seconds",
+    )
+    parser.add_argument(
+        "--hedge-percentile",
+        type=float,
+        default=DEFAULT_HEDGE_PERCENTILE,
+        help="Latency percentile after which to send a hedged request (0 disables)",
+    )
+    parser.add_argument(
+        "--fallback-model",
+        type=str,
+        choices=MODEL_CHOICES,
+        default=None,
+        help="LLM model to fail over to when a call fails or exceeds its deadline",
+    )
+
+    # Add parse worker arguments
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="Number of worker processes for parsing bills (0 parses in this process)",
+    )
+    parser.add_argument(
+        "--max-tasks-per-worker",
+        type=int,
+        default=DEFAULT_MAX_TASKS_PER_WORKER,
+        help="Number of bills a parse worker handles before it is recycled",
+    )
+    parser.add_argument(
+        "--max-worker-rss-mb",
+        type=int,
+        default=DEFAULT_MAX_WORKER_RSS // 1024**2,
+        help="RSS ceiling in MB after which a parse worker is restarted",
+    )
+
+    # Add section prompt mode
+    parser.add_argument(
+        "--section-mode",
+        type=str,
+        choices=SECTION_MODES,
+        default=DEFAULT_SECTION_MODE,
+        help="How to batch section summary and audit prompts",
+    )
+
+    # Add LLM response cache toggle
+    parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="Disable the persistent LLM response cache",
+    )
+
     # Parse args
     args = parser.parse_args()
 
@@ -124,12 +253,224 @@ def get_model(model_name: str) -> OpenAIModel | GrokModel:
     """
     if model_name == "gpt-4o":
         return OpenAIModel(model="gpt-4o")
+    elif model_name == "gpt-4o-mini":
+        return OpenAIModel(model="gpt-4o-mini")
     elif model_name == "grok-2-1212":
         return GrokModel(model="grok-2-1212")
     else:
         raise ValueError(f"Invalid model name: {model_name}")
 
 
+def get_model_stack(
+    model_name: str,
+    scheduler: LLMScheduler,
+    use_cache: bool = True,
+    fallback_model_name: Optional[str] = None,
+    deadline: float = DEFAULT_DEADLINE,
+    hedge_percentile: Optional[float] = DEFAULT_HEDGE_PERCENTILE,
+) -> tuple[CachedAIModel | ScheduledAIModel, UsageAIModel]:
+    """
+    Get a model with accounting, deadlines and hedging, usage tracking, scheduling,
+    and caching.
+
+    Args:
+        model_name: Name of model to use
+        scheduler: Shared LLM scheduler
+        use_cache: Whether to use the persistent LLM response cache
+        fallback_model_name: Name of model to fail over to
+        deadline: Deadline for each LLM call in seconds
+        hedge_percentile: Latency percentile for hedged requests, or None
+
+    Returns:
+        tuple[CachedAIModel | ScheduledAIModel, UsageAIModel]: Model and its usage tracker
+    """
+    # hedged duplicates and failovers are admitted through the scheduler too
+    accounting_store = AccountingStore()
+    fallback_model = None
+    if fallback_model_name is not None and fallback_model_name != model_name:
+        fallback_model = ScheduledAIModel(
+            AccountingAIModel(get_model(fallback_model_name), accounting_store),
+            scheduler,
+        )
+
+    accounting_model = AccountingAIModel(get_model(model_name), accounting_store)
+    usage_model = UsageAIModel(
+        HedgedAIModel(
+            accounting_model,
+            fallback_model=fallback_model,
+            hedge_model=ScheduledAIModel(accounting_model, scheduler),
+            deadline=deadline,
+            hedge_percentile=hedge_percentile,
+        )
+    )
+    model = ScheduledAIModel(usage_model, scheduler)
+    if use_cache:
+        model = CachedAIModel(model)
+    return model, usage_model
+
+
+def search_bills(govinfo: GovInfoSource, date: datetime.date) -> Iterator[SearchResult]:
+    """
+    Search for all bills published or ingested on a date.
+
+    Args:
+        govinfo: GovInfo source
+        date: Date to search
+
+    Returns:
+        Iterator[SearchResult]: Search results across all pages
+    """
+    # Build query for current date
+    query = f"collection:BILLS AND (publishdate:{date.isoformat()} OR ingestdate:{date.isoformat()})"
+
+    # Search for bills
+    LOGGER.info("Searching for bills on %s", date.isoformat())
+    search_results = govinfo.search(query=query, page_size=DEFAULT_PAGE_SIZE)
+
+    # get all of them
+    while True:
+        if not search_results.results or len(search_results.results) == 0:
+            break
+
+        yield from search_results.results
+
+        search_results = govinfo.search(
+            query=query,
+            page_size=DEFAULT_PAGE_SIZE,
+            offset_mark=search_results.offsetMark,
+        )
+
+
+def search_date_range(
+    govinfo: GovInfoSource, start_date: datetime.date, end_date: datetime.date
+) -> Iterator[SearchResult]:
+    """
+    Search for all bills published or ingested in a date range.
+
+    Args:
+        govinfo: GovInfo source
+        start_date: First date to search
+        end_date: Last date to search
+
+    Returns:
+        Iterator[SearchResult]: Search results across all dates
+    """
+    current_date = start_date
+    while current_date <= end_date:
+        yield from search_bills(govinfo, current_date)
+
+        # Move to next date
+        current_date += datetime.timedelta(days=1)
+
+
+# govinfo source of a parse worker process
+WORKER_GOVINFO: Optional[GovInfoSource] = None
+
+
+def init_parse_worker() -> None:
+    """
+    Initialize a parse worker process.
+
+    Parse workers make no LLM calls, so they do not share the LLM scheduler; the LLM
+    phase runs in the main process within its rate limits.  GovInfo fetches are
+    throttled by each worker's GovInfoSource.
+    """
+    global WORKER_GOVINFO
+    WORKER_GOVINFO = GovInfoSource()
+
+
+def parse_bill_result(result: SearchResult) -> str:
+    """
+    Parse and cache a bill without LLM analysis in a parse worker process.
+
+    Args:
+        result: Search result
+
+    Returns:
+        str: LLM status of the cached bill
+    """
+    LOGGER.info("Parsing bill %s", result.packageId)
+    return WORKER_GOVINFO.get_bill_data(result).llm_status
+
+
+def parse_bill_data(
+    govinfo: GovInfoSource,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    pool: Optional[WorkerPool] = None,
+) -> List[str]:
+    """
+    Parse and cache bills without LLM analysis so their statistics can be published.
+
+    Args:
+        govinfo: GovInfo source
+        start_date: First date to search
+        end_date: Last date to search
+        pool: Parse worker pool, or None to parse in this process
+
+    Returns:
+        List[str]: Package ids of bills whose LLM fields are pending
+    """
+    search_results = search_date_range(govinfo, start_date, end_date)
+
+    pending_package_ids = []
+    if pool is not None:
+        for result, llm_status, error in pool.run(search_results):
+            if error is not None:
+                LOGGER.error("Error parsing bill %s: %s", result.packageId, error)
+            elif llm_status == "pending":
+                pending_package_ids.append(result.packageId)
+        LOGGER.info("Parse worker stats: %s", pool.get_stats())
+        return pending_package_ids
+
+    for result in search_results:
+        try:
+            LOGGER.info("Parsing bill %s", result.packageId)
+            bill = govinfo.get_bill_data(result)
+            if bill.llm_status == "pending":
+                pending_package_ids.append(result.packageId)
+        except Exception as e:
+            LOGGER.error(
+                "Error parsing bill %s: %s",
+                result.packageId,
+                str(e),
+            )
+            continue
+
+    return pending_package_ids
+
+
+def analyze_bills(
+    govinfo: GovInfoSource,
+    package_ids: List[str],
+    model: CachedAIModel | ScheduledAIModel | RoutedAIModel,
+) -> None:
+    """
+    Fill in the LLM fields of cached bills.
+
+    Args:
+        govinfo: GovInfo source
+        package_ids: Package ids of cached bills
+        model: LLM model
+    """
+    for package_id in package_ids:
+        try:
+            LOGGER.info("Analyzing bill %s", package_id)
+            bill = govinfo.analyze_cached_bill(package_id, model)
+            LOGGER.info(
+                "Successfully processed bill %s: %s",
+                bill.legis_num,
+                bill.title,
+            )
+        except Exception as e:
+            LOGGER.error(
+                "Error analyzing bill %s: %s",
+                package_id,
+                str(e),
+            )
+            continue
+
+
 def main() -> None:
     """
     Main entry point.
@@ -146,56 +487,76 @@ def main() -> None:
             end_date.isoformat(),
         )
 
-        # Get model
-        model = get_model(args.model)
+        # Get model, admitting all calls through the shared scheduler
+        scheduler = LLMScheduler(
+            max_rpm=args.max_rpm,
+            max_tpm=args.max_tpm,
+            max_workers=args.max_concurrency,
+        )
+        stack_kwargs = {
+            "use_cache": not args.no_llm_cache,
+            "fallback_model_name": args.fallback_model,
+            "deadline": args.llm_deadline,
+            "hedge_percentile": args.hedge_percentile or None,
+        }
+        model, usage_model = get_model_stack(args.model, scheduler, **stack_kwargs)
+        model_stacks = [(model, usage_model)]
         LOGGER.info("Using model: %s", model.model)
 
-        # Initialize GovInfo client
-        with GovInfoSource() as govinfo:
-            current_date = start_date
-            while current_date <= end_date:
-                # Build query for current date
-                query = f"collection:BILLS AND (publishdate:{current_date.isoformat()} OR ingestdate:{current_date.isoformat()})"
-
-                # Search for bills
-                LOGGER.info("Searching for bills on %s", current_date.isoformat())
-                search_results = govinfo.search(
-                    query=query, page_size=DEFAULT_PAGE_SIZE
-                )
+        # Route section, keyword, and entity prompts to the fast model
+        if args.fast_model is not None and args.fast_model != args.model:
+            fast_model, fast_usage_model = get_model_stack(
+                args.fast_model, scheduler, **stack_kwargs
+            )
+            model_stacks.append((fast_model, fast_usage_model))
+            model = RoutedAIModel(
+                model, fast_model, max_fast_tokens=args.fast_max_tokens
+            )
+            LOGGER.info("Using fast model: %s", fast_model.model)
 
-                # get all of them
-                while True:
-                    if not search_results.results or len(search_results.results) == 0:
-                        break
-
-                    for result in search_results.results:
-                        try:
-                            LOGGER.info("Processing bill %s", result.packageId)
-                            bill = govinfo.get_bill(result, model)
-                            LOGGER.info(
-                                "Successfully processed bill %s: %s",
-                                bill.legis_num,
-                                bill.title,
-                            )
-
-                            # sleep
-                            time.sleep(DEFAULT_SLEEP)
-                        except Exception as e:
-                            LOGGER.error(
-                                "Error processing bill %s: %s",
-                                result.packageId,
-                                str(e),
-                            )
-                            continue
-
-                    search_results = govinfo.search(
-                        query=query,
-                        page_size=DEFAULT_PAGE_SIZE,
-                        offset_mark=search_results.offsetMark,
+        # Initialize GovInfo client
+        with GovInfoSource(
+            scheduler=scheduler, section_mode=args.section_mode
+        ) as govinfo:
+            # Publish statistics for every bill before any LLM work starts
+            if args.phase in ("all", "stats"):
+                pool = None
+                if args.parse_workers > 0:
+                    pool = WorkerPool(
+                        parse_bill_result,
+                        args.parse_workers,
+                        initializer=init_parse_worker,
+                        max_tasks_per_worker=args.max_tasks_per_worker,
+                        max_rss_bytes=args.max_worker_rss_mb * 1024**2,
                     )
-
-                # Move to next date
-                current_date += datetime.timedelta(days=1)
+                pending_package_ids = parse_bill_data(
+                    govinfo, start_date, end_date, pool
+                )
+                LOGGER.info("%d bills pending LLM analysis", len(pending_package_ids))
+
+            # Fill in the LLM fields, oldest pending bills first for the llm phase
+            if args.phase == "llm":
+                pending_package_ids = govinfo.get_pending_package_ids()
+            if args.phase in ("all", "llm"):
+                analyze_bills(govinfo, pending_package_ids, model)
+
+        for stack_model, stack_usage_model in model_stacks:
+            if isinstance(stack_model, CachedAIModel):
+                LOGGER.info(
+                    "LLM cache stats for %s: %s",
+                    stack_model.model,
+                    stack_model.get_stats(),
+                )
+            LOGGER.info(
+                "LLM usage stats for %s: %s",
+                stack_model.model,
+                stack_usage_model.get_stats(),
+            )
+            LOGGER.info(
+                "LLM hedging stats for %s: %s",
+                stack_model.model,
+                stack_usage_model.llm_model.get_stats(),
+            )
 
     except Exception as e:
         LOGGER.error("Error: %s", str(e))
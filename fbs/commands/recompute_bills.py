@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Find stale derived fields across the bill cache and regenerate only those.
+
+A field is stale when the prompt that produced it, or the NLP profile that produced the
+stats, has changed since it was computed.  Fields that read a stale field are
+recomputed as well, so, e.g., editing the ELI5 prompt costs one call per bill.
+
+Usage:
+    python3 -m fbs.commands.recompute_bills --dry-run
+    python3 -m fbs.commands.recompute_bills
+    python3 -m fbs.commands.recompute_bills --fields eli5
+    python3 -m fbs.commands.recompute_bills --stamp-missing
+"""
+
+# standard library imports
+import argparse
+import concurrent.futures
+import sys
+from collections import Counter
+
+# project imports
+from fbs.commands.parse_bills import MODEL_CHOICES, get_model_stack
+from fbs.llm.scheduler import (
+    DEFAULT_MAX_RPM,
+    DEFAULT_MAX_TPM,
+    DEFAULT_MAX_WORKERS,
+    LLMScheduler,
+)
+from fbs.logger import LOGGER
+from fbs.sources.govinfo.govinfo_parser import (
+    DEFAULT_SECTION_MODE,
+    SECTION_MODES,
+    stamp_provenance,
+)
+from fbs.sources.govinfo.govinfo_prompts import BILL_PROMPT_VERSIONS
+from fbs.sources.govinfo.govinfo_source import GovInfoSource
+
+# constants
+DEFAULT_MAX_BILLS = 8
+FIELD_CHOICES = ["stats", "sections", *BILL_PROMPT_VERSIONS]
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed command line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Find stale derived fields across the bill cache and regenerate only those."
+    )
+    parser.add_argument(
+        "--fields",
+        type=str,
+        nargs="+",
+        choices=FIELD_CHOICES,
+        default=[],
+        help="Fields to recompute regardless of their provenance",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report the stale fields",
+    )
+    parser.add_argument(
+        "--stamp-missing",
+        action="store_true",
+        help="Record the current versions for fields without provenance instead of recomputing",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        choices=MODEL_CHOICES,
+        default="gpt-4o",
+        help="LLM model to use for analysis",
+    )
+    parser.add_argument(
+        "--fallback-model",
+        type=str,
+        choices=MODEL_CHOICES,
+        default=None,
+        help="LLM model to fail over to when a call fails or exceeds its deadline",
+    )
+    parser.add_argument(
+        "--max-rpm",
+        type=int,
+        default=DEFAULT_MAX_RPM,
+        help="Maximum LLM requests per minute",
+    )
+    parser.add_argument(
+        "--max-tpm",
+        type=int,
+        default=DEFAULT_MAX_TPM,
+        help="Maximum LLM prompt tokens per minute",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help="Maximum number of concurrent LLM requests",
+    )
+    parser.add_argument(
+        "--max-bills",
+        type=int,
+        default=DEFAULT_MAX_BILLS,
+        help="Maximum number of bills to recompute concurrently",
+    )
+    parser.add_argument(
+        "--section-mode",
+        type=str,
+        choices=SECTION_MODES,
+        default=DEFAULT_SECTION_MODE,
+        help="How to batch section summary and audit prompts",
+    )
+    parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="Disable the persistent LLM response cache",
+    )
+    return parser.parse_args()
+
+
+def stamp_bills(govinfo: GovInfoSource, section_mode: str) -> int:
+    """
+    Record the current versions for cached fields without provenance.
+
+    Args:
+        govinfo: GovInfo source
+        section_mode: Section mode the sections were analyzed in
+
+    Returns:
+        int: Number of bills stamped
+    """
+    num_bills = 0
+    for package_id in govinfo.iter_cached_package_ids():
+        bill = govinfo.load_cached_bill(package_id)
+        if bill is None:
+            continue
+        stamp_provenance(bill, section_mode)
+        govinfo.save_bill(bill)
+        num_bills += 1
+    return num_bills
+
+
+def main() -> None:
+    """
+    Main entry point.
+    """
+    args = parse_args()
+
+    try:
+        scheduler = LLMScheduler(
+            max_rpm=args.max_rpm,
+            max_tpm=args.max_tpm,
+            max_workers=args.max_concurrency,
+        )
+        model, usage_model = get_model_stack(
+            args.model,
+            scheduler,
+            use_cache=not args.no_llm_cache,
+            fallback_model_name=args.fallback_model,
+        )
+
+        with GovInfoSource(
+            scheduler=scheduler, section_mode=args.section_mode
+        ) as govinfo:
+            if args.stamp_missing:
+                LOGGER.info(
+                    "Stamped provenance for %d bills",
+                    stamp_bills(govinfo, args.section_mode),
+                )
+                return
+
+            package_ids = list(govinfo.iter_cached_package_ids())
+            LOGGER.info("Found %d cached bills", len(package_ids))
+
+            if args.dry_run:
+                stale_counts = Counter()
+                for package_id in package_ids:
+                    bill = govinfo.load_cached_bill(package_id)
+                    if bill is None:
+                        continue
+                    stale_counts.update(
+                        govinfo.get_stale_fields(bill, model, args.fields)
+                    )
+                for field_name, count in stale_counts.most_common():
+                    LOGGER.info("%s: %d stale bills", field_name, count)
+                return
+
+            # recompute bills concurrently, with the scheduler limiting the llm calls
+            recomputed_counts = Counter()
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=args.max_bills
+            ) as executor:
+                futures = {
+                    executor.submit(
+                        govinfo.recompute_cached_bill, package_id, model, args.fields
+                    ): package_id
+                    for package_id in package_ids
+                }
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        recomputed_counts.update(future.result())
+                    except Exception as e:
+                        LOGGER.error(
+                            "Error recomputing bill %s: %s",
+                            futures[future],
+                            str(e),
+                        )
+
+            for field_name, count in recomputed_counts.most_common():
+                LOGGER.info("%s: recomputed for %d bills", field_name, count)
+            LOGGER.info("LLM usage stats: %s", usage_model.get_stats())
+
+    except Exception as e:
+        LOGGER.error("Error: %s", str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
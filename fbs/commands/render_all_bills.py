@@ -2,18 +2,28 @@
 """
 Render all bill analysis JSON files from cache directory to HTML and PDF.
 
+Bills are selected from the bill store manifest, and bills whose outputs are newer
+than the bill are skipped without opening them.
+
 Usage:
     python3 -m fbs.commands.render_all_bills [--path /path/to/bills/]
+    python3 -m fbs.commands.render_all_bills --start-date 2025-03-01 --end-date 2025-03-31
 """
 
 # standard library imports
 import argparse
-import gzip
 from pathlib import Path
 
 # project imports
 from fbs.logger import LOGGER
-from fbs.render.bill import load_json_data, render_template_html, render_template_pdf
+from fbs.render.bill import (
+    enrich_bill_data,
+    load_bill_stats,
+    render_template_html,
+    render_template_pdf,
+)
+from fbs.sources.govinfo.govinfo_codec import encode_record
+from fbs.sources.govinfo.govinfo_store import BillStore, ManifestEntry
 from fbs.sources.govinfo.govinfo_types import get_bill_slug
 
 # constants
@@ -54,15 +64,46 @@ def parse_args() -> argparse.Namespace:
         help="Path to the output directory",
     )
 
+    parser.add_argument(
+        "--start-date",
+        type=str,
+        default=None,
+        help="Only render bills dated on or after this date (YYYY-MM-DD)",
+    )
+
+    parser.add_argument(
+        "--end-date",
+        type=str,
+        default=None,
+        help="Only render bills dated on or before this date (YYYY-MM-DD)",
+    )
+
     return parser.parse_args()
 
 
-def render_bill_file(input_path: Path, template_dir: Path, output_dir: Path) -> None:
+def is_output_current(input_mtime: float, output_path: Path) -> bool:
     """
-    Render a single bill JSON file to HTML and PDF.
+    Check whether an output file exists and is newer than its input bill.
 
     Args:
-        input_path: Path to the input JSON file
+        input_mtime: Modification time of the input bill from the manifest
+        output_path: Path to the output file
+
+    Returns:
+        bool: True if the output does not need to be rendered again
+    """
+    return output_path.exists() and output_path.stat().st_mtime >= input_mtime
+
+
+def render_bill_file(
+    entry: ManifestEntry, bill_store: BillStore, template_dir: Path, output_dir: Path
+) -> None:
+    """
+    Render a single bill to HTML and PDF.
+
+    Args:
+        entry: Manifest entry of the bill
+        bill_store: Bill store
         template_dir: Path to template directory
         output_dir: Path to output directory
 
@@ -70,49 +111,66 @@ def render_bill_file(input_path: Path, template_dir: Path, output_dir: Path) ->
         Exception: If rendering fails
     """
     try:
-        # read the input path json data
-        bill_data = load_json_data(input_path)
-
-        # get bill slug from data
-        bill_slug = get_bill_slug(
-            bill_data["legis_num"], bill_data["title"], bill_data["bill_version"]
-        )
-
-        # get output paths
-        output_path_html = output_dir / f"{bill_slug}.html"
-        output_path_pdf = output_dir / f"{bill_slug}.pdf"
-        output_path_json = output_dir / f"{bill_slug}.json"
+        # get output paths from the manifest slug
+        output_path_html = output_dir / f"{entry.slug}.html"
+        output_path_pdf = output_dir / f"{entry.slug}.pdf"
+        output_path_json = output_dir / f"{entry.slug}.json"
+
+        # skip bills whose outputs are current without opening them, including when
+        # the LLM fields were filled in after the last build
+        output_paths = (output_path_html, output_path_pdf, output_path_json)
+        if entry.slug and all(
+            is_output_current(entry.mtime, output_path) for output_path in output_paths
+        ):
+            LOGGER.warning(f"Outputs are current: {entry.slug}")
+            return
+
+        # read the bill, skipping bills quarantined as corrupt
+        bill_data = bill_store.read(entry.package_id)
+        if bill_data is None:
+            LOGGER.warning(f"Skipping missing or corrupt bill: {entry.path}")
+            return
+        bill_json = encode_record(bill_data)
+        bill_data = enrich_bill_data(bill_data, load_bill_stats())
+
+        # bills recorded without a slug get it from the data
+        if not entry.slug:
+            bill_slug = get_bill_slug(
+                bill_data["legis_num"], bill_data["title"], bill_data["bill_version"]
+            )
+            output_path_html = output_dir / f"{bill_slug}.html"
+            output_path_pdf = output_dir / f"{bill_slug}.pdf"
+            output_path_json = output_dir / f"{bill_slug}.json"
 
         # make sure output exists
         output_dir.mkdir(parents=True, exist_ok=True)
 
         # render HTML if needed
-        if output_path_html.exists():
-            LOGGER.warning(f"Output HTML exists: {output_path_html}")
+        if is_output_current(entry.mtime, output_path_html):
+            LOGGER.warning(f"Output HTML is current: {output_path_html}")
         else:
-            LOGGER.info(f"Rendering {input_path} to {output_path_html}")
+            LOGGER.info(f"Rendering {entry.path} to {output_path_html}")
             render_template_html(bill_data, str(template_dir), str(output_path_html))
 
         # render PDF if needed
-        if output_path_pdf.exists():
-            LOGGER.warning(f"Output PDF exists: {output_path_pdf}")
+        if is_output_current(entry.mtime, output_path_pdf):
+            LOGGER.warning(f"Output PDF is current: {output_path_pdf}")
         else:
-            LOGGER.info(f"Rendering {input_path} to {output_path_pdf}")
+            LOGGER.info(f"Rendering {entry.path} to {output_path_pdf}")
             render_template_pdf(
                 str(output_path_html),
                 str(output_path_pdf),
             )
-        # copy the json file to the slug path
-        if output_path_json.exists():
-            LOGGER.warning(f"Output JSON exists: {output_path_json}")
+        # copy the json data to the slug path
+        if is_output_current(entry.mtime, output_path_json):
+            LOGGER.warning(f"Output JSON is current: {output_path_json}")
         else:
             LOGGER.info(f"Copying JSON to {output_path_json}")
-            with gzip.open(input_path, "rt") as input_file:
-                with open(output_path_json, "wt") as output_file:
-                    output_file.write(input_file.read())
+            with open(output_path_json, "wb") as output_file:
+                output_file.write(bill_json)
 
     except Exception as e:
-        LOGGER.error(f"Error rendering {input_path}: {str(e)}")
+        LOGGER.error(f"Error rendering {entry.path}: {str(e)}")
         raise
 
 
@@ -127,18 +185,20 @@ def main() -> None:
         template_dir = Path(args.template_dir)
         output_dir = Path(args.output_dir)
 
-        # Get all JSON and gzipped JSON files
-        json_files = list(bills_path.rglob("*"))
-
-        LOGGER.info(f"Found {len(json_files)} bill files in {bills_path}")
-
-        # Process each file
-        for input_file in json_files:
-            try:
-                render_bill_file(input_file, template_dir, output_dir)
-            except Exception as e:
-                LOGGER.error(f"Failed to render {input_file}: {str(e)}")
-                continue
+        # select bills from the manifest
+        with BillStore(bills_path) as bill_store:
+            entries = bill_store.select(
+                start_date=args.start_date, end_date=args.end_date
+            )
+            LOGGER.info(f"Found {len(entries)} bills in {bills_path}")
+
+            # Process each bill
+            for entry in entries:
+                try:
+                    render_bill_file(entry, bill_store, template_dir, output_dir)
+                except Exception as e:
+                    LOGGER.error(f"Failed to render {entry.path}: {str(e)}")
+                    continue
 
         LOGGER.info("Completed rendering all bills")
 
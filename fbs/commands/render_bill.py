@@ -8,14 +8,20 @@ Usage:
 
 # standard library imports
 import argparse
-import shutil
 from pathlib import Path
 
 # packages
 
 # project imports
 from fbs.logger import LOGGER
-from fbs.render.bill import load_json_data, render_template_html, render_template_pdf
+from fbs.render.bill import (
+    enrich_bill_data,
+    load_bill_record,
+    load_bill_stats,
+    render_template_html,
+    render_template_pdf,
+)
+from fbs.sources.govinfo.govinfo_codec import encode_record
 from fbs.sources.govinfo.govinfo_types import get_bill_slug
 
 
@@ -65,8 +71,10 @@ def main() -> None:
         input_path = Path(args.input_file)
         template_dir = Path(args.template_dir)
 
-        # read the input path json data
-        bill_data = load_json_data(input_path)
+        # read the input path json data, plain or from the gzipped store
+        bill_record = load_bill_record(input_path)
+        bill_json = encode_record(bill_record)
+        bill_data = enrich_bill_data(bill_record, load_bill_stats())
 
         # get bill slug from data
         bill_slug = get_bill_slug(
@@ -94,13 +102,14 @@ def main() -> None:
             LOGGER.info("Rendering PDF")
             render_template_pdf(str(output_path_html), str(output_path_pdf))
 
-        # copy the json file to the slug path
+        # write the current-schema json data to the slug path
         output_path_json = Path(args.output_dir) / f"{bill_slug}.json"
         if output_path_json.exists():
             LOGGER.warning(f"Output JSON exists: {output_path_json}")
         else:
-            LOGGER.info(f"Copying JSON to {output_path_json}")
-            shutil.copy(input_path, output_path_json)
+            LOGGER.info(f"Writing JSON to {output_path_json}")
+            with open(output_path_json, "wb") as output_file:
+                output_file.write(bill_json)
 
         LOGGER.info("Conversion completed successfully")
 
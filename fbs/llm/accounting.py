@@ -0,0 +1,199 @@
+"""
+Per-call LLM token, cost, and latency accounting.
+
+Every chat and JSON call that reaches the provider is recorded with the current LLM
+call tags (bill package id, prompt name, section index, bill size) in an append-only
+JSONL store with one file per day.  Costs are computed when reporting, so that price
+changes do not require rewriting records.
+"""
+
+# imports
+import datetime
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+# packages
+from alea_llm_client import BaseAIModel
+
+# project
+from fbs.llm.base import WrappedAIModel
+from fbs.llm.context import get_llm_call_tags
+from fbs.llm.usage import get_response_usage
+from fbs.logger import LOGGER
+
+# default accounting store path
+DEFAULT_ACCOUNTING_PATH = Path.home() / ".cache" / "fbs" / "llm_usage"
+
+# prices in USD per million prompt, cached prompt, and completion tokens
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "grok-2-1212": (2.00, 2.00, 10.00),
+}
+
+# tags copied from the LLM call context into each record
+RECORD_TAGS = ("package_id", "prompt_name", "section_index", "bill_tokens")
+
+
+def get_record_cost(record: dict[str, Any]) -> Optional[float]:
+    """
+    Get the cost of a record in USD.
+
+    Args:
+        record (dict[str, Any]): Accounting record.
+
+    Returns:
+        Optional[float]: Cost in USD, or None if the model has no known price.
+    """
+    prices = MODEL_PRICES.get(record.get("model", ""), None)
+    if prices is None:
+        return None
+
+    prompt_price, cached_price, completion_price = prices
+    cached_tokens = record.get("cached_tokens", 0)
+    return (
+        (record.get("prompt_tokens", 0) - cached_tokens) * prompt_price
+        + cached_tokens * cached_price
+        + record.get("completion_tokens", 0) * completion_price
+    ) / 1_000_000
+
+
+class AccountingStore:
+    """
+    Append-only JSONL store of accounting records, with one file per day.
+    """
+
+    def __init__(self, accounting_path: Path = DEFAULT_ACCOUNTING_PATH):
+        """
+        Initialize the store.
+
+        Args:
+            accounting_path (Path): Path to the store directory.
+        """
+        self.accounting_path = accounting_path
+        self.accounting_path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def append(self, record: dict[str, Any]) -> None:
+        """
+        Append a record to the file for its day.
+
+        Args:
+            record (dict[str, Any]): Accounting record with an ISO timestamp.
+        """
+        record_path = self.accounting_path / f"{record['timestamp'][:10]}.jsonl"
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            with open(record_path, "at", encoding="utf-8") as output_file:
+                output_file.write(line)
+
+    def iter_records(
+        self,
+        start_date: Optional[datetime.date] = None,
+        end_date: Optional[datetime.date] = None,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Iterate over the records in a date range.
+
+        Args:
+            start_date (Optional[datetime.date]): First day to include.
+            end_date (Optional[datetime.date]): Last day to include.
+
+        Returns:
+            Iterator[dict[str, Any]]: Records, oldest first.
+        """
+        for record_path in sorted(self.accounting_path.glob("*.jsonl")):
+            try:
+                record_date = datetime.date.fromisoformat(record_path.stem)
+            except ValueError:
+                continue
+            if start_date is not None and record_date < start_date:
+                continue
+            if end_date is not None and record_date > end_date:
+                continue
+
+            with open(record_path, "rt", encoding="utf-8") as input_file:
+                for line in input_file:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # skip a partial line from an interrupted write
+                        LOGGER.warning("Skipping invalid record in %s", record_path)
+
+
+class AccountingAIModel(WrappedAIModel):
+    """
+    Records tokens, latency, and errors of every chat and JSON call with the current
+    LLM call tags.
+
+    Place directly around the provider model, so that latency excludes scheduler waits
+    and calls served from the LLM response cache are not counted.
+    """
+
+    def __init__(self, llm_model: BaseAIModel, store: AccountingStore):
+        """
+        Initialize the wrapper.
+
+        Args:
+            llm_model (BaseAIModel): The wrapped model.
+            store (AccountingStore): The accounting store.
+        """
+        super().__init__(llm_model)
+        self.store = store
+
+    def _call(self, method: str, args: tuple, kwargs: dict) -> Any:
+        """
+        Call the wrapped model and record the call.
+
+        Args:
+            method (str): Model method, chat or json.
+            args (tuple): Positional arguments.
+            kwargs (dict): Keyword arguments.
+
+        Returns:
+            Any: The response.
+        """
+        tags = get_llm_call_tags()
+        record = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "model": self.model,
+            "method": method,
+            **{tag: tags.get(tag, None) for tag in RECORD_TAGS},
+        }
+
+        start_time = time.monotonic()
+        try:
+            response = getattr(self.llm_model, method)(*args, **kwargs)
+        except Exception as e:
+            record.update(
+                latency=time.monotonic() - start_time,
+                status="error",
+                error=type(e).__name__,
+                **get_response_usage(None),
+            )
+            self.store.append(record)
+            raise
+
+        record.update(
+            latency=time.monotonic() - start_time,
+            status="ok",
+            error=None,
+            **get_response_usage(response),
+        )
+        self.store.append(record)
+        return response
+
+    def chat(self, *args, **kwargs) -> Any:
+        """
+        Generate a chat response and record it.
+        """
+        return self._call("chat", args, kwargs)
+
+    def json(self, *args, **kwargs) -> Any:
+        """
+        Generate a JSON response and record it.
+        """
+        return self._call("json", args, kwargs)
@@ -0,0 +1,66 @@
+"""
+Base classes for transparent wrappers around alea_llm_client models.
+"""
+
+# imports
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# packages
+from alea_llm_client import BaseAIModel
+
+
+@dataclass
+class StoredResponse:
+    """
+    Minimal response returned by wrappers that do not call the provider,
+    compatible with the text and data attributes of alea_llm_client responses.
+    """
+
+    text: str
+    data: Optional[Any] = None
+
+
+class WrappedAIModel:
+    """
+    Wraps a BaseAIModel (or another wrapper) and delegates everything to it by default.
+    """
+
+    def __init__(self, llm_model: BaseAIModel):
+        """
+        Initialize the wrapper.
+
+        Args:
+            llm_model (BaseAIModel): The wrapped model.
+        """
+        self.llm_model = llm_model
+
+    @property
+    def model(self) -> str:
+        """
+        Get the wrapped model id.
+
+        Returns:
+            str: The model id.
+        """
+        return self.llm_model.model
+
+    def __getattr__(self, name: str) -> Any:
+        """
+        Delegate all other attributes to the wrapped model.
+        """
+        if name == "llm_model":
+            raise AttributeError(name)
+        return getattr(self.llm_model, name)
+
+    def chat(self, *args, **kwargs) -> Any:
+        """
+        Generate a chat response.
+        """
+        return self.llm_model.chat(*args, **kwargs)
+
+    def json(self, *args, **kwargs) -> Any:
+        """
+        Generate a JSON response.
+        """
+        return self.llm_model.json(*args, **kwargs)
@@ -0,0 +1,513 @@
+"""
+Offline batch-API execution for historical backfills.
+
+Batch mode runs the normal parsing pipeline with a recording model behind the LLM
+response cache.  Every prompt that is not already cached is recorded as a batch
+request instead of being sent, and the bill is left unfinished.  The recorded requests
+are submitted to the provider's batch endpoint as JSONL files, and completed results are
+written into the LLM response cache under the same keys, so the next pass through the
+pipeline gets further (sections, then bill-level prompts) until every bill completes.
+"""
+
+# imports
+import datetime
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+# packages
+import httpx
+from alea_llm_client import BaseAIModel
+
+# project
+from fbs.llm.base import WrappedAIModel
+from fbs.llm.cache import CachedAIModel, get_cache_key
+from fbs.logger import LOGGER
+
+# default batch job path and provider endpoint
+DEFAULT_BATCH_PATH = Path.home() / ".cache" / "fbs" / "batch"
+DEFAULT_BATCH_BASE_URL = "https://api.openai.com/v1"
+DEFAULT_BATCH_ENDPOINT = "/v1/chat/completions"
+DEFAULT_COMPLETION_WINDOW = "24h"
+
+# maximum number of requests per batch job file
+DEFAULT_MAX_BATCH_REQUESTS = 50000
+
+# batch statuses that will not change anymore
+BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class PendingBatchRequest(Exception):
+    """
+    Raised when a prompt has been recorded for batch execution instead of being sent.
+    """
+
+
+class BatchJobStore:
+    """
+    Filesystem store for recorded batch requests and resumable batch job state.
+
+    Layout:
+     - requests/<key>.json: recorded requests that have not been submitted
+     - jobs/<job id>.jsonl: submitted request files
+     - state.json: submitted jobs with their provider ids, status, and request keys
+    """
+
+    def __init__(self, batch_path: Path = DEFAULT_BATCH_PATH):
+        """
+        Initialize the store.
+
+        Args:
+            batch_path (Path): Root path of the store.
+        """
+        self.batch_path = batch_path
+        self.requests_path = batch_path / "requests"
+        self.jobs_path = batch_path / "jobs"
+        self.state_path = batch_path / "state.json"
+        self.requests_path.mkdir(parents=True, exist_ok=True)
+        self.jobs_path.mkdir(parents=True, exist_ok=True)
+
+        # submitted keys, loaded once per round instead of once per request
+        self._submitted_keys: Optional[set[str]] = None
+        self._lock = threading.Lock()
+
+    def add_request(self, key: str, method: str, body: dict[str, Any]) -> None:
+        """
+        Record a request unless it is already recorded or submitted.
+
+        Args:
+            key (str): LLM cache key, used as the batch custom_id.
+            method (str): Model method, chat or json.
+            body (dict[str, Any]): Chat completion request body.
+        """
+        request_path = self.requests_path / f"{key}.json"
+        if request_path.exists() or key in self.get_submitted_keys():
+            return
+
+        with open(request_path, "wt", encoding="utf-8") as output_file:
+            json.dump({"custom_id": key, "method": method, "body": body}, output_file)
+
+    def get_requests(self) -> list[dict[str, Any]]:
+        """
+        Get the recorded requests that have not been submitted.
+
+        Returns:
+            list[dict[str, Any]]: Recorded requests.
+        """
+        requests = []
+        for request_path in sorted(self.requests_path.glob("*.json")):
+            with open(request_path, "rt", encoding="utf-8") as input_file:
+                requests.append(json.load(input_file))
+        return requests
+
+    def load_state(self) -> dict[str, Any]:
+        """
+        Load the job state.
+
+        Returns:
+            dict[str, Any]: Job state by local job id.
+        """
+        if not self.state_path.exists():
+            return {}
+        with open(self.state_path, "rt", encoding="utf-8") as input_file:
+            return json.load(input_file)
+
+    def save_state(self, state: dict[str, Any]) -> None:
+        """
+        Save the job state, replacing the previous state atomically.
+
+        Args:
+            state (dict[str, Any]): Job state by local job id.
+        """
+        temp_path = self.state_path.with_suffix(".tmp")
+        with open(temp_path, "wt", encoding="utf-8") as output_file:
+            json.dump(state, output_file, indent=2)
+            output_file.flush()
+            os.fsync(output_file.fileno())
+        os.replace(temp_path, self.state_path)
+        self.reload()
+
+    def reload(self) -> None:
+        """
+        Discard the loaded submitted keys, so they are loaded again from the state,
+        e.g., at the start of a round after another process submitted jobs.
+        """
+        with self._lock:
+            self._submitted_keys = None
+
+    def get_submitted_keys(self) -> set[str]:
+        """
+        Get the keys of all requests in jobs that have not been applied.
+
+        Returns:
+            set[str]: Request keys.
+        """
+        with self._lock:
+            if self._submitted_keys is None:
+                self._submitted_keys = {
+                    key
+                    for job in self.load_state().values()
+                    if not job.get("applied", False)
+                    for key in job["keys"]
+                }
+            return self._submitted_keys
+
+
+class BatchRecordingModel(WrappedAIModel):
+    """
+    Records chat and JSON calls as batch requests instead of sending them.
+
+    Place behind a CachedAIModel so that cached results are returned normally and only
+    uncached prompts are recorded.
+    """
+
+    def __init__(self, llm_model: BaseAIModel, store: BatchJobStore):
+        """
+        Initialize the wrapper.
+
+        Args:
+            llm_model (BaseAIModel): The wrapped model, used for its model id.
+            store (BatchJobStore): The batch job store.
+        """
+        super().__init__(llm_model)
+        self.store = store
+        self.num_recorded = 0
+
+    def _record(self, method: str, args: tuple, kwargs: dict) -> None:
+        """
+        Record a call and raise PendingBatchRequest.
+
+        Args:
+            method (str): Model method, chat or json.
+            args (tuple): Positional arguments.
+            kwargs (dict): Keyword arguments.
+
+        Raises:
+            PendingBatchRequest: Always.
+        """
+        key = get_cache_key(self.model, method, args, kwargs)
+        self.store.add_request(
+            key, method, get_request_body(self.model, method, args, kwargs)
+        )
+        self.num_recorded += 1
+        raise PendingBatchRequest(key)
+
+    def chat(self, *args, **kwargs) -> Any:
+        """
+        Record a chat call.
+        """
+        self._record("chat", args, kwargs)
+
+    def json(self, *args, **kwargs) -> Any:
+        """
+        Record a JSON call.
+        """
+        self._record("json", args, kwargs)
+
+
+def call_all(functions: Iterable[Callable[[], Any]]) -> list[Any]:
+    """
+    Call every function even if some of them record pending batch requests, so that a
+    round collects every request that is ready instead of stopping at the first one.
+
+    Args:
+        functions (Iterable[Callable[[], Any]]): Functions taking no arguments.
+
+    Returns:
+        list[Any]: Results in order.
+
+    Raises:
+        PendingBatchRequest: The first pending request, after all functions were called.
+    """
+    results = []
+    pending: Optional[PendingBatchRequest] = None
+    for function in functions:
+        try:
+            results.append(function())
+        except PendingBatchRequest as e:
+            pending = pending or e
+            results.append(None)
+
+    if pending is not None:
+        raise pending
+    return results
+
+
+def get_request_body(
+    model_id: str, method: str, args: tuple, kwargs: dict
+) -> dict[str, Any]:
+    """
+    Convert a chat or JSON call into a chat completion request body.
+
+    Args:
+        model_id (str): Model id.
+        method (str): Model method, chat or json.
+        args (tuple): Positional arguments, i.e., the prompt or messages.
+        kwargs (dict): Generation parameters.
+
+    Returns:
+        dict[str, Any]: Request body.
+    """
+    prompt = args[0] if args else kwargs.pop("messages", "")
+    if isinstance(prompt, str):
+        messages = [{"role": "user", "content": prompt}]
+    else:
+        messages = list(prompt)
+
+    if kwargs.get("system", None):
+        messages.insert(0, {"role": "system", "content": kwargs["system"]})
+
+    body = {"model": model_id, "messages": messages}
+    for parameter in ("temperature", "max_tokens", "top_p", "seed"):
+        if parameter in kwargs:
+            body[parameter] = kwargs[parameter]
+
+    if method == "json":
+        body["response_format"] = {"type": "json_object"}
+
+    return body
+
+
+class BatchClient:
+    """
+    Client for an OpenAI-compatible files and batches API.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BATCH_BASE_URL,
+        api_key: Optional[str] = None,
+        endpoint: str = DEFAULT_BATCH_ENDPOINT,
+        transport: Optional[httpx.BaseTransport] = None,
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            base_url (str): API base URL, e.g., a local stand-in server.
+            api_key (Optional[str]): API key, defaults to OPENAI_API_KEY.
+            endpoint (str): Batch request endpoint.
+            transport (Optional[httpx.BaseTransport]): Transport, e.g., FakeBatchAPI's.
+        """
+        self.endpoint = endpoint
+        self.client = httpx.Client(
+            base_url=base_url.rstrip("/"),
+            headers={
+                "Authorization": f"Bearer {api_key or os.getenv('OPENAI_API_KEY', '')}"
+            },
+            timeout=httpx.Timeout(300.0),
+            transport=transport,
+        )
+
+    def close(self) -> None:
+        """
+        Close the httpx client.
+        """
+        self.client.close()
+
+    def create_batch(self, job_file_path: Path) -> dict[str, Any]:
+        """
+        Upload a JSONL request file and create a batch job for it.
+
+        Args:
+            job_file_path (Path): Path to the JSONL request file.
+
+        Returns:
+            dict[str, Any]: The batch object.
+        """
+        with open(job_file_path, "rb") as input_file:
+            file_response = self.client.post(
+                "/files",
+                data={"purpose": "batch"},
+                files={"file": (job_file_path.name, input_file)},
+            )
+        file_response.raise_for_status()
+
+        batch_response = self.client.post(
+            "/batches",
+            json={
+                "input_file_id": file_response.json()["id"],
+                "endpoint": self.endpoint,
+                "completion_window": DEFAULT_COMPLETION_WINDOW,
+            },
+        )
+        batch_response.raise_for_status()
+        return batch_response.json()
+
+    def get_batch(self, batch_id: str) -> dict[str, Any]:
+        """
+        Get a batch job.
+
+        Args:
+            batch_id (str): Provider batch id.
+
+        Returns:
+            dict[str, Any]: The batch object.
+        """
+        response = self.client.get(f"/batches/{batch_id}")
+        response.raise_for_status()
+        return response.json()
+
+    def get_file_content(self, file_id: str) -> str:
+        """
+        Download the content of a file.
+
+        Args:
+            file_id (str): Provider file id.
+
+        Returns:
+            str: The file content.
+        """
+        response = self.client.get(f"/files/{file_id}/content")
+        response.raise_for_status()
+        return response.text
+
+
+def submit_requests(
+    store: BatchJobStore,
+    client: BatchClient,
+    max_requests: int = DEFAULT_MAX_BATCH_REQUESTS,
+) -> int:
+    """
+    Submit all recorded requests as batch jobs.
+
+    Args:
+        store (BatchJobStore): The batch job store.
+        client (BatchClient): The batch client.
+        max_requests (int): Maximum number of requests per job.
+
+    Returns:
+        int: Number of jobs submitted.
+    """
+    requests = store.get_requests()
+    num_jobs = 0
+    for offset in range(0, len(requests), max_requests):
+        job_requests = requests[offset : offset + max_requests]
+        job_id = datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
+
+        # write the job file
+        job_file_path = store.jobs_path / f"{job_id}.jsonl"
+        with open(job_file_path, "wt", encoding="utf-8") as output_file:
+            for request in job_requests:
+                output_file.write(
+                    json.dumps(
+                        {
+                            "custom_id": request["custom_id"],
+                            "method": "POST",
+                            "url": client.endpoint,
+                            "body": request["body"],
+                        }
+                    )
+                    + "\n"
+                )
+
+        # submit it and record the job before removing the requests
+        batch = client.create_batch(job_file_path)
+        state = store.load_state()
+        state[job_id] = {
+            "batch_id": batch["id"],
+            "status": batch.get("status", "validating"),
+            "keys": [request["custom_id"] for request in job_requests],
+            "methods": {
+                request["custom_id"]: request["method"] for request in job_requests
+            },
+            "applied": False,
+        }
+        store.save_state(state)
+
+        for request in job_requests:
+            (store.requests_path / f"{request['custom_id']}.json").unlink(
+                missing_ok=True
+            )
+
+        LOGGER.info(
+            "Submitted batch job %s (%s) with %d requests",
+            job_id,
+            batch["id"],
+            len(job_requests),
+        )
+        num_jobs += 1
+
+    return num_jobs
+
+
+def poll_jobs(
+    store: BatchJobStore, client: BatchClient, llm_cache: CachedAIModel
+) -> int:
+    """
+    Poll all unapplied batch jobs and write completed results into the LLM cache.
+
+    Args:
+        store (BatchJobStore): The batch job store.
+        client (BatchClient): The batch client.
+        llm_cache (CachedAIModel): The LLM response cache to write results into.
+
+    Returns:
+        int: Number of jobs still pending.
+    """
+    state = store.load_state()
+    num_pending = 0
+    for job_id, job in state.items():
+        if job.get("applied", False):
+            continue
+
+        batch = client.get_batch(job["batch_id"])
+        job["status"] = batch.get("status", job["status"])
+        if job["status"] not in BATCH_FINAL_STATUSES:
+            num_pending += 1
+            continue
+
+        # write the results into the cache
+        num_results = 0
+        if batch.get("output_file_id"):
+            output = client.get_file_content(batch["output_file_id"])
+            for line in output.splitlines():
+                if not line.strip():
+                    continue
+                num_results += apply_result(json.loads(line), job, llm_cache)
+
+        job["applied"] = True
+        store.save_state(state)
+        LOGGER.info(
+            "Applied batch job %s (%s): %d of %d results",
+            job_id,
+            job["status"],
+            num_results,
+            len(job["keys"]),
+        )
+
+    store.save_state(state)
+    return num_pending
+
+
+def apply_result(
+    result: dict[str, Any], job: dict[str, Any], llm_cache: CachedAIModel
+) -> int:
+    """
+    Write a single batch result into the LLM cache.
+
+    Args:
+        result (dict[str, Any]): Batch output line.
+        job (dict[str, Any]): Job state.
+        llm_cache (CachedAIModel): The LLM response cache.
+
+    Returns:
+        int: 1 if the result was written, 0 otherwise.
+    """
+    key = result.get("custom_id")
+    response = result.get("response") or {}
+    if result.get("error") or response.get("status_code", 200) != 200:
+        LOGGER.error("Batch request %s failed: %s", key, result.get("error"))
+        return 0
+
+    try:
+        text = response["body"]["choices"][0]["message"]["content"]
+        data = json.loads(text) if job["methods"].get(key) == "json" else None
+    except (KeyError, IndexError, TypeError, json.JSONDecodeError) as e:
+        LOGGER.error("Invalid batch result for %s: %s", key, e)
+        return 0
+
+    llm_cache.put(key, text=text, data=data)
+    return 1
@@ -0,0 +1,174 @@
+"""
+Tokenizer-accurate prompt budgeting for bill-level prompts.
+"""
+
+# imports
+import functools
+import threading
+from typing import Any, Callable, Optional
+
+# packages
+import tiktoken
+
+# project
+from fbs.logger import LOGGER
+
+# context window by model id
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4o": 128000,
+    "grok-2-1212": 131072,
+}
+DEFAULT_CONTEXT_WINDOW = 128000
+
+# tokens reserved for the instructions, metadata, and response
+DEFAULT_RESPONSE_RESERVE = 16000
+
+# fallback encoding for models unknown to tiktoken
+DEFAULT_ENCODING_NAME = "o200k_base"
+
+# approximate number of characters per token if no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+
+@functools.cache
+def get_tokenizer(model_id: str) -> Optional[tiktoken.Encoding]:
+    """
+    Get the tokenizer for a model.
+
+    Args:
+        model_id (str): Model id.
+
+    Returns:
+        Optional[tiktoken.Encoding]: The tokenizer, or None if it cannot be loaded.
+    """
+    try:
+        return tiktoken.encoding_for_model(model_id)
+    except KeyError:
+        pass
+
+    try:
+        return tiktoken.get_encoding(DEFAULT_ENCODING_NAME)
+    except Exception as e:
+        LOGGER.error("Error loading tokenizer for %s: %s", model_id, e)
+        return None
+
+
+def get_context_window(model_id: str) -> int:
+    """
+    Get the context window of a model.
+
+    Args:
+        model_id (str): Model id.
+
+    Returns:
+        int: Context window in tokens.
+    """
+    return MODEL_CONTEXT_WINDOWS.get(model_id, DEFAULT_CONTEXT_WINDOW)
+
+
+def count_tokens(text: str, model_id: str) -> int:
+    """
+    Count the tokens in a text for a model.
+
+    Args:
+        text (str): Text.
+        model_id (str): Model id.
+
+    Returns:
+        int: Token count.
+    """
+    tokenizer = get_tokenizer(model_id)
+    if tokenizer is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(tokenizer.encode(text, disallowed_special=()))
+
+
+class PromptBudget:
+    """
+    Token counts for a bill's full text and section summaries, counted once per bill,
+    used to choose the cheapest bill-level prompt that fits the model's context window:
+     - text: the full bill text and section summaries fit
+     - sections: only the section summaries fit
+     - reduce: the section summaries must be map-reduced to fit
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        text_tokens: int,
+        section_tokens: int,
+        context_window: Optional[int] = None,
+        reserve: int = DEFAULT_RESPONSE_RESERVE,
+    ):
+        """
+        Initialize the budget.
+
+        Args:
+            model_id (str): Model id.
+            text_tokens (int): Tokens in the bill text.
+            section_tokens (int): Tokens in the section summaries and issues.
+            context_window (Optional[int]): Context window, defaults by model id.
+            reserve (int): Tokens reserved for instructions, metadata, and response.
+        """
+        self.model_id = model_id
+        self.text_tokens = text_tokens
+        self.section_tokens = section_tokens
+        self.context_window = context_window or get_context_window(model_id)
+        self.limit = self.context_window - reserve
+
+        # shared map-reduce result
+        self._reduced: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    @property
+    def mode(self) -> str:
+        """
+        Get the prompt mode.
+
+        Returns:
+            str: text, sections, or reduce.
+        """
+        return self.get_mode()
+
+    def get_mode(self, extra_tokens: int = 0) -> str:
+        """
+        Get the prompt mode for a prompt that adds its own payload to the bill context.
+
+        Args:
+            extra_tokens (int): Tokens in the prompt-specific payload.
+
+        Returns:
+            str: text, sections, or reduce.
+        """
+        if self.text_tokens + self.section_tokens + extra_tokens <= self.limit:
+            return "text"
+        if self.section_tokens <= self.limit:
+            return "sections"
+        return "reduce"
+
+    def count(self, text: str) -> int:
+        """
+        Count the tokens in a text for the budget's model.
+
+        Args:
+            text (str): Text.
+
+        Returns:
+            int: Token count.
+        """
+        return count_tokens(text, self.model_id)
+
+    def get_reduced(self, reduce_function: Callable[[], Any]) -> Any:
+        """
+        Get the map-reduced section summaries, computing them once for all prompts.
+
+        Args:
+            reduce_function (Callable[[], Any]): Function that computes the result.
+
+        Returns:
+            Any: The map-reduced result.
+        """
+        with self._lock:
+            if self._reduced is None:
+                self._reduced = reduce_function()
+            return self._reduced
@@ -0,0 +1,272 @@
+"""
+Persistent LLM response cache keyed by prompt, model and generation parameters.
+"""
+
+# imports
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+# packages
+from alea_llm_client import BaseAIModel
+
+# project
+from fbs.llm.base import StoredResponse, WrappedAIModel
+from fbs.llm.context import record_llm_model_ids
+from fbs.logger import LOGGER
+from fbs.utils.store import iter_store_paths, read_json_gz, write_json_gz
+
+# default cache path and size limit
+DEFAULT_LLM_CACHE_PATH = Path.home() / ".cache" / "fbs" / "llm"
+DEFAULT_LLM_CACHE_MAX_BYTES = 4 * 1024**3
+
+# fraction of the size limit to evict down to
+DEFAULT_EVICTION_TARGET = 0.9
+
+
+def get_cache_key(model_id: str, method: str, args: tuple, kwargs: dict) -> str:
+    """
+    Get the cache key for a call.
+
+    Args:
+        model_id (str): Model id.
+        method (str): Model method, chat or json.
+        args (tuple): Positional arguments, i.e., the prompt.
+        kwargs (dict): Generation parameters.
+
+    Returns:
+        str: Cache key.
+    """
+    key_data = json.dumps(
+        {
+            "method": method,
+            "model": model_id,
+            "args": args,
+            "kwargs": kwargs,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.blake2b(key_data.encode("utf-8")).hexdigest()
+
+
+def iter_entry_stats(
+    entry_paths: Iterable[Path],
+) -> Iterator[tuple[Path, os.stat_result]]:
+    """
+    Stat cache entries, skipping entries that another process evicted or quarantined.
+
+    Args:
+        entry_paths (Iterable[Path]): Entry paths.
+
+    Returns:
+        Iterator[tuple[Path, os.stat_result]]: Entry paths and their stats.
+    """
+    for entry_path in entry_paths:
+        try:
+            yield entry_path, entry_path.stat()
+        except FileNotFoundError:
+            continue
+
+
+class CachedAIModel(WrappedAIModel):
+    """
+    Caches chat and JSON responses on disk so that retries and reprocessing with
+    unchanged prompts do not call the provider again.
+    """
+
+    def __init__(
+        self,
+        llm_model: BaseAIModel,
+        cache_path: Path = DEFAULT_LLM_CACHE_PATH,
+        max_bytes: int = DEFAULT_LLM_CACHE_MAX_BYTES,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            llm_model (BaseAIModel): The wrapped model.
+            cache_path (Path): Root path of the cache.
+            max_bytes (int): Maximum size of the cache before evicting old entries.
+        """
+        super().__init__(llm_model)
+        self.cache_path = cache_path
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        # counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.size_bytes = sum(
+            entry_stat.st_size
+            for _, entry_stat in iter_entry_stats(iter_store_paths(self.cache_path))
+        )
+
+    def get_key(self, method: str, args: tuple, kwargs: dict) -> str:
+        """
+        Get the cache key for a call.
+
+        Args:
+            method (str): Model method, chat or json.
+            args (tuple): Positional arguments, i.e., the prompt.
+            kwargs (dict): Generation parameters.
+
+        Returns:
+            str: Cache key.
+        """
+        return get_cache_key(self.model, method, args, kwargs)
+
+    def _get_path(self, key: str) -> Path:
+        """
+        Get the path for a cache key.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            Path: Entry path.
+        """
+        return self.cache_path / key[:2] / key
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        """
+        Get a cached response.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            Optional[StoredResponse]: The cached response, or None if not cached.
+        """
+        # corrupt entries are quarantined and treated as misses
+        entry_path = self._get_path(key)
+        entry = read_json_gz(entry_path)
+        if entry is None:
+            return None
+
+        # touch the entry so eviction is least-recently-used
+        try:
+            entry_path.touch()
+        except OSError:
+            pass
+
+        return StoredResponse(text=entry["text"], data=entry.get("data"))
+
+    def put(
+        self,
+        key: str,
+        text: str,
+        data: Optional[Any] = None,
+    ) -> None:
+        """
+        Store a response.
+
+        Args:
+            key (str): Cache key.
+            text (str): Response text.
+            data (Optional[Any]): Parsed JSON response data.
+        """
+        # an overwritten entry only adds the difference in size
+        entry_path = self._get_path(key)
+        previous_size = sum(
+            entry_stat.st_size for _, entry_stat in iter_entry_stats((entry_path,))
+        )
+        write_json_gz(entry_path, {"text": text, "data": data})
+        entry_size = sum(
+            entry_stat.st_size for _, entry_stat in iter_entry_stats((entry_path,))
+        )
+
+        with self._lock:
+            self.size_bytes += entry_size - previous_size
+            if self.size_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """
+        Evict the least recently used entries until the cache is below the target size.
+        """
+        # other processes share the cache, so entries can vanish while sorting
+        entry_stats = sorted(
+            iter_entry_stats(iter_store_paths(self.cache_path)),
+            key=lambda entry: entry[1].st_mtime,
+        )
+
+        target_bytes = self.max_bytes * DEFAULT_EVICTION_TARGET
+        for entry_path, entry_stat in entry_stats:
+            if self.size_bytes <= target_bytes:
+                break
+            try:
+                entry_path.unlink()
+                self.size_bytes -= entry_stat.st_size
+                self.evictions += 1
+            except FileNotFoundError:
+                continue
+
+        LOGGER.info("Evicted LLM cache entries down to %d bytes", self.size_bytes)
+
+    def _call(self, method: str, args: tuple, kwargs: dict) -> Any:
+        """
+        Return a cached response or call the wrapped model and cache the result.
+
+        A response from another model, e.g., after a failover, is cached under that
+        model's key, so it is never returned for this model.
+
+        Args:
+            method (str): Model method, chat or json.
+            args (tuple): Positional arguments.
+            kwargs (dict): Keyword arguments.
+
+        Returns:
+            Any: The response.
+        """
+        key = self.get_key(method, args, kwargs)
+        cached_response = self.get(key)
+        if cached_response is not None:
+            with self._lock:
+                self.hits += 1
+            return cached_response
+
+        with self._lock:
+            self.misses += 1
+
+        with record_llm_model_ids(set()) as model_ids:
+            response = getattr(self.llm_model, method)(*args, **kwargs)
+        if model_ids - {self.model}:
+            key = get_cache_key(", ".join(sorted(model_ids)), method, args, kwargs)
+        self.put(
+            key,
+            text=getattr(response, "text", ""),
+            data=getattr(response, "data", None),
+        )
+        return response
+
+    def chat(self, *args, **kwargs) -> Any:
+        """
+        Generate a chat response, using the cache if possible.
+        """
+        return self._call("chat", args, kwargs)
+
+    def json(self, *args, **kwargs) -> Any:
+        """
+        Generate a JSON response, using the cache if possible.
+        """
+        return self._call("json", args, kwargs)
+
+    def get_stats(self) -> dict[str, int]:
+        """
+        Get the cache counters.
+
+        Returns:
+            dict[str, int]: Hits, misses, evictions, and size in bytes.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size_bytes": self.size_bytes,
+        }
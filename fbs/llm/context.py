@@ -0,0 +1,104 @@
+"""
+Context tags (bill package id, prompt name, etc.) for LLM calls.
+"""
+
+# imports
+import contextlib
+import contextvars
+import functools
+from typing import Any, Callable, Iterator, Optional
+
+# tags for the current LLM call, propagated into scheduler threads
+LLM_CALL_TAGS: contextvars.ContextVar[dict[str, Any]] = contextvars.ContextVar(
+    "llm_call_tags", default={}
+)
+
+# ids of the models that served the LLM calls in the current context, if recorded
+LLM_CALL_MODEL_IDS: contextvars.ContextVar[Optional[set[str]]] = contextvars.ContextVar(
+    "llm_call_model_ids", default=None
+)
+
+
+def get_llm_call_tags() -> dict[str, Any]:
+    """
+    Get the tags for the current LLM call.
+
+    Returns:
+        dict[str, Any]: Current tags.
+    """
+    return LLM_CALL_TAGS.get()
+
+
+@contextlib.contextmanager
+def llm_call_context(**tags: Any) -> Iterator[dict[str, Any]]:
+    """
+    Add tags to all LLM calls made within the context.
+
+    Args:
+        **tags: Tags to add, e.g., package_id.
+
+    Returns:
+        Iterator[dict[str, Any]]: The merged tags.
+    """
+    merged_tags = {**LLM_CALL_TAGS.get(), **tags}
+    token = LLM_CALL_TAGS.set(merged_tags)
+    try:
+        yield merged_tags
+    finally:
+        LLM_CALL_TAGS.reset(token)
+
+
+def with_llm_call_tags(function: Callable, **tags: Any) -> Callable:
+    """
+    Wrap a function so that all LLM calls made while it runs are tagged.
+
+    Args:
+        function: Function to wrap.
+        **tags: Tags to add, e.g., prompt_name or section_index.
+
+    Returns:
+        Callable: The wrapped function.
+    """
+
+    @functools.wraps(function)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with llm_call_context(**tags):
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+@contextlib.contextmanager
+def record_llm_model_ids(model_ids: set[str]) -> Iterator[set[str]]:
+    """
+    Record the ids of the models that serve the LLM calls made within the context,
+    including calls made in scheduler threads submitted from it.
+
+    Recordings nest: the ids are also added to the enclosing recording, if any.
+
+    Args:
+        model_ids: Set to add the model ids to.
+
+    Returns:
+        Iterator[set[str]]: The model id set.
+    """
+    outer_model_ids = LLM_CALL_MODEL_IDS.get()
+    token = LLM_CALL_MODEL_IDS.set(model_ids)
+    try:
+        yield model_ids
+    finally:
+        LLM_CALL_MODEL_IDS.reset(token)
+        if outer_model_ids is not None:
+            outer_model_ids.update(model_ids)
+
+
+def add_llm_model_id(model_id: str) -> None:
+    """
+    Record the id of the model serving the current LLM call, if recording.
+
+    Args:
+        model_id: Model id.
+    """
+    model_ids = LLM_CALL_MODEL_IDS.get()
+    if model_ids is not None:
+        model_ids.add(model_id)
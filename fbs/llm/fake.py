@@ -0,0 +1,215 @@
+"""
+Deterministic fake model and batch API for exercising the LLM wrappers without a provider.
+"""
+
+# imports
+import itertools
+import json
+import threading
+import time
+from typing import Any, Iterable, Optional
+
+# packages
+import httpx
+
+# project
+from fbs.llm.base import StoredResponse
+
+
+class FakeAIModel:
+    """
+    Returns fixed responses after a scripted sequence of latencies.
+
+    Each call takes the next latency from the cycle; a latency of None raises a
+    RuntimeError instead of responding, to simulate a failed request.
+    """
+
+    def __init__(
+        self,
+        model: str = "fake",
+        latencies: Iterable[Optional[float]] = (0.0,),
+        text: str = "",
+        data: Optional[Any] = None,
+    ):
+        """
+        Initialize the fake model.
+
+        Args:
+            model (str): Model id.
+            latencies (Iterable[Optional[float]]): Latencies in seconds, cycled.
+            text (str): Response text.
+            data (Optional[Any]): JSON response data.
+        """
+        self.model = model
+        self.text = text
+        self.data = data if data is not None else {}
+        self.num_calls = 0
+        self._latencies = itertools.cycle(list(latencies))
+        self._lock = threading.Lock()
+
+    def _respond(self, data: Optional[Any]) -> StoredResponse:
+        """
+        Wait for the next scripted latency and respond.
+
+        Args:
+            data (Optional[Any]): JSON response data.
+
+        Returns:
+            StoredResponse: The response.
+        """
+        with self._lock:
+            latency = next(self._latencies)
+            self.num_calls += 1
+
+        if latency is None:
+            raise RuntimeError(f"{self.model} request failed")
+        time.sleep(latency)
+        return StoredResponse(text=self.text, data=data)
+
+    def chat(self, *args, **kwargs) -> StoredResponse:
+        """
+        Generate a fake chat response.
+        """
+        return self._respond(None)
+
+    def json(self, *args, **kwargs) -> StoredResponse:
+        """
+        Generate a fake JSON response.
+        """
+        return self._respond(self.data)
+
+
+class FakeBatchAPI:
+    """
+    In-memory stand-in for an OpenAI-compatible files and batches API that answers every
+    batch request with a fake model.  Pass its transport to BatchClient.
+
+    Batches complete after a fixed number of polls.
+    """
+
+    def __init__(self, llm_model: FakeAIModel, num_polls: int = 1):
+        """
+        Initialize the fake API.
+
+        Args:
+            llm_model (FakeAIModel): Model that answers the batch requests.
+            num_polls (int): Number of polls before a batch completes.
+        """
+        self.llm_model = llm_model
+        self.num_polls = num_polls
+        self.files: dict[str, str] = {}
+        self.batches: dict[str, dict[str, Any]] = {}
+        self.transport = httpx.MockTransport(self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        """
+        Handle a request to the files or batches API.
+
+        Args:
+            request (httpx.Request): The request.
+
+        Returns:
+            httpx.Response: The response.
+        """
+        path = request.url.path.split("/v1", 1)[-1]
+        if request.method == "POST" and path == "/files":
+            file_id = f"file-{len(self.files)}"
+            self.files[file_id] = get_multipart_file(request)
+            return httpx.Response(200, json={"id": file_id})
+
+        if request.method == "POST" and path == "/batches":
+            batch_id = f"batch-{len(self.batches)}"
+            self.batches[batch_id] = {
+                "id": batch_id,
+                "status": "in_progress",
+                "input_file_id": json.loads(request.content)["input_file_id"],
+                "num_polls": 0,
+            }
+            return httpx.Response(200, json=self._get_batch(batch_id))
+
+        if request.method == "GET" and path.startswith("/batches/"):
+            batch_id = path.removeprefix("/batches/")
+            if batch_id not in self.batches:
+                return httpx.Response(404)
+            self.batches[batch_id]["num_polls"] += 1
+            if self.batches[batch_id]["num_polls"] >= self.num_polls:
+                self._complete(batch_id)
+            return httpx.Response(200, json=self._get_batch(batch_id))
+
+        if request.method == "GET" and path.endswith("/content"):
+            file_id = path.removeprefix("/files/").removesuffix("/content")
+            if file_id not in self.files:
+                return httpx.Response(404)
+            return httpx.Response(200, text=self.files[file_id])
+
+        return httpx.Response(404)
+
+    def _get_batch(self, batch_id: str) -> dict[str, Any]:
+        """
+        Get the public fields of a batch.
+
+        Args:
+            batch_id (str): Batch id.
+
+        Returns:
+            dict[str, Any]: The batch object.
+        """
+        return {
+            key: value
+            for key, value in self.batches[batch_id].items()
+            if key != "num_polls"
+        }
+
+    def _complete(self, batch_id: str) -> None:
+        """
+        Answer every request of a batch and attach the output file.
+
+        Args:
+            batch_id (str): Batch id.
+        """
+        batch = self.batches[batch_id]
+        if batch["status"] == "completed":
+            return
+
+        output_lines = []
+        for line in self.files[batch["input_file_id"]].splitlines():
+            request = json.loads(line)
+            if "response_format" in request["body"]:
+                content = json.dumps(self.llm_model.json().data)
+            else:
+                content = self.llm_model.chat().text
+            output_lines.append(
+                json.dumps(
+                    {
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "body": {"choices": [{"message": {"content": content}}]},
+                        },
+                        "error": None,
+                    }
+                )
+            )
+
+        output_file_id = f"file-{len(self.files)}"
+        self.files[output_file_id] = "\n".join(output_lines) + "\n"
+        batch["status"] = "completed"
+        batch["output_file_id"] = output_file_id
+
+
+def get_multipart_file(request: httpx.Request) -> str:
+    """
+    Get the content of the file field of a multipart upload.
+
+    Args:
+        request (httpx.Request): Multipart form request.
+
+    Returns:
+        str: The file content.
+    """
+    boundary = request.headers["content-type"].split("boundary=", 1)[1].encode()
+    for part in request.read().split(b"--" + boundary):
+        headers, _, content = part.partition(b"\r\n\r\n")
+        if b'name="file"' in headers:
+            return content.removesuffix(b"\r\n").decode("utf-8")
+    return ""
@@ -0,0 +1,286 @@
+"""
+Tail-latency control for LLM calls: per-call deadlines, hedged duplicate requests,
+and failover to a second provider.
+"""
+
+# imports
+import collections
+import concurrent.futures
+import contextvars
+import statistics
+import threading
+import time
+from typing import Any, Optional
+
+# packages
+from alea_llm_client import BaseAIModel
+
+# project
+from fbs.llm.base import WrappedAIModel
+from fbs.llm.context import add_llm_model_id, get_llm_call_tags
+from fbs.logger import LOGGER
+
+# default deadline for a single call in seconds, including hedged requests
+DEFAULT_DEADLINE = 180.0
+
+# send a hedged duplicate once a call is slower than this latency percentile
+DEFAULT_HEDGE_PERCENTILE = 0.95
+
+# number of latency samples per prompt before hedging starts, and samples kept
+DEFAULT_HEDGE_MIN_SAMPLES = 50
+DEFAULT_LATENCY_WINDOW = 1000
+
+# maximum number of concurrent provider requests, including hedges and stuck calls
+DEFAULT_MAX_ATTEMPT_WORKERS = 64
+
+
+class DeadlineExceededError(TimeoutError):
+    """
+    Raised when no request for a call finished before its deadline.
+    """
+
+
+class HedgedAIModel(WrappedAIModel):
+    """
+    Runs each chat and JSON call with a deadline and a hedged duplicate request.
+
+    Latencies are tracked per prompt name tag.  Once a prompt has enough samples, a
+    call that is still running after the hedge percentile latency gets one duplicate
+    request, and the first successful response wins.  A call that fails or exceeds its
+    deadline is retried once on the fallback model, if configured.
+
+    Requests run on a separate thread pool, so a stuck request never blocks the caller
+    past its deadline; it keeps its worker until the client library times it out.
+    Place inside the scheduler wrapper, which admits the first request of each call,
+    and pass scheduled models as the hedge and fallback models, so that every extra
+    request is charged to the rate limits as well.  The fallback model records its id
+    for the call, so caches can key its responses by the model that answered.
+    """
+
+    def __init__(
+        self,
+        llm_model: BaseAIModel,
+        fallback_model: Optional[BaseAIModel] = None,
+        hedge_model: Optional[BaseAIModel] = None,
+        deadline: float = DEFAULT_DEADLINE,
+        hedge_percentile: Optional[float] = DEFAULT_HEDGE_PERCENTILE,
+        hedge_min_samples: int = DEFAULT_HEDGE_MIN_SAMPLES,
+        max_workers: int = DEFAULT_MAX_ATTEMPT_WORKERS,
+    ):
+        """
+        Initialize the wrapper.
+
+        Args:
+            llm_model (BaseAIModel): The wrapped model.
+            fallback_model (Optional[BaseAIModel]): Model to fail over to, e.g., from
+                another provider.
+            hedge_model (Optional[BaseAIModel]): Model for hedged duplicates, e.g., the
+                wrapped model behind the scheduler, defaults to the wrapped model.
+            deadline (float): Deadline for each call in seconds.
+            hedge_percentile (Optional[float]): Latency percentile after which to send
+                a hedged request, or None to disable hedging.
+            hedge_min_samples (int): Latency samples required before hedging.
+            max_workers (int): Maximum number of concurrent requests.
+        """
+        super().__init__(llm_model)
+        self.fallback_model = fallback_model
+        self.hedge_model = hedge_model or llm_model
+        self.deadline = deadline
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="llm-attempt"
+        )
+        self._latencies: dict[str, collections.deque] = collections.defaultdict(
+            lambda: collections.deque(maxlen=DEFAULT_LATENCY_WINDOW)
+        )
+        self._lock = threading.Lock()
+
+        # stats
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self.failovers = 0
+
+    def get_hedge_delay(self, prompt_name: str) -> Optional[float]:
+        """
+        Get the latency after which to hedge a call.
+
+        Args:
+            prompt_name (str): Prompt name.
+
+        Returns:
+            Optional[float]: Hedge delay in seconds, or None if not hedging.
+        """
+        if self.hedge_percentile is None:
+            return None
+
+        with self._lock:
+            latencies = list(self._latencies[prompt_name])
+        if len(latencies) < self.hedge_min_samples:
+            return None
+
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        return percentiles[min(98, max(0, int(self.hedge_percentile * 100) - 1))]
+
+    def _submit(
+        self, llm_model: BaseAIModel, method: str, args: tuple, kwargs: dict
+    ) -> concurrent.futures.Future:
+        """
+        Submit a request in a copy of the caller's context.
+
+        Args:
+            llm_model (BaseAIModel): Model to call.
+            method (str): Model method, chat or json.
+            args (tuple): Positional arguments.
+            kwargs (dict): Keyword arguments.
+
+        Returns:
+            concurrent.futures.Future: The request future.
+        """
+        context = contextvars.copy_context()
+        return self._executor.submit(
+            context.run, getattr(llm_model, method), *args, **kwargs
+        )
+
+    def _run(
+        self,
+        llm_model: BaseAIModel,
+        method: str,
+        args: tuple,
+        kwargs: dict,
+        prompt_name: str,
+        hedge: bool = True,
+    ) -> Any:
+        """
+        Run a call with a deadline and, optionally, a hedged request to the hedge model.
+
+        Args:
+            llm_model (BaseAIModel): Model to call.
+            method (str): Model method, chat or json.
+            args (tuple): Positional arguments.
+            kwargs (dict): Keyword arguments.
+            prompt_name (str): Prompt name for latency tracking.
+            hedge (bool): Whether to send a hedged request.
+
+        Returns:
+            Any: The first successful response.
+
+        Raises:
+            DeadlineExceededError: If no request finished before the deadline.
+            Exception: The last request error if all requests failed.
+        """
+        start_time = time.monotonic()
+        deadline_time = start_time + self.deadline
+        hedge_delay = self.get_hedge_delay(prompt_name) if hedge else None
+
+        first_future = self._submit(llm_model, method, args, kwargs)
+        running = {first_future}
+        hedged = False
+        error: Optional[BaseException] = None
+        while running:
+            now = time.monotonic()
+            if now >= deadline_time:
+                break
+
+            # wake up at the hedge time if a hedge is still due
+            timeout = deadline_time - now
+            hedge_due = hedge_delay is not None and not hedged
+            if hedge_due:
+                timeout = min(timeout, max(0.0, start_time + hedge_delay - now))
+
+            done, running = concurrent.futures.wait(
+                running, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+
+                with self._lock:
+                    self._latencies[prompt_name].append(time.monotonic() - start_time)
+                    if future is not first_future:
+                        self.hedge_wins += 1
+                return response
+
+            # send the hedged request once the hedge delay has passed
+            if hedge_due and running and time.monotonic() >= start_time + hedge_delay:
+                running.add(self._submit(self.hedge_model, method, args, kwargs))
+                hedged = True
+                with self._lock:
+                    self.hedges += 1
+
+        if running or error is None:
+            with self._lock:
+                self.timeouts += 1
+            raise DeadlineExceededError(
+                f"{llm_model.model} {prompt_name} call exceeded {self.deadline}s"
+            )
+        raise error
+
+    def _call(self, method: str, args: tuple, kwargs: dict) -> Any:
+        """
+        Run a call, failing over to the fallback model if it fails or times out.
+
+        Args:
+            method (str): Model method, chat or json.
+            args (tuple): Positional arguments.
+            kwargs (dict): Keyword arguments.
+
+        Returns:
+            Any: The response.
+        """
+        prompt_name = get_llm_call_tags().get("prompt_name", None) or method
+        with self._lock:
+            self.calls += 1
+
+        try:
+            return self._run(self.llm_model, method, args, kwargs, prompt_name)
+        except Exception as e:
+            if self.fallback_model is None:
+                raise
+
+            LOGGER.warning(
+                "Failing over %s call from %s to %s: %s",
+                prompt_name,
+                self.llm_model.model,
+                self.fallback_model.model,
+                str(e) or type(e).__name__,
+            )
+            with self._lock:
+                self.failovers += 1
+            add_llm_model_id(self.fallback_model.model)
+            return self._run(
+                self.fallback_model, method, args, kwargs, prompt_name, hedge=False
+            )
+
+    def chat(self, *args, **kwargs) -> Any:
+        """
+        Generate a chat response with deadline, hedging, and failover.
+        """
+        return self._call("chat", args, kwargs)
+
+    def json(self, *args, **kwargs) -> Any:
+        """
+        Generate a JSON response with deadline, hedging, and failover.
+        """
+        return self._call("json", args, kwargs)
+
+    def get_stats(self) -> dict[str, int]:
+        """
+        Get hedging and failover statistics.
+
+        Returns:
+            dict[str, int]: Calls, hedged requests, hedge wins, timeouts, and failovers.
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "timeouts": self.timeouts,
+                "failovers": self.failovers,
+            }
@@ -0,0 +1,146 @@
+"""
+Tiered model routing by prompt name and prompt size.
+"""
+
+# imports
+from typing import Any, Iterable, Optional
+
+# packages
+from alea_llm_client import BaseAIModel
+
+# project
+from fbs.llm.base import WrappedAIModel
+from fbs.llm.context import add_llm_model_id, get_llm_call_tags
+from fbs.llm.scheduler import estimate_prompt_tokens
+
+# prompts that are routed to the fast model by default
+DEFAULT_FAST_PROMPTS = (
+    "summarize_bill_section",
+    "audit_bill_section",
+    "analyze_bill_section",
+    "analyze_bill_sections",
+    "extract_bill_keywords",
+    "filter_named_entities",
+)
+
+
+class RoutedAIModel(WrappedAIModel):
+    """
+    Routes chat and JSON calls to a fast model or the primary model based on the
+    prompt name tag of the call and, optionally, the prompt size.
+
+    Each model should have its own stack of wrappers (cache, scheduler, accounting),
+    so that cached responses stay keyed on the model that produced them.  The model id
+    of this wrapper is the primary model id.
+    """
+
+    def __init__(
+        self,
+        llm_model: BaseAIModel,
+        fast_model: BaseAIModel,
+        fast_prompts: Iterable[str] = DEFAULT_FAST_PROMPTS,
+        max_fast_tokens: Optional[int] = None,
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            llm_model (BaseAIModel): The primary model.
+            fast_model (BaseAIModel): The fast model.
+            fast_prompts (Iterable[str]): Prompt names to route to the fast model.
+            max_fast_tokens (Optional[int]): Route prompts with more estimated tokens
+                than this to the primary model even if their name matches.
+        """
+        super().__init__(llm_model)
+        self.fast_model = fast_model
+        self.fast_prompts = frozenset(fast_prompts)
+        self.max_fast_tokens = max_fast_tokens
+
+    def get_model_id(self, prompt_name: str) -> str:
+        """
+        Get an id for the model(s) that may serve a prompt, e.g., for cache keys.
+
+        Args:
+            prompt_name (str): Prompt name.
+
+        Returns:
+            str: The routed model id, or both model ids and the size threshold if
+                the prompt is routed by size.
+        """
+        if prompt_name not in self.fast_prompts:
+            return self.llm_model.model
+        if self.max_fast_tokens is None:
+            return self.fast_model.model
+        return f"{self.fast_model.model}<={self.max_fast_tokens}|{self.llm_model.model}"
+
+    def route(self, args: tuple, kwargs: dict) -> BaseAIModel:
+        """
+        Choose the model for a call and record its id.
+
+        Args:
+            args (tuple): Positional arguments.
+            kwargs (dict): Keyword arguments.
+
+        Returns:
+            BaseAIModel: The fast or primary model.
+        """
+        llm_model = self.llm_model
+        if get_llm_call_tags().get("prompt_name", None) in self.fast_prompts:
+            prompt = args[0] if args else kwargs.get("messages", kwargs)
+            if (
+                self.max_fast_tokens is None
+                or estimate_prompt_tokens(prompt) <= self.max_fast_tokens
+            ):
+                llm_model = self.fast_model
+
+        add_llm_model_id(llm_model.model)
+        return llm_model
+
+    def chat(self, *args, **kwargs) -> Any:
+        """
+        Generate a chat response with the routed model.
+        """
+        return self.route(args, kwargs).chat(*args, **kwargs)
+
+    def json(self, *args, **kwargs) -> Any:
+        """
+        Generate a JSON response with the routed model.
+        """
+        return self.route(args, kwargs).json(*args, **kwargs)
+
+
+def get_routed_model_id(llm_model: BaseAIModel, prompt_name: str) -> str:
+    """
+    Get an id for the model(s) that may serve a prompt, routed or not.
+
+    Args:
+        llm_model (BaseAIModel): Model or router.
+        prompt_name (str): Prompt name.
+
+    Returns:
+        str: Model id.
+    """
+    if isinstance(llm_model, RoutedAIModel):
+        return llm_model.get_model_id(prompt_name)
+    return llm_model.model
+
+
+def get_routed_model_ids(
+    llm_model: BaseAIModel, prompt_name: Optional[str]
+) -> tuple[str, ...]:
+    """
+    Get the ids of the models that may serve a prompt, routed or not, e.g., to budget
+    the prompt for the smallest of their context windows.
+
+    Args:
+        llm_model (BaseAIModel): Model or router.
+        prompt_name (Optional[str]): Prompt name.
+
+    Returns:
+        tuple[str, ...]: Model ids, the fast model first if the prompt may be routed.
+    """
+    if isinstance(llm_model, RoutedAIModel) and prompt_name in llm_model.fast_prompts:
+        if llm_model.max_fast_tokens is None:
+            return (llm_model.fast_model.model,)
+        return (llm_model.fast_model.model, llm_model.llm_model.model)
+    return (llm_model.model,)
@@ -0,0 +1,253 @@
+"""
+Shared LLM scheduler that runs requests concurrently within provider RPM/TPM limits.
+"""
+
+# imports
+import collections
+import concurrent.futures
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional
+
+# packages
+from alea_llm_client import BaseAIModel
+
+# project
+from fbs.llm.base import WrappedAIModel
+from fbs.llm.context import get_llm_call_tags
+
+# default provider limits
+DEFAULT_MAX_RPM = 500
+DEFAULT_MAX_TPM = 300000
+DEFAULT_MAX_WORKERS = 16
+
+# length of the rate limit window in seconds
+RATE_WINDOW = 60.0
+
+# approximate number of characters per token for estimates
+CHARS_PER_TOKEN = 4
+
+
+def estimate_prompt_tokens(prompt: Any) -> int:
+    """
+    Estimate the number of tokens in a prompt.
+
+    Args:
+        prompt (Any): Prompt string or list of messages.
+
+    Returns:
+        int: Estimated token count.
+    """
+    return len(str(prompt)) // CHARS_PER_TOKEN + 1
+
+
+class LLMScheduler:
+    """
+    Runs LLM tasks on a shared thread pool and admits individual requests only when
+    they fit within the requests-per-minute and tokens-per-minute limits.
+
+    Waiting requests are admitted round-robin across keys (e.g., bill package ids),
+    so a large bill cannot starve the others, and FIFO within each key.
+    """
+
+    def __init__(
+        self,
+        max_rpm: int = DEFAULT_MAX_RPM,
+        max_tpm: int = DEFAULT_MAX_TPM,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_rpm (int): Maximum requests per minute.
+            max_tpm (int): Maximum prompt tokens per minute.
+            max_workers (int): Maximum number of concurrent tasks.
+        """
+        self.max_rpm = max_rpm
+        self.max_tpm = max_tpm
+        self.max_workers = max_workers
+
+        # sliding window of (timestamp, tokens) for admitted requests
+        self._window: collections.deque[tuple[float, int]] = collections.deque()
+        self._window_tokens = 0
+
+        # waiting requests by key and round-robin key order
+        self._waiters: dict[Hashable, collections.deque[object]] = {}
+        self._keys: collections.deque[Hashable] = collections.deque()
+        self._condition = threading.Condition()
+
+        # lazily created thread pool
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        """
+        Drop requests that have left the rate limit window.
+
+        Args:
+            now (float): Current monotonic time.
+        """
+        while self._window and self._window[0][0] <= now - RATE_WINDOW:
+            _, tokens = self._window.popleft()
+            self._window_tokens -= tokens
+
+    def _has_capacity(self, tokens: int) -> bool:
+        """
+        Check whether a request fits within the current window.
+
+        Args:
+            tokens (int): Estimated request tokens.
+
+        Returns:
+            bool: True if the request can be admitted.
+        """
+        return (
+            len(self._window) < self.max_rpm
+            and self._window_tokens + tokens <= self.max_tpm
+        )
+
+    def _is_next(self, key: Hashable, ticket: object) -> bool:
+        """
+        Check whether a waiting request is next in the round-robin order.
+
+        Args:
+            key (Hashable): Request key.
+            ticket (object): Request ticket.
+
+        Returns:
+            bool: True if the request is next.
+        """
+        return self._keys[0] == key and self._waiters[key][0] is ticket
+
+    def acquire(self, tokens: int, key: Hashable = None) -> None:
+        """
+        Block until a request can be admitted within the rate limits.
+
+        Args:
+            tokens (int): Estimated request tokens.
+            key (Hashable): Fairness key, e.g., the bill package id.
+        """
+        # a single request larger than the token limit is admitted on an empty window
+        tokens = min(tokens, self.max_tpm)
+        ticket = object()
+
+        with self._condition:
+            if key not in self._waiters:
+                self._waiters[key] = collections.deque()
+                self._keys.append(key)
+            self._waiters[key].append(ticket)
+
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                if self._is_next(key, ticket) and self._has_capacity(tokens):
+                    break
+
+                # wait for another grant or for the oldest request to expire
+                timeout = 1.0
+                if self._window:
+                    timeout = max(0.01, self._window[0][0] + RATE_WINDOW - now)
+                self._condition.wait(timeout=min(timeout, 1.0))
+
+            # admit the request and rotate its key to the back of the order
+            self._waiters[key].popleft()
+            self._keys.popleft()
+            if self._waiters[key]:
+                self._keys.append(key)
+            else:
+                del self._waiters[key]
+
+            self._window.append((now, tokens))
+            self._window_tokens += tokens
+            self._condition.notify_all()
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """
+        Get the shared thread pool.
+
+        Returns:
+            concurrent.futures.ThreadPoolExecutor: The thread pool.
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="llm"
+                )
+            return self._executor
+
+    def submit(
+        self, function: Callable, *args: Any, **kwargs: Any
+    ) -> concurrent.futures.Future:
+        """
+        Submit a task to the shared thread pool, preserving the caller's LLM call tags.
+
+        Args:
+            function (Callable): Task function.
+            *args (Any): Positional arguments.
+            **kwargs (Any): Keyword arguments.
+
+        Returns:
+            concurrent.futures.Future: The task future.
+        """
+        context = contextvars.copy_context()
+        return self._get_executor().submit(context.run, function, *args, **kwargs)
+
+    def shutdown(self) -> None:
+        """
+        Shut down the shared thread pool.
+        """
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+class ScheduledAIModel(WrappedAIModel):
+    """
+    Admits every chat and JSON call through the shared scheduler's rate limits.
+    """
+
+    def __init__(self, llm_model: BaseAIModel, scheduler: LLMScheduler):
+        """
+        Initialize the wrapper.
+
+        Args:
+            llm_model (BaseAIModel): The wrapped model.
+            scheduler (LLMScheduler): The shared scheduler.
+        """
+        super().__init__(llm_model)
+        self.scheduler = scheduler
+
+    def _acquire(self, args: tuple, kwargs: dict) -> None:
+        """
+        Wait for the scheduler to admit a call.
+
+        Args:
+            args (tuple): Positional arguments.
+            kwargs (dict): Keyword arguments.
+        """
+        prompt = args[0] if args else kwargs.get("messages", kwargs)
+        self.scheduler.acquire(
+            estimate_prompt_tokens(prompt),
+            key=get_llm_call_tags().get("package_id", None),
+        )
+
+    def chat(self, *args, **kwargs) -> Any:
+        """
+        Generate a chat response within the rate limits.
+        """
+        self._acquire(args, kwargs)
+        return self.llm_model.chat(*args, **kwargs)
+
+    def json(self, *args, **kwargs) -> Any:
+        """
+        Generate a JSON response within the rate limits.
+        """
+        self._acquire(args, kwargs)
+        return self.llm_model.json(*args, **kwargs)
+
+
+# default shared scheduler
+DEFAULT_SCHEDULER = LLMScheduler()
@@ -0,0 +1,125 @@
+"""
+Token usage reported by providers, including prompt tokens served from the provider's
+prompt cache.
+"""
+
+# imports
+import threading
+from typing import Any
+
+# packages
+from alea_llm_client import BaseAIModel
+
+# project
+from fbs.llm.base import WrappedAIModel
+
+
+def get_response_usage(response: Any) -> dict[str, int]:
+    """
+    Get the token usage of a response, normalized across providers.
+
+    OpenAI-compatible providers report cached prompt tokens in
+    prompt_tokens_details.cached_tokens, and Anthropic reports cache reads and writes
+    separately from input_tokens.  Responses without usage metadata, e.g., responses
+    returned from the local LLM cache, report zero tokens.
+
+    Args:
+        response (Any): Model response.
+
+    Returns:
+        dict[str, int]: Prompt, cached prompt, and completion token counts.
+    """
+    metadata = getattr(response, "metadata", None) or {}
+    usage = metadata.get("usage", None) or {}
+
+    if "input_tokens" in usage:
+        cached_tokens = usage.get("cache_read_input_tokens", 0) or 0
+        prompt_tokens = (
+            (usage.get("input_tokens", 0) or 0)
+            + cached_tokens
+            + (usage.get("cache_creation_input_tokens", 0) or 0)
+        )
+        completion_tokens = usage.get("output_tokens", 0) or 0
+    else:
+        prompt_tokens = usage.get("prompt_tokens", 0) or 0
+        cached_tokens = (usage.get("prompt_tokens_details", None) or {}).get(
+            "cached_tokens", 0
+        ) or 0
+        completion_tokens = usage.get("completion_tokens", 0) or 0
+
+    return {
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "completion_tokens": completion_tokens,
+    }
+
+
+class UsageAIModel(WrappedAIModel):
+    """
+    Records the token usage reported by the provider for every chat and JSON call.
+    """
+
+    def __init__(self, llm_model: BaseAIModel):
+        """
+        Initialize the wrapper.
+
+        Args:
+            llm_model (BaseAIModel): The wrapped model.
+        """
+        super().__init__(llm_model)
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def _record(self, response: Any) -> Any:
+        """
+        Record the usage of a response.
+
+        Args:
+            response (Any): Model response.
+
+        Returns:
+            Any: The response.
+        """
+        usage = get_response_usage(response)
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += usage["prompt_tokens"]
+            self.cached_tokens += usage["cached_tokens"]
+            self.completion_tokens += usage["completion_tokens"]
+        return response
+
+    def chat(self, *args, **kwargs) -> Any:
+        """
+        Generate a chat response and record its usage.
+        """
+        return self._record(self.llm_model.chat(*args, **kwargs))
+
+    def json(self, *args, **kwargs) -> Any:
+        """
+        Generate a JSON response and record its usage.
+        """
+        return self._record(self.llm_model.json(*args, **kwargs))
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get usage statistics.
+
+        Returns:
+            dict[str, Any]: Requests, token counts, and the share of prompt tokens
+                served from the provider's prompt cache.
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cached_ratio": (
+                    self.cached_tokens / self.prompt_tokens
+                    if self.prompt_tokens > 0
+                    else 0.0
+                ),
+            }
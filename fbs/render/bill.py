@@ -20,8 +20,11 @@ import markdown
 
 # project
 from fbs.logger import LOGGER
+from fbs.sources.govinfo.govinfo_codec import decode_record
 from fbs.sources.govinfo.govinfo_types import BILL_VERSION_CODES, get_bill_slug
+from fbs.utils.entities import normalize_entity
 from fbs.utils.readability import get_ari_years_education, get_ari_raw
+from fbs.utils.store import GZIP_MAGIC
 
 # default bill stats path
 DEFAULT_STATS_PATH = Path.home() / ".cache" / "fbs" / "stats.json"
@@ -135,25 +138,29 @@ def enrich_bill_data(
         bill_data["ari_years_education"], bill_stats["ari_years_education"]["deciles"]
     )
 
-    # convert entities to lowercase and strip whitespace
+    # count the filtered entities across sections by their normalized form
     entity_count = Counter()
-    filter_entities = [e.lower().strip() for e in bill_data["entities"]]
+    filter_entities = {
+        normalize_entity(entity): entity for entity in bill_data["entities"]
+    }
     for section_data in bill_data["sections"]:
         for entity in section_data["entities"]:
-            if entity.lower().strip() in filter_entities:
-                entity_count[entity] += 1
+            entity_key = normalize_entity(entity)
+            if entity_key in filter_entities:
+                entity_count[filter_entities[entity_key]] += 1
 
     # set entity_counts dictionary into data
     bill_data["entity_counts"] = entity_count
 
-    # render all section summary fields to html as well
+    # render all section summary fields to html as well, leaving pending ones empty
     for section_data in bill_data["sections"]:
-        section_data["summary"] = markdown.markdown(section_data["summary"])
+        section_data["summary"] = markdown.markdown(section_data["summary"] or "")
 
-    # render markdown to html fields
-    bill_data["eli5"] = markdown.markdown(bill_data["eli5"])
-    bill_data["summary"] = markdown.markdown(bill_data["summary"])
-    bill_data["commentary"] = markdown.markdown(bill_data["commentary"])
+    # render markdown to html fields, which are None while llm analysis is pending
+    bill_data["llm_status"] = bill_data.get("llm_status", "complete")
+    bill_data["eli5"] = markdown.markdown(bill_data["eli5"] or "")
+    bill_data["summary"] = markdown.markdown(bill_data["summary"] or "")
+    bill_data["commentary"] = markdown.markdown(bill_data["commentary"] or "")
     bill_data["issues"] = [markdown.markdown(issue) for issue in bill_data["issues"]]
 
     # shift all h1/h2/h3 headers down by two levels
@@ -195,45 +202,53 @@ def enrich_bill_data(
     return bill_data
 
 
-def load_json_data(file_path: str | Path) -> Dict[str, Any]:
-    """Load JSON data from the specified file path.
+def load_bill_record(file_path: str | Path) -> Dict[str, Any]:
+    """Load a bill record from the specified file path, upgrading it to the current
+    schema version.
 
     Args:
-        file_path: Path to the JSON file
+        file_path: Path to the JSON file, plain or gzipped
 
     Returns:
-        Dict containing the JSON data
+        Dict containing the bill record
 
     Raises:
         FileNotFoundError: If file does not exist
-        json.JSONDecodeError: If file contains invalid JSON
+        ValueError: If file does not contain a valid bill record
     """
     try:
-        try:
-            with open(file_path, "rt") as input_file:
-                data = json.load(input_file)
-        except Exception:
-            # try with gzip
-            try:
-                with gzip.open(file_path, "rt") as input_file:
-                    data = json.load(input_file)
-            except Exception as e:
-                LOGGER.error(f"Error reading file: {str(e)}")
-                raise RuntimeError(f"Error reading file: {str(e)}") from e
-
-        # enrich the data
-        data = enrich_bill_data(data, load_bill_stats())
+        with open(file_path, "rb") as input_file:
+            content = input_file.read()
 
-        return data
+        # bills in the store are gzipped
+        if content[:2] == GZIP_MAGIC:
+            content = gzip.decompress(content)
+        return decode_record(content)
 
     except FileNotFoundError:
         LOGGER.error(f"File not found: {file_path}")
         raise
-    except json.JSONDecodeError:
-        LOGGER.error(f"Invalid JSON in file: {file_path}")
+    except (OSError, EOFError, ValueError) as e:
+        LOGGER.error(f"Invalid bill record in file {file_path}: {str(e)}")
         raise
 
 
+def load_json_data(file_path: str | Path) -> Dict[str, Any]:
+    """Load a bill record from the specified file path and enrich it for rendering.
+
+    Args:
+        file_path: Path to the JSON file, plain or gzipped
+
+    Returns:
+        Dict containing the enriched bill data
+
+    Raises:
+        FileNotFoundError: If file does not exist
+        ValueError: If file does not contain a valid bill record
+    """
+    return enrich_bill_data(load_bill_record(file_path), load_bill_stats())
+
+
 def render_template_html(
     data: Dict[str, Any], template_path: str, output_path: str
 ) -> None:
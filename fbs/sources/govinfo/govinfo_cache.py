@@ -0,0 +1,219 @@
+"""
+Content-addressed cache for section analysis shared across bills.
+"""
+
+# imports
+import hashlib
+from pathlib import Path
+from typing import Any, Optional
+
+# packages
+from spacy.tokens import Doc, DocBin
+from spacy.vocab import Vocab
+
+# project
+from fbs.utils.store import (
+    atomic_write_bytes,
+    quarantine_entry,
+    read_json_gz,
+    write_json_gz,
+)
+
+# default section cache path
+DEFAULT_SECTION_CACHE_PATH = Path.home() / ".cache" / "fbs" / "sections"
+
+
+class SectionCache:
+    """
+    Cache of section analysis keyed by the hash of the section's normalized markdown.
+
+    NLP data is parameterized by the NLP profile, and LLM data is parameterized by
+    the model id and prompt version, so boilerplate sections that repeat across bills
+    are only analyzed once per configuration.
+
+    The annotated spacy docs of each section are also kept as a compact DocBin shard
+    per NLP profile, so new metrics can be computed without running the pipeline again.
+    """
+
+    def __init__(self, cache_path: Path = DEFAULT_SECTION_CACHE_PATH):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_path (Path): Root path of the cache.
+        """
+        self.cache_path = cache_path
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _get_namespace(*parameters: str) -> str:
+        """
+        Get a filesystem-safe namespace for a set of cache parameters.
+
+        Args:
+            *parameters (str): Cache parameters.
+
+        Returns:
+            str: Namespace directory name.
+        """
+        return hashlib.blake2b(
+            "\x00".join(parameters).encode("utf-8"), digest_size=16
+        ).hexdigest()
+
+    def _get_path(self, kind: str, content_hash: str, *parameters: str) -> Path:
+        """
+        Get the cache path for an entry.
+
+        Args:
+            kind (str): Entry kind, nlp, docs, or llm.
+            content_hash (str): Section content hash.
+            *parameters (str): Cache parameters.
+
+        Returns:
+            Path: Entry path.
+        """
+        return self.cache_path / kind / self._get_namespace(*parameters) / content_hash
+
+    def _read(self, path: Path) -> Optional[dict[str, Any]]:
+        """
+        Read an entry.
+
+        Args:
+            path (Path): Entry path.
+
+        Returns:
+            Optional[dict[str, Any]]: Entry data, or None if missing or corrupt.
+        """
+        return read_json_gz(path)
+
+    def _write(self, path: Path, data: dict[str, Any]) -> None:
+        """
+        Write an entry.
+
+        Args:
+            path (Path): Entry path.
+            data (dict[str, Any]): Entry data.
+        """
+        write_json_gz(path, data)
+
+    def get_nlp(self, content_hash: str, nlp_profile: str) -> Optional[dict[str, Any]]:
+        """
+        Get the cached spacy data for a section.
+
+        Args:
+            content_hash (str): Section content hash.
+            nlp_profile (str): NLP profile.
+
+        Returns:
+            Optional[dict[str, Any]]: Spacy data, or None if not cached.
+        """
+        return self._read(self._get_path("nlp", content_hash, nlp_profile))
+
+    def put_nlp(
+        self, content_hash: str, nlp_profile: str, spacy_data: dict[str, Any]
+    ) -> None:
+        """
+        Cache the spacy data for a section.
+
+        Args:
+            content_hash (str): Section content hash.
+            nlp_profile (str): NLP profile.
+            spacy_data (dict[str, Any]): Spacy data.
+        """
+        self._write(self._get_path("nlp", content_hash, nlp_profile), spacy_data)
+
+    def get_docs(
+        self, content_hash: str, nlp_profile: str, vocab: Optional[Vocab] = None
+    ) -> Optional[list[Doc]]:
+        """
+        Get the stored spacy annotations for a section.
+
+        The strings are stored with the docs, so a blank vocab is enough to load them
+        without the spacy pipeline.
+
+        Args:
+            content_hash (str): Section content hash.
+            nlp_profile (str): NLP profile.
+            vocab (Optional[Vocab]): Vocab to load the docs into.
+
+        Returns:
+            Optional[list[Doc]]: Docs, one per chunk, or None if not stored.
+        """
+        path = self._get_path("docs", content_hash, nlp_profile)
+        if not path.exists():
+            return None
+
+        # doc bins are zlib-compressed, so corrupt entries fail their checksum here
+        try:
+            doc_bin = DocBin().from_bytes(path.read_bytes())
+            return list(doc_bin.get_docs(vocab or Vocab()))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            quarantine_entry(path, f"{type(e).__name__}: {e}")
+            return None
+
+    def has_docs(self, content_hash: str, nlp_profile: str) -> bool:
+        """
+        Check whether the spacy annotations for a section are stored.
+
+        Args:
+            content_hash (str): Section content hash.
+            nlp_profile (str): NLP profile.
+
+        Returns:
+            bool: True if the annotations are stored.
+        """
+        return self._get_path("docs", content_hash, nlp_profile).exists()
+
+    def put_docs(self, content_hash: str, nlp_profile: str, doc_bin: DocBin) -> None:
+        """
+        Store the spacy annotations for a section.
+
+        Args:
+            content_hash (str): Section content hash.
+            nlp_profile (str): NLP profile.
+            doc_bin (DocBin): Annotated docs of the section.
+        """
+        atomic_write_bytes(
+            self._get_path("docs", content_hash, nlp_profile), doc_bin.to_bytes()
+        )
+
+    def get_llm(
+        self, content_hash: str, model_id: str, prompt_version: str
+    ) -> Optional[dict[str, Any]]:
+        """
+        Get the cached summary and issues for a section.
+
+        Args:
+            content_hash (str): Section content hash.
+            model_id (str): LLM model id.
+            prompt_version (str): Section prompt version.
+
+        Returns:
+            Optional[dict[str, Any]]: Summary and issues, or None if not cached.
+        """
+        return self._read(self._get_path("llm", content_hash, model_id, prompt_version))
+
+    def put_llm(
+        self,
+        content_hash: str,
+        model_id: str,
+        prompt_version: str,
+        summary: str,
+        issues: list[str],
+    ) -> None:
+        """
+        Cache the summary and issues for a section.
+
+        Args:
+            content_hash (str): Section content hash.
+            model_id (str): LLM model id.
+            prompt_version (str): Section prompt version.
+            summary (str): Section summary.
+            issues (list[str]): Section issues.
+        """
+        self._write(
+            self._get_path("llm", content_hash, model_id, prompt_version),
+            {"summary": summary, "issues": issues},
+        )
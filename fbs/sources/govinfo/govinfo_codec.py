@@ -0,0 +1,204 @@
+"""
+Codec for stored bill records, with an explicit schema version and upgrade path.
+
+Records are JSON objects with a schema_version key.  Records are upgraded one version
+at a time when they are read, so older records in the store keep working as the schema
+changes.  The bill store, renderers, and site builder all read and write records
+through this module as dicts; bill_from_record builds Bill and BillSection objects for
+callers that need them.
+
+Records are encoded as compact UTF-8 JSON with orjson, which also encodes numpy
+values as numbers.
+"""
+
+# future
+from __future__ import annotations
+
+# imports
+import datetime
+from dataclasses import fields
+from typing import Any, Callable, Dict
+
+# packages
+import orjson
+
+# project
+from fbs.sources.govinfo.govinfo_types import Bill, BillSection
+
+# current schema version of bill records; records without one are version 1
+SCHEMA_VERSION = 2
+
+# field names of the record types, for bill_from_record
+BILL_FIELDS = frozenset(bill_field.name for bill_field in fields(Bill))
+BILL_SECTION_FIELDS = frozenset(
+    section_field.name for section_field in fields(BillSection)
+)
+
+
+class SchemaVersionError(ValueError):
+    """
+    Raised for records written with a newer schema than this code supports.
+    """
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Encode data as compact UTF-8 JSON.
+
+    Args:
+        data (Any): JSON-serializable data, including numpy values.
+
+    Returns:
+        bytes: Encoded data.
+    """
+    return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def loads(content: bytes | str) -> Any:
+    """
+    Decode JSON data.
+
+    Args:
+        content (bytes | str): Encoded data.
+
+    Returns:
+        Any: Decoded data.
+
+    Raises:
+        ValueError: If the content is not valid JSON.
+    """
+    return orjson.loads(content)
+
+
+def upgrade_v1(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Upgrade an unversioned record, adding the character counts that older records
+    were written without.
+
+    Args:
+        record (Dict[str, Any]): Version 1 record.
+
+    Returns:
+        Dict[str, Any]: Version 2 record.
+    """
+    record.setdefault("num_characters", len(record.get("text", "")))
+    for section_data in record.get("sections", []):
+        section_data.setdefault("num_characters", len(section_data.get("text", "")))
+    return record
+
+
+# upgrade functions by the schema version they upgrade from
+RECORD_UPGRADES: Dict[int, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    1: upgrade_v1,
+}
+
+
+def upgrade_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Upgrade a record to the current schema version.
+
+    Args:
+        record (Dict[str, Any]): Record of any supported version.
+
+    Returns:
+        Dict[str, Any]: Record of the current version.
+
+    Raises:
+        SchemaVersionError: If the record is newer than the current version.
+    """
+    version = record.get("schema_version", 1)
+    if version > SCHEMA_VERSION:
+        raise SchemaVersionError(
+            f"Record schema version {version} is newer than {SCHEMA_VERSION}"
+        )
+
+    while version < SCHEMA_VERSION:
+        record = RECORD_UPGRADES[version](record)
+        version += 1
+    record["schema_version"] = SCHEMA_VERSION
+    return record
+
+
+def encode_record(record: Dict[str, Any]) -> bytes:
+    """
+    Encode a bill record with the current schema version.
+
+    Args:
+        record (Dict[str, Any]): Bill record, e.g., from Bill.to_dict.
+
+    Returns:
+        bytes: Encoded record.
+    """
+    return dumps({**record, "schema_version": SCHEMA_VERSION})
+
+
+def decode_record(content: bytes | str) -> Dict[str, Any]:
+    """
+    Decode a bill record and upgrade it to the current schema version.
+
+    Args:
+        content (bytes | str): Encoded record.
+
+    Returns:
+        Dict[str, Any]: Bill record.
+
+    Raises:
+        ValueError: If the content is not a valid record.
+        SchemaVersionError: If the record is newer than the current version.
+    """
+    record = loads(content)
+    if not isinstance(record, dict):
+        raise ValueError("Bill record is not a JSON object")
+    return upgrade_record(record)
+
+
+def bill_from_record(record: Dict[str, Any]) -> Bill:
+    """
+    Build a Bill from a current record, ignoring keys that are not fields, such as
+    the schema version.
+
+    Args:
+        record (Dict[str, Any]): Bill record of the current schema version.
+
+    Returns:
+        Bill: The bill.
+    """
+    bill_data = {key: value for key, value in record.items() if key in BILL_FIELDS}
+    bill_data["date"] = datetime.datetime.fromisoformat(bill_data["date"])
+    bill_data["sections"] = [
+        BillSection(
+            **{
+                key: value
+                for key, value in section_data.items()
+                if key in BILL_SECTION_FIELDS
+            }
+        )
+        for section_data in bill_data.get("sections", [])
+    ]
+    return Bill(**bill_data)
+
+
+def encode_bill(bill: Bill) -> bytes:
+    """
+    Encode a bill as a record with the current schema version.
+
+    Args:
+        bill (Bill): The bill.
+
+    Returns:
+        bytes: Encoded record.
+    """
+    return encode_record(bill.to_dict())
+
+
+def decode_bill(content: bytes | str) -> Bill:
+    """
+    Decode a record of any supported schema version into a Bill.
+
+    Args:
+        content (bytes | str): Encoded record.
+
+    Returns:
+        Bill: The bill.
+    """
+    return bill_from_record(decode_record(content))
@@ -4,22 +4,46 @@ GovInfo bill parser to generate clean structure from XML.
 
 # imports
 import datetime
-import time
+import functools
 import warnings
 from collections import Counter
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Iterable, Iterator, Optional
 
 # packages
 import alea_preprocess
 import lxml.etree
 import numpy
 import spacy
+from spacy.tokens import DocBin
 from alea_llm_client import BaseAIModel
 
 # project
+from fbs.llm.batch import call_all
+from fbs.llm.context import (
+    llm_call_context,
+    record_llm_model_ids,
+    with_llm_call_tags,
+)
+from fbs.llm.routing import get_routed_model_id, get_routed_model_ids
+from fbs.llm.scheduler import (
+    DEFAULT_SCHEDULER,
+    LLMScheduler,
+    estimate_prompt_tokens,
+)
+from fbs.sources.govinfo.govinfo_cache import SectionCache
 from fbs.sources.govinfo.govinfo_types import BillSection, Bill
+from fbs.utils.dag import TaskGraph
+from fbs.utils.text import get_content_hash
+from fbs.version import CODE_VERSION
 from fbs.sources.govinfo.govinfo_prompts import (
+    BILL_PROMPT_VERSIONS,
+    COMBINED_SECTION_PROMPT_VERSION,
+    SECTION_PROMPT_VERSION,
+    analyze_bill_section,
+    analyze_bill_sections,
+    get_prompt_budget,
+    get_section_pack_id,
     summarize_bill,
     summarize_bill_section,
     audit_bill,
@@ -36,15 +60,57 @@ warnings.simplefilter(action="ignore", category=FutureWarning)
 
 # constants
 
-# delay per section for rpm limits
-SECTION_DELAY = 1.0
-
 # default spacy model name
 DEFAULT_SPACY_MODEL_NAME = "en_core_web_trf"
 
 # load spacy default model
 DEFAULT_SPACY_MODEL = spacy.load(DEFAULT_SPACY_MODEL_NAME)
 
+# maximum number of characters to process in a single spacy doc
+DEFAULT_CHUNK_SIZE = 100000
+
+# nlp profile for cached section stats
+DEFAULT_NLP_PROFILE = "{name}-{version}-{chunk_size}".format(
+    name=DEFAULT_SPACY_MODEL_NAME,
+    version=DEFAULT_SPACY_MODEL.meta.get("version", ""),
+    chunk_size=DEFAULT_CHUNK_SIZE,
+)
+
+# preferred chunk boundaries, from sections/paragraphs down to sentences
+CHUNK_SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+# section llm modes:
+#  - separate: one summary call and one audit call per section
+#  - combined: one summary and audit call per section
+#  - packed: one summary and audit call per pack of short sections
+SECTION_MODES = ("separate", "combined", "packed")
+DEFAULT_SECTION_MODE = "separate"
+
+# limits for packing short sections into a single prompt
+DEFAULT_PACK_TOKEN_BUDGET = 4000
+DEFAULT_PACK_MAX_SECTIONS = 25
+
+# section fields that can be reused from an identical section in another bill version
+SECTION_REUSE_FIELDS = (
+    "num_characters",
+    "num_tokens",
+    "num_sentences",
+    "num_nouns",
+    "num_verbs",
+    "num_adjectives",
+    "num_adverbs",
+    "num_numbers",
+    "num_punctuations",
+    "num_entities",
+    "avg_token_length",
+    "avg_sentence_length",
+    "token_entropy",
+    "entities",
+    "money_sentences",
+    "summary",
+    "issues",
+)
+
 
 def load_xsl_transformer() -> lxml.etree.XSLT:
     """
@@ -60,6 +126,55 @@ def load_xsl_transformer() -> lxml.etree.XSLT:
 # load the default transformer once at the module level
 DEFAULT_TRANSFORMER = load_xsl_transformer()
 
+# structural elements that can contain top-level sections
+SECTION_CONTAINER_TAGS = (
+    "division",
+    "title",
+    "subtitle",
+    "chapter",
+    "subchapter",
+    "part",
+    "subpart",
+)
+
+
+def get_section_tree(
+    xml_doc: lxml.etree.Element,
+) -> list[tuple[lxml.etree.Element, list[lxml.etree.Element]]]:
+    """
+    Get the analysis units of a bill as a section tree.
+
+    Only outermost <section> elements are analysis units.  Sections nested inside
+    another section, e.g., in a <quoted-block> amendment, are part of the text of
+    their enclosing section and are returned as its children instead of being
+    analyzed a second time.
+
+    Args:
+        xml_doc: Bill XML document.
+
+    Returns:
+        List of (section element, nested section elements) tuples in document order.
+    """
+    return [
+        (section_element, section_element.xpath(".//section"))
+        for section_element in xml_doc.xpath(".//section[not(ancestor::section)]")
+    ]
+
+
+def get_section_parent_id(section_element: lxml.etree.Element) -> Optional[str]:
+    """
+    Get the id of the nearest structural container (title, subtitle, etc.) of a section.
+
+    Args:
+        section_element: Section element.
+
+    Returns:
+        Parent id.
+    """
+    for ancestor in section_element.iterancestors(*SECTION_CONTAINER_TAGS):
+        return ancestor.attrib.get("id", None)
+    return None
+
 
 def get_section_enum(section_element: lxml.etree.Element) -> Optional[str]:
     """
@@ -124,7 +239,42 @@ def get_section_html(section_element: lxml.etree.Element) -> lxml.etree.Element:
     return section_html
 
 
-def get_spacy_data(text: str) -> dict:
+def split_text_chunks(text: str, max_chars: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Split text into chunks of at most max_chars characters, preferring to split
+    at section/paragraph boundaries, then line boundaries, then sentence boundaries.
+
+    The chunks are yielded lazily and concatenate back to the original text exactly.
+
+    Args:
+        text: Text to split.
+        max_chars: Maximum number of characters per chunk.
+
+    Returns:
+        Iterator of text chunks.
+    """
+    start = 0
+    while len(text) - start > max_chars:
+        # find the last preferred boundary within the window
+        window = text[start : start + max_chars]
+        cut = max_chars
+        for separator in CHUNK_SEPARATORS:
+            index = window.rfind(separator)
+            if index > 0:
+                cut = index + len(separator)
+                break
+
+        yield text[start : start + cut]
+        start += cut
+
+    yield text[start:]
+
+
+def get_spacy_data(
+    text: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    doc_bin: Optional[DocBin] = None,
+) -> dict:
     """
     Get basic statistics about the document by parsing with spacy and then:
      - extracting the named entities
@@ -133,17 +283,21 @@ def get_spacy_data(text: str) -> dict:
      - calculating the token entropy
      - calculating the readability scores
 
+    Text longer than chunk_size is split at section or sentence boundaries and streamed
+    through spacy one chunk at a time, so peak memory is bounded by the chunk size.
+    Counts are summed across chunks and the token entropy is calculated from the merged
+    token frequency table.
+
     Args:
         text: Text to get spacy stats from.
+        chunk_size: Maximum number of characters to process in a single spacy doc.
+        doc_bin: DocBin to collect the annotated docs in, one per chunk.
 
     Returns:
         Spacy stats.
     """
-    # get spacy doc
-    doc = DEFAULT_SPACY_MODEL(text)
-
     # get stats
-    num_sentences = len(list(doc.sents))
+    num_sentences = 0
     num_characters = len(text)
     num_tokens = 0
     num_nouns = 0
@@ -152,55 +306,70 @@ def get_spacy_data(text: str) -> dict:
     num_adverbs = 0
     num_punctuations = 0
     num_numbers = 0
-
-    for token in doc:
-        num_tokens += 1
-        if token.pos_ in ("NOUN", "PROPN", "PRON"):
-            num_nouns += 1
-        elif token.pos_ in ("VERB",):
-            num_verbs += 1
-        elif token.pos_ == "ADJ":
-            num_adjectives += 1
-        elif token.pos_ == "ADV":
-            num_adverbs += 1
-        else:
-            if token.is_punct or token.pos_ in ("PUNCT",):
-                num_punctuations += 1
-            elif token.like_num or token.pos_ in ("NUM",):
-                num_numbers += 1
-            elif token.pos_ not in (
-                "DET",
-                "ADP",
-                "CCONJ",
-                "SCONJ",
-                "PART",
-                "AUX",
-                "SPACE",
-            ):
-                # print(f"Unknown token POS: {token} -> {token.pos_}")
-                pass
-
-    # get the number of entities
-    num_entities = len(list(doc.ents))
+    num_entities = 0
+    total_token_length = 0
+    total_sentence_length = 0
+    token_freqs = Counter()
+    named_entities = []
+    money_sentences = []
+
+    # stream the chunks through spacy so only one doc is held at a time
+    for doc in DEFAULT_SPACY_MODEL.pipe(
+        split_text_chunks(text, chunk_size), batch_size=1
+    ):
+        if doc_bin is not None:
+            doc_bin.add(doc)
+
+        for token in doc:
+            num_tokens += 1
+            total_token_length += len(token)
+            token_freqs[token.text] += 1
+            if token.pos_ in ("NOUN", "PROPN", "PRON"):
+                num_nouns += 1
+            elif token.pos_ in ("VERB",):
+                num_verbs += 1
+            elif token.pos_ == "ADJ":
+                num_adjectives += 1
+            elif token.pos_ == "ADV":
+                num_adverbs += 1
+            else:
+                if token.is_punct or token.pos_ in ("PUNCT",):
+                    num_punctuations += 1
+                elif token.like_num or token.pos_ in ("NUM",):
+                    num_numbers += 1
+                elif token.pos_ not in (
+                    "DET",
+                    "ADP",
+                    "CCONJ",
+                    "SCONJ",
+                    "PART",
+                    "AUX",
+                    "SPACE",
+                ):
+                    # print(f"Unknown token POS: {token} -> {token.pos_}")
+                    pass
+
+        for sent in doc.sents:
+            num_sentences += 1
+            total_sentence_length += len(sent)
+
+            # get every sentence that includes a $ or dollar
+            if "$" in sent.text or " dollar" in sent.text.lower():
+                money_sentences.append(sent.text)
+
+        # get the NEs
+        for ent in doc.ents:
+            num_entities += 1
+            named_entities.append(ent.text)
 
     # calculate the average token and sentence length
-    avg_token_length = sum(len(token) for token in doc) / num_tokens
-    avg_sentence_length = sum(len(sent) for sent in doc.sents) / num_sentences
+    avg_token_length = total_token_length / num_tokens
+    avg_sentence_length = total_sentence_length / num_sentences
 
-    # calculate the token entropy
-    token_freqs = Counter(token.text for token in doc)
+    # calculate the token entropy from the merged frequency table
     token_probs = numpy.array(list(token_freqs.values())) / num_tokens
-    token_entropy = -numpy.sum(token_probs * numpy.log(token_probs))
-
-    # get the NEs
-    named_entities = [ent.text for ent in doc.ents]
-
-    # get every sentence that includes a $ or dollar
-    money_sentences = [
-        sent.text
-        for sent in doc.sents
-        if "$" in sent.text or " dollar" in sent.text.lower()
-    ]
+    # cast to a plain float so the stats serialize like the other values
+    token_entropy = float(-numpy.sum(token_probs * numpy.log(token_probs)))
 
     return {
         "num_characters": num_characters,
@@ -221,12 +390,81 @@ def get_spacy_data(text: str) -> dict:
     }
 
 
-def parse_xml_section(section_element: lxml.etree.Element) -> BillSection:
+def get_prior_sections(
+    prior_bills: Optional[Iterable[Bill]],
+) -> dict[str, BillSection]:
+    """
+    Index the sections of previously analyzed bill versions by content hash.
+
+    Only the analyzed sections are kept, so prior_bills can be an iterator that loads
+    one version at a time.
+
+    Args:
+        prior_bills: Previously analyzed versions of the same bill, oldest first.
+
+    Returns:
+        Mapping of content hash to the most recent analyzed section with that content.
+    """
+    prior_sections = {}
+    for prior_bill in prior_bills or []:
+        for section in prior_bill.sections:
+            # only reuse sections that completed their LLM analysis
+            if section.summary is None:
+                continue
+            content_hash = section.content_hash or get_content_hash(section.markdown)
+            prior_sections[content_hash] = section
+    return prior_sections
+
+
+def get_section_spacy_data(
+    section_text: str, content_hash: str, section_cache: Optional[SectionCache] = None
+) -> dict:
+    """
+    Get the spacy data of a section, reading from or writing to the section cache.
+
+    When the section is parsed, its annotated docs are stored in the section cache too,
+    and sections cached before docs were stored are parsed once more to store them.
+
+    Args:
+        section_text: Section text.
+        content_hash: Section content hash.
+        section_cache: Content-addressed section cache.
+
+    Returns:
+        Spacy stats.
+    """
+    if section_cache is None:
+        return get_spacy_data(section_text)
+
+    section_data = section_cache.get_nlp(content_hash, DEFAULT_NLP_PROFILE)
+    if section_data is None or not section_cache.has_docs(
+        content_hash, DEFAULT_NLP_PROFILE
+    ):
+        doc_bin = DocBin(store_user_data=False)
+        section_data = get_spacy_data(section_text, doc_bin=doc_bin)
+        section_cache.put_docs(content_hash, DEFAULT_NLP_PROFILE, doc_bin)
+        section_cache.put_nlp(content_hash, DEFAULT_NLP_PROFILE, section_data)
+    return section_data
+
+
+def parse_xml_section(
+    section_element: lxml.etree.Element,
+    nested_elements: Optional[list[lxml.etree.Element]] = None,
+    prior_sections: Optional[dict[str, BillSection]] = None,
+    section_cache: Optional[SectionCache] = None,
+) -> BillSection:
     """
     Parse a section element.
 
+    If a section with the same normalized content was already analyzed in another
+    version of the bill, its NLP stats and LLM outputs are reused instead of recomputed.
+    Otherwise, the spacy data is read from or written to the section cache.
+
     Args:
         section_element: Section element.
+        nested_elements: Sections nested inside this section.
+        prior_sections: Analyzed sections from other bill versions by content hash.
+        section_cache: Content-addressed section cache.
 
     Returns:
         Parsed section.
@@ -234,6 +472,17 @@ def parse_xml_section(section_element: lxml.etree.Element) -> BillSection:
     # get toc id
     toc_id = section_element.attrib.get("id", None)
 
+    # get the parent/child relationships before the element is moved for the XSLT
+    parent_id = get_section_parent_id(section_element)
+    nested_sections = [
+        {
+            "toc_id": nested_element.attrib.get("id", None),
+            "enum": get_section_enum(nested_element),
+            "header": get_section_heading(nested_element),
+        }
+        for nested_element in nested_elements or []
+    ]
+
     # get <enum> if present
     section_enum = get_section_enum(section_element)
 
@@ -252,35 +501,474 @@ def parse_xml_section(section_element: lxml.etree.Element) -> BillSection:
         section_html_buffer, output_links=False, output_images=False
     )
 
-    # get spacy data
-    spacy_data = get_spacy_data(section_text)
+    # reuse the analysis of an identical section from another version if possible
+    content_hash = get_content_hash(section_markdown)
+    prior_section = (prior_sections or {}).get(content_hash, None)
+    if prior_section is not None:
+        section_data = {
+            field_name: getattr(prior_section, field_name)
+            for field_name in SECTION_REUSE_FIELDS
+        }
+        section_data["provenance"] = dict(prior_section.provenance)
+
+        # store the annotations of reused sections parsed before docs were stored
+        if (
+            section_cache is not None
+            and section_data["provenance"].get("nlp_profile") == DEFAULT_NLP_PROFILE
+            and not section_cache.has_docs(content_hash, DEFAULT_NLP_PROFILE)
+        ):
+            get_section_spacy_data(section_text, content_hash, section_cache)
+    else:
+        section_data = get_section_spacy_data(section_text, content_hash, section_cache)
+        section_data["provenance"] = {"nlp_profile": DEFAULT_NLP_PROFILE}
 
     return BillSection(
         # main fields
         enum=section_enum,
         header=section_header,
         toc_id=toc_id,
+        content_hash=content_hash,
+        parent_id=parent_id,
+        nested_sections=nested_sections,
         text=section_text,
         markdown=section_markdown,
         html=lxml.etree.tostring(section_html, encoding="unicode", method="xml"),
-        # stats fields
-        **spacy_data,
+        # stats and reused llm fields
+        **section_data,
     )
 
 
-def parse_xml_bill(
-    xml_doc: lxml.etree.Element, summary_data: dict, llm_model: BaseAIModel
+def get_section_prompt_version(section_mode: str) -> str:
+    """
+    Get the prompt version for cached section analysis in a section mode.
+
+    Args:
+        section_mode: Section mode.
+
+    Returns:
+        Prompt version.
+    """
+    if section_mode == "separate":
+        return SECTION_PROMPT_VERSION
+    return COMBINED_SECTION_PROMPT_VERSION
+
+
+def get_section_model_id(llm_model: BaseAIModel, section_mode: str) -> str:
+    """
+    Get the id of the model that analyzes sections in a section mode, for cache keys.
+
+    Args:
+        llm_model: LLM model or router.
+        section_mode: Section mode.
+
+    Returns:
+        Model id.
+    """
+    if section_mode == "separate":
+        return get_routed_model_id(llm_model, "summarize_bill_section")
+    return get_routed_model_id(llm_model, "analyze_bill_section")
+
+
+def get_answered_section_model_id(
+    llm_model: BaseAIModel, section_mode: str, model_ids: Iterable[str]
+) -> str:
+    """
+    Get the id of the model that actually analyzed a section, for cache keys.
+
+    This is the section model id, unless one of the models recorded for the section's
+    calls is not a model the section prompts are routed to, e.g., after a failover, in
+    which case it is the recorded model ids.
+
+    Args:
+        llm_model: LLM model or router.
+        section_mode: Section mode.
+        model_ids: Ids of the models recorded for the section's calls.
+
+    Returns:
+        Model id.
+    """
+    prompt_name = (
+        "summarize_bill_section"
+        if section_mode == "separate"
+        else "analyze_bill_section"
+    )
+    model_ids = set(model_ids)
+    if model_ids <= set(get_routed_model_ids(llm_model, prompt_name)):
+        return get_section_model_id(llm_model, section_mode)
+    return ", ".join(sorted(model_ids))
+
+
+def set_section_provenance(
+    section_data: BillSection,
+    llm_model: BaseAIModel,
+    section_mode: str,
+    model_id: Optional[str] = None,
+) -> None:
+    """
+    Record the prompt version and model that produced the summary and issues of a section.
+
+    Args:
+        section_data: Analyzed section.
+        llm_model: LLM model.
+        section_mode: Section mode.
+        model_id: Id of the model that answered, defaults to the section model id.
+    """
+    section_data.provenance.update(
+        {
+            "prompt_version": get_section_prompt_version(section_mode),
+            "model_id": model_id or get_section_model_id(llm_model, section_mode),
+            "code_version": CODE_VERSION,
+        }
+    )
+
+
+def load_cached_section_analysis(
+    section_data: BillSection,
+    llm_model: BaseAIModel,
+    section_cache: Optional[SectionCache],
+    section_mode: str = DEFAULT_SECTION_MODE,
+) -> bool:
+    """
+    Set the summary and issues of a section from the section cache if possible.
+
+    Args:
+        section_data: Parsed section.
+        llm_model: LLM model.
+        section_cache: Content-addressed section cache.
+        section_mode: Section mode.
+
+    Returns:
+        True if the section was found in the cache.
+    """
+    if section_cache is None:
+        return False
+
+    llm_data = section_cache.get_llm(
+        section_data.content_hash,
+        get_section_model_id(llm_model, section_mode),
+        get_section_prompt_version(section_mode),
+    )
+    if llm_data is None:
+        return False
+
+    section_data.summary = llm_data["summary"]
+    section_data.issues = llm_data["issues"]
+    set_section_provenance(section_data, llm_model, section_mode)
+    return True
+
+
+def store_section_analysis(
+    section_data: BillSection,
+    llm_model: BaseAIModel,
+    section_cache: Optional[SectionCache],
+    section_mode: str = DEFAULT_SECTION_MODE,
+    model_ids: Iterable[str] = (),
+) -> None:
+    """
+    Store the summary and issues of a section in the section cache, keyed by the model
+    that actually answered.
+
+    Args:
+        section_data: Analyzed section.
+        llm_model: LLM model.
+        section_cache: Content-addressed section cache.
+        section_mode: Section mode.
+        model_ids: Ids of the models recorded for the section's calls.
+    """
+    model_id = get_answered_section_model_id(llm_model, section_mode, model_ids)
+    set_section_provenance(section_data, llm_model, section_mode, model_id)
+    if section_cache is None:
+        return
+
+    section_cache.put_llm(
+        section_data.content_hash,
+        model_id,
+        get_section_prompt_version(section_mode),
+        section_data.summary,
+        section_data.issues,
+    )
+
+
+def analyze_xml_section(
+    section_data: BillSection,
+    llm_model: BaseAIModel,
+    section_cache: Optional[SectionCache] = None,
+    section_mode: str = DEFAULT_SECTION_MODE,
+) -> None:
+    """
+    Generate the summary and issues of a section, consulting the section cache first.
+
+    Args:
+        section_data: Parsed section.
+        llm_model: LLM model.
+        section_cache: Content-addressed section cache.
+        section_mode: Section mode.
+    """
+    # check the section cache
+    if load_cached_section_analysis(
+        section_data, llm_model, section_cache, section_mode
+    ):
+        return
+
+    if section_mode == "separate":
+
+        def summarize() -> str:
+            with llm_call_context(prompt_name="summarize_bill_section"):
+                return summarize_bill_section(section_data, llm_model)
+
+        def audit() -> list[str]:
+            with llm_call_context(prompt_name="audit_bill_section"):
+                return audit_bill_section(section_data, llm_model)
+
+        # set both fields together so a failed audit never leaves a half-analyzed
+        # section, and record both prompts before raising in batch mode
+        with record_llm_model_ids(set()) as model_ids:
+            section_data.summary, section_data.issues = call_all((summarize, audit))
+    else:
+        with llm_call_context(prompt_name="analyze_bill_section"):
+            with record_llm_model_ids(set()) as model_ids:
+                section_data.summary, section_data.issues = analyze_bill_section(
+                    section_data, llm_model
+                )
+
+    store_section_analysis(
+        section_data, llm_model, section_cache, section_mode, model_ids
+    )
+
+
+def analyze_xml_section_pack(
+    section_pack: list[BillSection],
+    llm_model: BaseAIModel,
+    section_cache: Optional[SectionCache] = None,
+) -> None:
+    """
+    Generate the summary and issues of a pack of short sections with a single call.
+
+    Sections missing from the packed response fall back to a combined call each.
+
+    Args:
+        section_pack: Parsed sections.
+        llm_model: LLM model.
+        section_cache: Content-addressed section cache.
+    """
+    if len(section_pack) == 1:
+        analyze_xml_section(section_pack[0], llm_model, section_cache, "packed")
+        return
+
+    with llm_call_context(prompt_name="analyze_bill_sections"):
+        with record_llm_model_ids(set()) as model_ids:
+            section_results = analyze_bill_sections(section_pack, llm_model)
+    missing_sections = []
+    for index, section_data in enumerate(section_pack):
+        section_result = section_results.get(
+            get_section_pack_id(section_data, index), None
+        )
+        if section_result is None:
+            missing_sections.append(section_data)
+            continue
+
+        section_data.summary, section_data.issues = section_result
+        store_section_analysis(
+            section_data, llm_model, section_cache, "packed", model_ids
+        )
+
+    call_all(
+        functools.partial(
+            analyze_xml_section, section_data, llm_model, section_cache, "packed"
+        )
+        for section_data in missing_sections
+    )
+
+
+def pack_sections(
+    sections: list[BillSection],
+    token_budget: int = DEFAULT_PACK_TOKEN_BUDGET,
+    max_sections: int = DEFAULT_PACK_MAX_SECTIONS,
+) -> Iterator[list[BillSection]]:
+    """
+    Pack consecutive sections into groups that fit within a prompt token budget.
+
+    Sections that exceed the budget on their own are returned in a pack of one.
+
+    Args:
+        sections: Sections to pack.
+        token_budget: Maximum estimated section tokens per pack.
+        max_sections: Maximum number of sections per pack.
+
+    Returns:
+        Iterator of section packs.
+    """
+    section_pack = []
+    pack_tokens = 0
+    for section_data in sections:
+        section_tokens = estimate_prompt_tokens(section_data.markdown)
+        if section_pack and (
+            pack_tokens + section_tokens > token_budget
+            or len(section_pack) >= max_sections
+        ):
+            yield section_pack
+            section_pack = []
+            pack_tokens = 0
+
+        section_pack.append(section_data)
+        pack_tokens += section_tokens
+
+    if section_pack:
+        yield section_pack
+
+
+def get_bill_task(
+    bill: Bill, field_name: str, prompt_function: Callable, *args: Any
+) -> Callable[[], Any]:
+    """
+    Get a bill-level task that tags its LLM calls with the prompt name and records the
+    models that served them.
+
+    The task returns its result with the model ids, and set_bill_task_result records
+    both on the bill together, so a checkpoint never has one without the other.
+
+    Args:
+        bill: Bill.
+        field_name: Bill field set from the task result.
+        prompt_function: Prompt function.
+        *args: Prompt function arguments.
+
+    Returns:
+        Task function.
+    """
+
+    def run_task() -> tuple[Any, str]:
+        model_ids: set[str] = set()
+        with llm_call_context(prompt_name=prompt_function.__name__):
+            with record_llm_model_ids(model_ids):
+                result = prompt_function(*args)
+        return result, ", ".join(sorted(model_ids)) or bill.llm_model_id
+
+    return run_task
+
+
+def set_bill_task_result(
+    bill: Bill, field_name: str, task_result: tuple[Any, str]
+) -> None:
+    """
+    Set a bill field from a bill-level task result and record the models that served it.
+
+    Args:
+        bill: Bill.
+        field_name: Bill field set from the task result.
+        task_result: Result and model ids returned by the task.
+    """
+    value, model_id = task_result
+    setattr(bill, field_name, value)
+    bill.llm_model_ids[field_name] = model_id
+    bill.provenance[field_name] = {
+        "prompt_version": BILL_PROMPT_VERSIONS[field_name],
+        "model_id": model_id,
+        "code_version": CODE_VERSION,
+    }
+
+
+def get_bill_task_graph(
+    bill: Bill, summary_data: dict, llm_model: BaseAIModel
+) -> TaskGraph:
+    """
+    Get the bill-level LLM tasks as a dependency graph.
+
+    Each task is named for the bill field it sets and lists the fields its prompt reads
+    as inputs, so independent tasks can run concurrently:
+     - summary and issues only read the bill text and sections
+     - commentary, money_commentary, entities, and keywords read the summary and/or issues
+     - eli5 reads the summary, issues, and money commentary
+
+    The prompt budget is counted once and shared by the prompts that choose between
+    full-text and section-based prompts, so they all start with the same bill context.
+
+    Args:
+        bill: Bill with parsed and analyzed sections.
+        summary_data: Summary data.
+        llm_model: LLM model.
+
+    Returns:
+        Task graph.
+    """
+    budget = get_prompt_budget(bill, llm_model)
+
+    graph = TaskGraph()
+    graph.add(
+        "summary",
+        get_bill_task(
+            bill, "summary", summarize_bill, bill, summary_data, llm_model, budget
+        ),
+    )
+    graph.add(
+        "issues",
+        get_bill_task(bill, "issues", audit_bill, bill, llm_model, budget),
+    )
+    graph.add(
+        "commentary",
+        get_bill_task(
+            bill, "commentary", generate_bill_commentary, bill, llm_model, budget
+        ),
+        inputs=("issues",),
+    )
+
+    # get money commentary only if there are money sentences
+    eli5_inputs = ["summary", "issues"]
+    if len(bill.money_sentences) > 0:
+        graph.add(
+            "money_commentary",
+            get_bill_task(
+                bill,
+                "money_commentary",
+                generate_money_commentary,
+                bill,
+                llm_model,
+                budget,
+            ),
+            inputs=("summary", "issues"),
+        )
+        eli5_inputs.append("money_commentary")
+
+    graph.add(
+        "eli5",
+        get_bill_task(bill, "eli5", generate_bill_eli5, bill, llm_model),
+        inputs=eli5_inputs,
+    )
+    graph.add(
+        "entities",
+        get_bill_task(bill, "entities", filter_named_entities, bill, llm_model),
+        inputs=("summary", "issues"),
+    )
+    graph.add(
+        "keywords",
+        get_bill_task(bill, "keywords", extract_bill_keywords, bill, llm_model, budget),
+        inputs=("summary", "issues"),
+    )
+
+    return graph
+
+
+def parse_xml_bill_data(
+    xml_doc: lxml.etree.Element,
+    summary_data: dict,
+    prior_bills: Optional[Iterable[Bill]] = None,
+    section_cache: Optional[SectionCache] = None,
 ) -> Bill:
     """
-    Parse a bill XML document.
+    Parse a bill XML document without any LLM calls (phase one).
+
+    The bill and its sections have all text representations and statistics, and
+    sections unchanged from prior versions keep their analysis; every other LLM field
+    is left empty and the bill is marked as pending until analyze_bill runs.
 
     Args:
         xml_doc: Bill XML document.
         summary_data: Summary data.
-        llm_model: LLM model.
+        prior_bills: Previously analyzed versions of the same bill, oldest first.
+        section_cache: Content-addressed section cache.
 
     Returns:
-        Parsed bill.
+        Parsed bill with llm_status "pending".
     """
     # parse the simple summary data fields
     title = summary_data.get("title", "")
@@ -329,17 +1017,18 @@ def parse_xml_bill(
     # get spacy data
     spacy_data = get_spacy_data(bill_text)
 
-    # parse sections
-    sections = []
-    for section_element in xml_doc.xpath(".//section"):
-        section_data = parse_xml_section(section_element)
-        section_data.summary = summarize_bill_section(section_data, llm_model)
-        section_data.issues = audit_bill_section(section_data, llm_model)
-        sections.append(section_data)
-        time.sleep(SECTION_DELAY)
-
-    # get initial bill object
-    bill = Bill(
+    # index unchanged sections from other versions of the bill
+    prior_sections = get_prior_sections(prior_bills)
+
+    # parse sections, analyzing nested sections only as part of their enclosing section
+    sections = [
+        parse_xml_section(
+            section_element, nested_elements, prior_sections, section_cache
+        )
+        for section_element, nested_elements in get_section_tree(xml_doc)
+    ]
+
+    return Bill(
         # main fields
         title=title,
         short_titles=short_titles,
@@ -360,28 +1049,370 @@ def parse_xml_bill(
         # structured data and document stats
         num_sections=len(sections),
         sections=sections,
-        llm_model_id=llm_model.model,
+        llm_status="pending",
+        provenance={
+            "stats": {"nlp_profile": DEFAULT_NLP_PROFILE, "code_version": CODE_VERSION}
+        },
+        spacy_entities=list(spacy_data["entities"]),
         **spacy_data,
     )
 
-    # get summary
-    bill.summary = summarize_bill(bill, summary_data, llm_model)
-    bill.issues = audit_bill(bill, llm_model)
-    bill.commentary = generate_bill_commentary(bill, llm_model)
 
-    # get money commentary if there are money sentences
-    if len(bill.money_sentences) > 0:
-        bill.money_commentary = generate_money_commentary(bill, llm_model)
-    else:
-        bill.money_commentary = None
+def analyze_bill(
+    bill: Bill,
+    summary_data: dict,
+    llm_model: BaseAIModel,
+    section_cache: Optional[SectionCache] = None,
+    scheduler: Optional[LLMScheduler] = None,
+    section_mode: str = DEFAULT_SECTION_MODE,
+    on_checkpoint: Optional[Callable[[Bill], None]] = None,
+) -> Bill:
+    """
+    Fill in the LLM fields of a parsed bill (phase two).
 
-    # get the eli5
-    bill.eli5 = generate_bill_eli5(bill, llm_model)
+    Section LLM calls are submitted to the shared scheduler and run concurrently within
+    the provider rate limits.  Bill-level LLM calls then run as a dependency graph, with
+    independent prompts running concurrently.
 
-    # filter named entities
-    bill.entities = filter_named_entities(bill, llm_model)
+    Analysis resumes from the first missing piece of a partially analyzed bill: sections
+    with a summary are skipped, and bill-level tasks already recorded in llm_model_ids
+    are not run again.  The checkpoint callback is called once the sections finish, even
+    if some of them failed, and after each bill-level field is set, so a failure never
+    discards completed work.
 
-    # tag it
-    bill.keywords = extract_bill_keywords(bill, llm_model)
+    Args:
+        bill: Bill parsed by parse_xml_bill_data.
+        summary_data: Summary data.
+        llm_model: LLM model.
+        section_cache: Content-addressed section cache.
+        scheduler: Shared LLM scheduler.
+        section_mode: Section mode, one of SECTION_MODES.
+        on_checkpoint: Callback to persist the partially analyzed bill.
+
+    Returns:
+        The bill, with llm_status "complete".
+    """
+    # tag all LLM calls submitted for this bill with its size
+    scheduler = scheduler or DEFAULT_SCHEDULER
+    submit = with_llm_call_tags(scheduler.submit, bill_tokens=bill.num_tokens)
+
+    # analyze the sections without prior analysis, recording the models that do it
+    section_model_ids = set()
+    section_futures = []
+    packed_sections = []
+    with record_llm_model_ids(section_model_ids):
+        for section_index, section_data in enumerate(bill.sections):
+            if section_data.summary is not None:
+                continue
+
+            if section_mode == "packed":
+                # defer uncached sections until they can be packed together
+                if not load_cached_section_analysis(
+                    section_data, llm_model, section_cache, section_mode
+                ):
+                    packed_sections.append(section_data)
+            else:
+                section_futures.append(
+                    submit(
+                        with_llm_call_tags(
+                            analyze_xml_section, section_index=section_index
+                        ),
+                        section_data,
+                        llm_model,
+                        section_cache,
+                        section_mode,
+                    )
+                )
+
+        # submit the packed sections, tagged with the index of their first section
+        section_indices = {
+            id(section_data): index for index, section_data in enumerate(bill.sections)
+        }
+        for section_pack in pack_sections(packed_sections):
+            section_futures.append(
+                submit(
+                    with_llm_call_tags(
+                        analyze_xml_section_pack,
+                        section_index=section_indices[id(section_pack[0])],
+                    ),
+                    section_pack,
+                    llm_model,
+                    section_cache,
+                )
+            )
+
+    # wait for all of the section analysis to finish before raising any error
+    section_errors = []
+    for section_future in section_futures:
+        try:
+            section_future.result()
+        except Exception as e:
+            section_errors.append(e)
+
+    bill.llm_model_id = llm_model.model
+    if section_model_ids or "sections" not in bill.llm_model_ids:
+        bill.llm_model_ids["sections"] = (
+            ", ".join(sorted(section_model_ids)) or llm_model.model
+        )
+
+    # checkpoint the completed sections
+    if on_checkpoint is not None:
+        on_checkpoint(bill)
+    if section_errors:
+        raise section_errors[0]
+
+    def set_bill_field(field_name: str, task_result: tuple[Any, str]) -> None:
+        set_bill_task_result(bill, field_name, task_result)
+        if on_checkpoint is not None:
+            on_checkpoint(bill)
+
+    # run the bill-level tasks that have not finished yet, checkpointing each field;
+    # tasks that do not depend on a failed task still run, so a batch round records
+    # every ready prompt
+    graph = get_bill_task_graph(bill, summary_data, llm_model)
+    graph.run(
+        submit,
+        on_result=set_bill_field,
+        done=[field_name for field_name in bill.llm_model_ids if field_name in graph],
+        keep_going=True,
+    )
 
+    bill.llm_status = "complete"
     return bill
+
+
+def parse_xml_bill(
+    xml_doc: lxml.etree.Element,
+    summary_data: dict,
+    llm_model: BaseAIModel,
+    prior_bills: Optional[Iterable[Bill]] = None,
+    section_cache: Optional[SectionCache] = None,
+    scheduler: Optional[LLMScheduler] = None,
+    section_mode: str = DEFAULT_SECTION_MODE,
+    on_checkpoint: Optional[Callable[[Bill], None]] = None,
+) -> Bill:
+    """
+    Parse a bill XML document and fill in all of its LLM fields.
+
+    Args:
+        xml_doc: Bill XML document.
+        summary_data: Summary data.
+        llm_model: LLM model.
+        prior_bills: Previously analyzed versions of the same bill, oldest first.
+        section_cache: Content-addressed section cache.
+        scheduler: Shared LLM scheduler.
+        section_mode: Section mode, one of SECTION_MODES.
+        on_checkpoint: Callback to persist the partially analyzed bill.
+
+    Returns:
+        Parsed bill.
+    """
+    bill = parse_xml_bill_data(xml_doc, summary_data, prior_bills, section_cache)
+    if on_checkpoint is not None:
+        on_checkpoint(bill)
+    return analyze_bill(
+        bill,
+        summary_data,
+        llm_model,
+        section_cache,
+        scheduler,
+        section_mode,
+        on_checkpoint,
+    )
+
+
+def is_section_analysis_stale(section_data: BillSection) -> bool:
+    """
+    Check whether the summary and issues of a section came from an outdated prompt.
+
+    Args:
+        section_data: Section.
+
+    Returns:
+        True if the section was analyzed with a prompt version that no longer exists.
+    """
+    return section_data.summary is not None and section_data.provenance.get(
+        "prompt_version"
+    ) not in (SECTION_PROMPT_VERSION, COMBINED_SECTION_PROMPT_VERSION)
+
+
+def get_stale_fields(
+    bill: Bill, graph: TaskGraph, fields: Iterable[str] = ()
+) -> set[str]:
+    """
+    Get the derived fields of a bill that are out of date with the current code.
+
+    "stats" is stale when the bill or any section was parsed with a different NLP
+    profile, "sections" when any section was analyzed with an outdated section prompt,
+    and a bill-level field when its prompt version changed.  Every field that reads a
+    stale field is stale as well, e.g., editing the summary prompt also recomputes the
+    commentary, ELI5, entities, and keywords.
+
+    Args:
+        bill: Bill.
+        graph: Bill-level task graph from get_bill_task_graph.
+        fields: Fields to recompute regardless of their provenance.
+
+    Returns:
+        Stale field names, including "stats" and "sections".
+    """
+    stale_fields = set(fields)
+
+    if bill.provenance.get("stats", {}).get(
+        "nlp_profile"
+    ) != DEFAULT_NLP_PROFILE or any(
+        section_data.provenance.get("nlp_profile") != DEFAULT_NLP_PROFILE
+        for section_data in bill.sections
+    ):
+        stale_fields.add("stats")
+
+    if any(is_section_analysis_stale(section_data) for section_data in bill.sections):
+        stale_fields.add("sections")
+
+    for field_name, prompt_version in BILL_PROMPT_VERSIONS.items():
+        if field_name not in graph:
+            continue
+        if bill.provenance.get(field_name, {}).get("prompt_version") != prompt_version:
+            stale_fields.add(field_name)
+
+    # entities and money sentences come from the stats, and sections feed the bill prompts
+    if "stats" in stale_fields:
+        stale_fields.update(("entities", "money_commentary"))
+    if "sections" in stale_fields:
+        stale_fields.update(("summary", "issues"))
+
+    return stale_fields | graph.get_dependents(
+        field_name for field_name in stale_fields if field_name in graph
+    )
+
+
+def stamp_provenance(bill: Bill, section_mode: str = DEFAULT_SECTION_MODE) -> None:
+    """
+    Record the current versions as the provenance of fields that have none, e.g., for
+    bills cached before provenance was recorded, without recomputing them.
+
+    Args:
+        bill: Bill.
+        section_mode: Section mode the sections were analyzed in.
+    """
+    bill.provenance.setdefault(
+        "stats", {"nlp_profile": DEFAULT_NLP_PROFILE, "code_version": CODE_VERSION}
+    )
+    for section_data in bill.sections:
+        section_data.provenance.setdefault("nlp_profile", DEFAULT_NLP_PROFILE)
+        if section_data.summary is not None:
+            section_data.provenance.setdefault(
+                "prompt_version", get_section_prompt_version(section_mode)
+            )
+            section_data.provenance.setdefault(
+                "model_id", bill.llm_model_ids.get("sections", bill.llm_model_id)
+            )
+
+    for field_name, model_id in bill.llm_model_ids.items():
+        if field_name in BILL_PROMPT_VERSIONS:
+            bill.provenance.setdefault(
+                field_name,
+                {
+                    "prompt_version": BILL_PROMPT_VERSIONS[field_name],
+                    "model_id": model_id,
+                    "code_version": CODE_VERSION,
+                },
+            )
+
+
+def recompute_bill_stats(
+    bill: Bill, section_cache: Optional[SectionCache] = None
+) -> None:
+    """
+    Recompute the NLP stats of a bill and its sections with the current NLP profile.
+
+    Args:
+        bill: Bill.
+        section_cache: Content-addressed section cache.
+    """
+    for field_name, value in get_spacy_data(bill.text).items():
+        setattr(bill, field_name, value)
+    bill.spacy_entities = list(bill.entities)
+    bill.provenance["stats"] = {
+        "nlp_profile": DEFAULT_NLP_PROFILE,
+        "code_version": CODE_VERSION,
+    }
+
+    for section_data in bill.sections:
+        if section_data.provenance.get("nlp_profile") == DEFAULT_NLP_PROFILE:
+            continue
+        content_hash = section_data.content_hash or get_content_hash(
+            section_data.markdown
+        )
+        for field_name, value in get_section_spacy_data(
+            section_data.text, content_hash, section_cache
+        ).items():
+            setattr(section_data, field_name, value)
+        section_data.provenance["nlp_profile"] = DEFAULT_NLP_PROFILE
+
+
+def recompute_bill(
+    bill: Bill,
+    summary_data: dict,
+    llm_model: BaseAIModel,
+    stale_fields: Iterable[str],
+    section_cache: Optional[SectionCache] = None,
+    scheduler: Optional[LLMScheduler] = None,
+    section_mode: str = DEFAULT_SECTION_MODE,
+    on_checkpoint: Optional[Callable[[Bill], None]] = None,
+) -> Bill:
+    """
+    Regenerate only the stale fields of a bill, keeping everything else.
+
+    Args:
+        bill: Bill.
+        summary_data: Summary data.
+        llm_model: LLM model.
+        stale_fields: Stale fields from get_stale_fields.
+        section_cache: Content-addressed section cache.
+        scheduler: Shared LLM scheduler.
+        section_mode: Section mode, one of SECTION_MODES.
+        on_checkpoint: Callback to persist the partially recomputed bill.
+
+    Returns:
+        The bill, with llm_status "complete".
+    """
+    stale_fields = set(stale_fields)
+
+    if "stats" in stale_fields:
+        recompute_bill_stats(bill, section_cache)
+        if not bill.money_sentences:
+            bill.money_commentary = None
+
+    # clear the stale sections so analyze_bill picks them up again
+    if "sections" in stale_fields:
+        for section_data in bill.sections:
+            if is_section_analysis_stale(section_data):
+                section_data.summary = None
+                section_data.issues = []
+
+    # entities are filtered from the raw spacy entities, never from an earlier filter;
+    # bills stored before the raw entities were kept get them from the text again
+    if "entities" in stale_fields:
+        if not bill.spacy_entities:
+            bill.spacy_entities = get_spacy_data(bill.text)["entities"]
+        bill.entities = list(bill.spacy_entities)
+
+    # clear the stale bill-level fields so analyze_bill runs their tasks again
+    for field_name in stale_fields & BILL_PROMPT_VERSIONS.keys():
+        bill.llm_model_ids.pop(field_name, None)
+        bill.provenance.pop(field_name, None)
+
+    bill.llm_status = "pending"
+    if on_checkpoint is not None:
+        on_checkpoint(bill)
+
+    return analyze_bill(
+        bill,
+        summary_data,
+        llm_model,
+        section_cache,
+        scheduler,
+        section_mode,
+        on_checkpoint,
+    )
@@ -3,19 +3,296 @@ LLM prompts/execution for generating summaries, audits, and commentaries on bill
 """
 
 # imports
+import functools
+import json
+from typing import Iterable, Optional
 
 # packages
 from alea_llm_client import BaseAIModel
 from alea_llm_client.llms.prompts.sections import format_prompt, format_instructions
 
 # project
+from fbs.llm.batch import call_all
+from fbs.llm.budget import PromptBudget, get_context_window
+from fbs.llm.context import llm_call_context
+from fbs.llm.routing import get_routed_model_ids
+from fbs.logger import LOGGER
 from fbs.sources.govinfo.govinfo_types import Bill, BillSection
+from fbs.utils.entities import (
+    DEFAULT_ENTITY_BATCH_SIZE,
+    classify_entities,
+    normalize_entity,
+)
 
-# token limit for prompt type switch
-DEFAULT_PROMPT_LIMIT = 128000
+
+def get_section_entries(bill: Bill, fields: Iterable[str]) -> list[dict]:
+    """
+    Flatten the sections of a bill into prompt entries.
+
+    Args:
+        bill: Bill.
+        fields: Section fields to include after the enum and header.
+
+    Returns:
+        Section entries.
+    """
+    return [
+        {
+            "enum": section.enum,
+            "header": section.header,
+            **{field_name: getattr(section, field_name) for field_name in fields},
+        }
+        for section in bill.sections
+    ]
 
 
-def summarize_bill(bill: Bill, summary_data: dict, llm_model: BaseAIModel) -> str:
+def get_prompt_budget(
+    bill: Bill, llm_model: BaseAIModel, prompt_name: Optional[str] = None
+) -> PromptBudget:
+    """
+    Count the bill text and section summary tokens once for the configured model, or
+    for the models a routed prompt may be sent to, within the smallest of their
+    context windows.
+
+    Args:
+        bill: Bill.
+        llm_model: LLM model.
+        prompt_name: Prompt name, for routed models.
+
+    Returns:
+        Prompt budget.
+    """
+    model_ids = get_routed_model_ids(llm_model, prompt_name)
+    budget = PromptBudget(
+        model_id=model_ids[0],
+        text_tokens=0,
+        section_tokens=0,
+        context_window=min(get_context_window(model_id) for model_id in model_ids),
+    )
+    budget.text_tokens = budget.count(bill.markdown)
+    budget.section_tokens = budget.count(
+        json.dumps(get_section_entries(bill, ("summary", "issues")), default=str)
+    )
+    return budget
+
+
+def summarize_section_group(sections: list[dict], llm_model: BaseAIModel) -> dict:
+    """
+    Summarize a group of consecutive section summaries into a single entry.
+
+    A group of one entry is returned unchanged.
+
+    Args:
+        sections: Section entries with summaries and issues.
+        llm_model: LLM model.
+
+    Returns:
+        Section entry covering the group.
+    """
+    if len(sections) == 1:
+        return sections[0]
+
+    # set up basic prompt
+    instructions = [
+        "You are an expert attorney summarizing part of a bill from the United States Congress.",
+        "Carefully read the summaries and issues of each section above in SECTIONS.",
+        "Provide a combined summary of these sections that is:\n"
+        "  - Three to six sentences long\n"
+        "  - Written in plain language that a high school student could understand\n"
+        "  - Written in the third person with a neutral style\n"
+        "  - Explicit about which sections it refers to\n",
+        "Combine the issues of these sections into a list of the most significant issues, citing the relevant sections.",
+        "Respond in JSON using the SCHEMA below.",
+    ]
+
+    prompt = format_prompt(
+        {
+            "sections": sections,
+            "instructions": format_instructions(instructions),
+            "schema": """{"summary": str, "issues": list[str]}""",
+        }
+    )
+
+    # generate the group summary
+    response = llm_model.json(prompt)
+    first_enum = sections[0].get("enum") or ""
+    last_enum = sections[-1].get("enum") or ""
+    return {
+        "enum": f"{first_enum} - {last_enum}".strip(" -"),
+        "header": None,
+        "summary": response.data.get("summary", ""),
+        "issues": response.data.get("issues", []),
+    }
+
+
+def reduce_section_entries(
+    sections: list[dict], llm_model: BaseAIModel, budget: PromptBudget
+) -> list[dict]:
+    """
+    Hierarchically map-reduce section entries until they fit the prompt budget.
+
+    Each round packs consecutive entries into groups of at most half the budget and
+    replaces each group with a single combined summary.
+
+    Args:
+        sections: Section entries with summaries and issues.
+        llm_model: LLM model.
+        budget: Prompt budget.
+
+    Returns:
+        Section entries that fit the prompt budget.
+    """
+    group_limit = budget.limit // 2
+    while len(sections) > 1 and budget.count(json.dumps(sections)) > budget.limit:
+        # pack consecutive entries into groups of at least two
+        groups = [[]]
+        group_tokens = 0
+        for section in sections:
+            section_tokens = budget.count(json.dumps(section))
+            if len(groups[-1]) >= 2 and group_tokens + section_tokens > group_limit:
+                groups.append([])
+                group_tokens = 0
+            groups[-1].append(section)
+            group_tokens += section_tokens
+
+        # summarize every group before raising, so a batch round records them all
+        with llm_call_context(prompt_name="summarize_section_group"):
+            sections = call_all(
+                functools.partial(summarize_section_group, group, llm_model)
+                for group in groups
+            )
+
+    return sections
+
+
+def get_bill_sections(
+    bill: Bill,
+    llm_model: BaseAIModel,
+    budget: PromptBudget,
+    fields: Iterable[str],
+) -> list[dict]:
+    """
+    Get the section entries for a section-based bill prompt, map-reducing the section
+    summaries once per bill if even they do not fit the context window.
+
+    Args:
+        bill: Bill.
+        llm_model: LLM model.
+        budget: Prompt budget.
+        fields: Section fields to include.
+
+    Returns:
+        Section entries.
+    """
+    if budget.mode == "reduce":
+        return budget.get_reduced(
+            lambda: reduce_section_entries(
+                get_section_entries(bill, ("summary", "issues")), llm_model, budget
+            )
+        )
+    return get_section_entries(bill, fields)
+
+
+def fit_section_entries(
+    sections: list[dict], budget: PromptBudget, token_limit: int
+) -> list[dict]:
+    """
+    Keep the leading section entries that fit within a token limit.
+
+    Args:
+        sections: Section entries.
+        budget: Prompt budget.
+        token_limit: Tokens available for the entries.
+
+    Returns:
+        Section entries that fit the token limit.
+    """
+    fitted_sections = []
+    used_tokens = 0
+    for section in sections:
+        section_tokens = budget.count(json.dumps(section, default=str))
+        if used_tokens + section_tokens > token_limit:
+            break
+        fitted_sections.append(section)
+        used_tokens += section_tokens
+
+    if len(fitted_sections) < len(sections):
+        LOGGER.warning(
+            "Dropped %d of %d section entries over the %d token limit: %s",
+            len(sections) - len(fitted_sections),
+            len(sections),
+            token_limit,
+            [section["enum"] for section in sections[len(fitted_sections) :]],
+        )
+    return fitted_sections
+
+
+def get_bill_metadata(bill: Bill) -> dict:
+    """
+    Get the bill metadata block shared by all bill-level prompts.
+
+    Args:
+        bill: Bill.
+
+    Returns:
+        Bill metadata.
+    """
+    return {
+        "title": bill.title,
+        "short_titles": bill.short_titles,
+        "date": bill.date,
+        "congress": bill.congress,
+        "session": bill.session,
+        "num_pages": bill.num_pages,
+        "legislation_number": bill.legis_num,
+        "current_chamber": bill.current_chamber,
+        "is_appropriation": bill.is_appropriation,
+        "bill_version": bill.bill_version,
+        "bill_type": bill.bill_type,
+    }
+
+
+def get_bill_context(
+    bill: Bill,
+    llm_model: BaseAIModel,
+    budget: PromptBudget,
+    mode: Optional[str] = None,
+) -> dict:
+    """
+    Get the bill context that starts every large bill-level prompt.
+
+    The context is built the same way for every prompt of a bill, so the formatted
+    prompts share a byte-identical prefix that providers can serve from their prompt
+    cache; task-specific sections must always come after it.
+
+    Args:
+        bill: Bill.
+        llm_model: LLM model.
+        budget: Prompt budget for the bill.
+        mode: Prompt mode, defaults to the budget's mode.
+
+    Returns:
+        Prompt sections with the bill metadata and either the text or the sections.
+    """
+    if (mode or budget.mode) != "text":
+        return {
+            "metadata": get_bill_metadata(bill),
+            "sections": get_bill_sections(
+                bill, llm_model, budget, ("summary", "issues")
+            ),
+        }
+    return {
+        "metadata": get_bill_metadata(bill),
+        "text": bill.markdown,
+    }
+
+
+def summarize_bill(
+    bill: Bill,
+    summary_data: dict,
+    llm_model: BaseAIModel,
+    budget: Optional[PromptBudget] = None,
+) -> str:
     """
     Summarize a bill with an LLM.
 
@@ -23,19 +300,21 @@ def summarize_bill(bill: Bill, summary_data: dict, llm_model: BaseAIModel) -> st
         bill: Bill.
         summary_data: Summary data.
         llm_model: LLM model.
+        budget: Prompt budget for the bill.
 
     Returns:
         Bill summary.
     """
-    # check for the number of tokens
-    approx_token_count = len(bill.markdown.split()) * 1.5
-    if approx_token_count > DEFAULT_PROMPT_LIMIT:
+    # choose the cheapest prompt that fits the context window
+    budget = budget or get_prompt_budget(bill, llm_model)
+    if budget.mode != "text":
         # summarize from the list of section summaries
         instructions = [
             "You are an expert attorney summarizing a bill from the United States Congress.",
-            "Carefully review the EXAMPLE above.",
             "Carefully review the bill metadata above in METADATA.",
             "Carefully read the summaries of each section above in SECTIONS.",
+            "Carefully review the committees and members above in SPONSORS.",
+            "Carefully review the EXAMPLE above.",
             "Provide a summary of the bill that is:\n"
             "  - Two to four sentences long\n"
             "  - Written in plain language that a high school student could understand\n"
@@ -43,43 +322,15 @@ def summarize_bill(bill: Bill, summary_data: dict, llm_model: BaseAIModel) -> st
             "  - Richly formatted with Markdown\n",
             "Do not include any heading or footer. Only return the summary text.",
         ]
-
-        prompt = format_prompt(
-            {
-                "example": "**S. 1234**, the Widget Act, is a 37 page bill that would regulate the manufacturing of widgets in the United States.",
-                "metadata": {
-                    "title": bill.title,
-                    "short_titles": bill.short_titles,
-                    "date": bill.date,
-                    "congress": bill.congress,
-                    "session": bill.session,
-                    "num_pages": bill.num_pages,
-                    "legislation_number": bill.legis_num,
-                    "current_chamber": bill.current_chamber,
-                    "is_appropriation": bill.is_appropriation,
-                    "bill_version": bill.bill_version,
-                    "bill_type": bill.bill_type,
-                    "committees": summary_data.get("committees", []),
-                    "members": summary_data.get("members", []),
-                },
-                "sections": [
-                    {
-                        "enum": section.enum,
-                        "header": section.header,
-                        "summary": section.summary,
-                    }
-                    for section in bill.sections
-                ],
-                "instructions": format_instructions(instructions),
-            }
-        )
+        example = "**S. 1234**, the Widget Act, is a 37 page bill that would regulate the manufacturing of widgets in the United States."
     else:
         # summarize from the entire text directly
         instructions = [
             "You are an expert attorney summarizing a bill from the United States Congress.",
-            "Carefully review the EXAMPLE above.",
             "Carefully review the bill metadata above in METADATA.",
             "Carefully read the bill text above in TEXT.",
+            "Carefully review the committees and members above in SPONSORS.",
+            "Carefully review the EXAMPLE above.",
             "Provide a summary of the bill that is:\n"
             "  - Two to four sentences long\n"
             "  - Written in plain language that a high school student could understand\n"
@@ -87,26 +338,19 @@ def summarize_bill(bill: Bill, summary_data: dict, llm_model: BaseAIModel) -> st
             "  - Richly formatted with Markdown\n",
             "Do not include any heading or footer. Only return the summary text.",
         ]
+        example = "**S. 1234** provides a framework for the regulating the manufacturing of widgets in the United States."
 
-        prompt = format_prompt(
-            {
-                "example": "**S. 1234** provides a framework for the regulating the manufacturing of widgets in the United States.",
-                "metadata": {
-                    "title": bill.title,
-                    "short_titles": bill.short_titles,
-                    "date": bill.date,
-                    "congress": bill.congress,
-                    "session": bill.session,
-                    "legislation_number": bill.legis_num,
-                    "current_chamber": bill.current_chamber,
-                    "is_appropriation": bill.is_appropriation,
-                    "bill_version": bill.bill_version,
-                    "bill_type": bill.bill_type,
-                },
-                "text": bill.markdown,
-                "instructions": format_instructions(instructions),
-            }
-        )
+    prompt = format_prompt(
+        {
+            **get_bill_context(bill, llm_model, budget),
+            "sponsors": {
+                "committees": summary_data.get("committees", []),
+                "members": summary_data.get("members", []),
+            },
+            "example": example,
+            "instructions": format_instructions(instructions),
+        }
+    )
 
     # generate the summary
     summary = llm_model.chat(prompt)
@@ -189,31 +433,148 @@ def audit_bill_section(bill_section: BillSection, llm_model: BaseAIModel) -> lis
     return issues.data.get("issues", [])
 
 
-def audit_bill(bill: Bill, llm_model: BaseAIModel) -> list[str]:
+def analyze_bill_section(
+    bill_section: BillSection, llm_model: BaseAIModel
+) -> tuple[str, list[str]]:
+    """
+    Summarize and audit a bill section with a single LLM call.
+
+    Args:
+        bill_section: Bill section.
+        llm_model: LLM model.
+
+    Returns:
+        Section summary and issues.
+    """
+    # set up basic prompt
+    instructions = [
+        "You are an expert attorney summarizing and auditing a section of a bill from the United States Congress.",
+        "Carefully review the EXAMPLE above.",
+        "Carefully read the section text above in TEXT.",
+        "Provide a summary of the section that is:\n"
+        "  - One to two sentences long\n"
+        "  - Written in plain language that a high school student could understand\n"
+        "  - Written in the third person with a neutral style\n"
+        "  - Richly formatted with Markdown\n",
+        "Audit the section for any potential issues, such as:\n"
+        "  - Spending that might be wasteful\n"
+        "  - Spending that appears to favor a particular organization or individual\n"
+        "  - Language that is unclear or ambiguous\n"
+        "  - Language that is overly complex or difficult to understand\n"
+        "  - Any other issues that might be of concern\n",
+        "Respond in JSON using the SCHEMA below.",
+    ]
+
+    prompt = format_prompt(
+        {
+            "example": "This section defines the terms related to widgets.",
+            "text": bill_section.markdown,
+            "instructions": format_instructions(instructions),
+            "schema": """{"summary": str, "issues": list[str]}""",
+        }
+    )
+
+    # generate the summary and issues
+    response = llm_model.json(prompt)
+    return response.data.get("summary", ""), response.data.get("issues", [])
+
+
+def get_section_pack_id(bill_section: BillSection, index: int) -> str:
+    """
+    Get the id used to map a section in a packed prompt back to its results.
+
+    Args:
+        bill_section: Bill section.
+        index: Index of the section in the pack.
+
+    Returns:
+        Section id.
+    """
+    return bill_section.toc_id or bill_section.enum or str(index)
+
+
+def analyze_bill_sections(
+    bill_sections: list[BillSection], llm_model: BaseAIModel
+) -> dict[str, tuple[str, list[str]]]:
+    """
+    Summarize and audit several short bill sections with a single LLM call.
+
+    Args:
+        bill_sections: Bill sections.
+        llm_model: LLM model.
+
+    Returns:
+        Section summary and issues by section id (see get_section_pack_id).
+    """
+    # set up basic prompt
+    instructions = [
+        "You are an expert attorney summarizing and auditing sections of a bill from the United States Congress.",
+        "Carefully review the EXAMPLE above.",
+        "Carefully read the text of each section above in SECTIONS.",
+        "For each section, provide a summary of the section that is:\n"
+        "  - One to two sentences long\n"
+        "  - Written in plain language that a high school student could understand\n"
+        "  - Written in the third person with a neutral style\n"
+        "  - Richly formatted with Markdown\n",
+        "For each section, audit the section for any potential issues, such as:\n"
+        "  - Spending that might be wasteful\n"
+        "  - Spending that appears to favor a particular organization or individual\n"
+        "  - Language that is unclear or ambiguous\n"
+        "  - Language that is overly complex or difficult to understand\n"
+        "  - Any other issues that might be of concern\n",
+        "Return one result for every section, using the section id from SECTIONS.",
+        "Respond in JSON using the SCHEMA below.",
+    ]
+
+    prompt = format_prompt(
+        {
+            "example": "This section defines the terms related to widgets.",
+            "sections": [
+                {
+                    "id": get_section_pack_id(bill_section, index),
+                    "text": bill_section.markdown,
+                }
+                for index, bill_section in enumerate(bill_sections)
+            ],
+            "instructions": format_instructions(instructions),
+            "schema": """{"sections": list[{"id": str, "summary": str, "issues": list[str]}]}""",
+        }
+    )
+
+    # generate the summaries and issues
+    response = llm_model.json(prompt)
+    return {
+        str(result.get("id")): (result.get("summary", ""), result.get("issues", []))
+        for result in response.data.get("sections", [])
+        if isinstance(result, dict) and result.get("summary")
+    }
+
+
+# version of the section-level prompts for cached section analysis; bump it when the
+# rendered prompts change, not for docstring, comment, or formatting edits
+SECTION_PROMPT_VERSION = "section-1"
+
+# version of the combined and packed section prompts for cached section analysis
+COMBINED_SECTION_PROMPT_VERSION = "combined-section-1"
+
+
+def audit_bill(
+    bill: Bill, llm_model: BaseAIModel, budget: Optional[PromptBudget] = None
+) -> list[str]:
     """
     Audit a bill with an LLM.
 
     Args:
         bill: Bill.
         llm_model: LLM model.
+        budget: Prompt budget for the bill.
 
     Returns:
         Bill audit.
     """
-    # check for the number of tokens
-    approx_token_count = len(bill.markdown.split()) * 1.5
-    if approx_token_count > DEFAULT_PROMPT_LIMIT:
-        # flatten sections from all sections
-        sections = [
-            {
-                "enum": section.enum,
-                "header": section.header,
-                "summary": section.summary,
-                "issues": section.issues,
-            }
-            for section in bill.sections
-        ]
-
+    # choose the cheapest prompt that fits the context window
+    budget = budget or get_prompt_budget(bill, llm_model)
+    if budget.mode != "text":
         # set up basic prompt
         instructions = [
             "You are an expert auditor reviewing a bill from the United States Congress.",
@@ -229,40 +590,18 @@ def audit_bill(bill: Bill, llm_model: BaseAIModel) -> list[str]:
 
         prompt = format_prompt(
             {
-                "metadata": {
-                    "title": bill.title,
-                    "short_titles": bill.short_titles,
-                    "date": bill.date,
-                    "congress": bill.congress,
-                    "session": bill.session,
-                    "legislation_number": bill.legis_num,
-                    "current_chamber": bill.current_chamber,
-                    "is_appropriation": bill.is_appropriation,
-                    "bill_version": bill.bill_version,
-                    "bill_type": bill.bill_type,
-                },
-                "sections": sections,
+                **get_bill_context(bill, llm_model, budget),
                 "instructions": format_instructions(instructions),
                 "schema": """{"issues": list[str]}""",
             }
         )
     else:
-        # flatten sections from all sections
-        sections = [
-            {
-                "enum": section.enum,
-                "header": section.header,
-                "issues": section.issues,
-            }
-            for section in bill.sections
-        ]
-
         # set up basic prompt
         instructions = [
             "You are an expert auditor reviewing a list of issues with a bill from the United States Congress.",
             "Carefully review the bill metadata above in METADATA.",
-            "Carefully read the issues by section above in SECTIONS.",
             "Carefully read the bill text above in TEXT.",
+            "Carefully read the issues by section above in SECTION_ISSUES.",
             "Synthesize the information into a list of salient issues as follows:\n"
             "  - Include issues that might be significant to the general public for political, legal, ethical, or financial reasons.\n"
             "  - Explicitly cite the sections that relate to each issue.\n",
@@ -273,21 +612,9 @@ def audit_bill(bill: Bill, llm_model: BaseAIModel) -> list[str]:
 
         prompt = format_prompt(
             {
+                **get_bill_context(bill, llm_model, budget),
+                "section_issues": get_section_entries(bill, ("issues",)),
                 "example": "The definition of **widget** in *Section 301* might unfairly favor larger manufacturers.",
-                "metadata": {
-                    "title": bill.title,
-                    "short_titles": bill.short_titles,
-                    "date": bill.date,
-                    "congress": bill.congress,
-                    "session": bill.session,
-                    "legislation_number": bill.legis_num,
-                    "current_chamber": bill.current_chamber,
-                    "is_appropriation": bill.is_appropriation,
-                    "bill_version": bill.bill_version,
-                    "bill_type": bill.bill_type,
-                },
-                "sections": sections,
-                "text": bill.markdown,
                 "instructions": format_instructions(instructions),
                 "schema": """{"issues": list[str]}""",
             }
@@ -298,7 +625,9 @@ def audit_bill(bill: Bill, llm_model: BaseAIModel) -> list[str]:
     return issues.data.get("issues", [])
 
 
-def generate_bill_commentary(bill: Bill, llm_model: BaseAIModel) -> str:
+def generate_bill_commentary(
+    bill: Bill, llm_model: BaseAIModel, budget: Optional[PromptBudget] = None
+) -> str:
     """
     Generate editorial commentary about the bill based on the bill and bill section information, including:
      - A general summary of the bill
@@ -309,24 +638,14 @@ def generate_bill_commentary(bill: Bill, llm_model: BaseAIModel) -> str:
     Args:
         bill: Bill.
         llm_model: LLM model.
+        budget: Prompt budget for the bill.
 
     Returns:
         Bill commentary.
     """
-    # check for the number of tokens
-    approx_token_count = len(bill.markdown.split()) * 1.5
-    if approx_token_count > DEFAULT_PROMPT_LIMIT:
-        # flatten sections from all sections
-        sections = [
-            {
-                "enum": section.enum,
-                "header": section.header,
-                "summary": section.summary,
-                "issues": section.issues,
-            }
-            for section in bill.sections
-        ]
-
+    # choose the cheapest prompt that fits the context window
+    budget = budget or get_prompt_budget(bill, llm_model)
+    if budget.mode != "text":
         # set up basic prompt
         instructions = [
             "You are an expert attorney drafting editorial commentary on a bill from the United States Congress.",
@@ -347,19 +666,7 @@ def generate_bill_commentary(bill: Bill, llm_model: BaseAIModel) -> str:
         # generate the commentary
         prompt = format_prompt(
             {
-                "metadata": {
-                    "title": bill.title,
-                    "short_titles": bill.short_titles,
-                    "date": bill.date,
-                    "congress": bill.congress,
-                    "session": bill.session,
-                    "legislation_number": bill.legis_num,
-                    "current_chamber": bill.current_chamber,
-                    "is_appropriation": bill.is_appropriation,
-                    "bill_version": bill.bill_version,
-                    "bill_type": bill.bill_type,
-                },
-                "sections": sections,
+                **get_bill_context(bill, llm_model, budget),
                 "instructions": format_instructions(instructions),
             }
         )
@@ -369,7 +676,7 @@ def generate_bill_commentary(bill: Bill, llm_model: BaseAIModel) -> str:
             "You are an expert attorney drafting editorial commentary on a bill from the United States Congress.",
             "Carefully review the bill metadata above in METADATA.",
             "Carefully read the bill text above in TEXT.",
-            "Carefully read the issues by section above in SECTIONS.",
+            "Carefully read the summaries and issues by section above in SECTION_SUMMARIES.",
             "Carefully read the list of issues above in ISSUES.",
             "Write for a general audience with a high school education.",
             "Your editorial commentary should address:\n"
@@ -386,28 +693,8 @@ def generate_bill_commentary(bill: Bill, llm_model: BaseAIModel) -> str:
         # generate the commentary
         prompt = format_prompt(
             {
-                "metadata": {
-                    "title": bill.title,
-                    "short_titles": bill.short_titles,
-                    "date": bill.date,
-                    "congress": bill.congress,
-                    "session": bill.session,
-                    "legislation_number": bill.legis_num,
-                    "current_chamber": bill.current_chamber,
-                    "is_appropriation": bill.is_appropriation,
-                    "bill_version": bill.bill_version,
-                    "bill_type": bill.bill_type,
-                },
-                "text": bill.markdown,
-                "sections": [
-                    {
-                        "enum": section.enum,
-                        "header": section.header,
-                        "summary": section.summary,
-                        "issues": section.issues,
-                    }
-                    for section in bill.sections
-                ],
+                **get_bill_context(bill, llm_model, budget),
+                "section_summaries": get_section_entries(bill, ("summary", "issues")),
                 "issues": bill.issues,
                 "instructions": format_instructions(instructions),
             }
@@ -417,7 +704,9 @@ def generate_bill_commentary(bill: Bill, llm_model: BaseAIModel) -> str:
     return commentary.text
 
 
-def generate_money_commentary(bill: Bill, llm_model: BaseAIModel) -> str:
+def generate_money_commentary(
+    bill: Bill, llm_model: BaseAIModel, budget: Optional[PromptBudget] = None
+) -> str:
     """
     Generate editorial commentary about the bill based on the bill and bill section information, including:
      - A general summary of the bill
@@ -428,28 +717,26 @@ def generate_money_commentary(bill: Bill, llm_model: BaseAIModel) -> str:
     Args:
         bill: Bill.
         llm_model: LLM model.
+        budget: Prompt budget for the bill.
 
     Returns:
         Bill commentary.
     """
-    # check for the number of tokens
-    approx_token_count = len(bill.markdown.split()) * 1.5
-    if approx_token_count > DEFAULT_PROMPT_LIMIT:
-        # flatten sections from all sections
-        sections = [
-            {
-                "enum": section.enum,
-                "header": section.header,
-                "money_sentences": section.money_sentences,
-            }
-            for section in bill.sections
-        ]
-
+    # choose the cheapest prompt that fits the context window with the money references
+    budget = budget or get_prompt_budget(bill, llm_model)
+    money_sections = [
+        section
+        for section in get_section_entries(bill, ("money_sentences",))
+        if section["money_sentences"]
+    ]
+    mode = budget.get_mode(budget.count(json.dumps(money_sections, default=str)))
+    if mode != "text":
         # set up basic prompt
         instructions = [
             "You are an expert attorney drafting commentary on how money is being used or referenced in a bill from the United States Congress.",
             "Carefully review the bill metadata above in METADATA.",
-            "Carefully read the financial references of each section above in SECTIONS.",
+            "Carefully review the summaries and issues of each section above in SECTIONS.",
+            "Carefully read the financial references of each section above in MONEY_SECTIONS.",
             "Carefully read the bill summary above in SUMMARY.",
             "Carefully read the list of issues above in ISSUES.",
             "Write for a general audience with a high school education.",
@@ -461,35 +748,13 @@ def generate_money_commentary(bill: Bill, llm_model: BaseAIModel) -> str:
             "Richly format your commentary with Markdown. Bold any financial references or amounts.",
             "Respond only with your commentary as a Markdown-formatted text.",
         ]
-
-        # generate the commentary
-        prompt = format_prompt(
-            {
-                "metadata": {
-                    "title": bill.title,
-                    "short_titles": bill.short_titles,
-                    "date": bill.date,
-                    "congress": bill.congress,
-                    "session": bill.session,
-                    "legislation_number": bill.legis_num,
-                    "current_chamber": bill.current_chamber,
-                    "is_appropriation": bill.is_appropriation,
-                    "bill_version": bill.bill_version,
-                    "bill_type": bill.bill_type,
-                },
-                "sections": sections,
-                "summary": bill.summary,
-                "issues": bill.issues,
-                "instructions": format_instructions(instructions),
-            }
-        )
     else:
         # set up basic prompt
         instructions = [
             "You are an expert attorney drafting commentary on how money is being used or referenced in a bill from the United States Congress.",
             "Carefully review the bill metadata above in METADATA.",
             "Carefully read the bill text above in TEXT.",
-            "Carefully read the money references by section above in SECTIONS.",
+            "Carefully read the money references by section above in MONEY_SECTIONS.",
             "Carefully read the bill summary above in SUMMARY.",
             "Carefully read the list of issues above in ISSUES.",
             "Write for a general audience with a high school education.",
@@ -502,35 +767,27 @@ def generate_money_commentary(bill: Bill, llm_model: BaseAIModel) -> str:
             "Respond only with your commentary as a Markdown-formatted text.",
         ]
 
-        # generate the commentary
-        prompt = format_prompt(
-            {
-                "metadata": {
-                    "title": bill.title,
-                    "short_titles": bill.short_titles,
-                    "date": bill.date,
-                    "congress": bill.congress,
-                    "session": bill.session,
-                    "legislation_number": bill.legis_num,
-                    "current_chamber": bill.current_chamber,
-                    "is_appropriation": bill.is_appropriation,
-                    "bill_version": bill.bill_version,
-                    "bill_type": bill.bill_type,
-                },
-                "text": bill.markdown,
-                "sections": [
-                    {
-                        "enum": section.enum,
-                        "header": section.header,
-                        "money_sentences": section.money_sentences,
-                    }
-                    for section in bill.sections
-                ],
-                "summary": bill.summary,
-                "issues": bill.issues,
-                "instructions": format_instructions(instructions),
-            }
-        )
+    # fit the money references into what the context leaves of the budget
+    bill_context = get_bill_context(bill, llm_model, budget, mode)
+    money_sections = fit_section_entries(
+        money_sections,
+        budget,
+        budget.limit
+        - budget.count(
+            json.dumps([bill_context, bill.summary, bill.issues], default=str)
+        ),
+    )
+
+    # generate the commentary from the sections that reference money
+    prompt = format_prompt(
+        {
+            **bill_context,
+            "money_sections": money_sections,
+            "summary": bill.summary,
+            "issues": bill.issues,
+            "instructions": format_instructions(instructions),
+        }
+    )
 
     commentary = llm_model.chat(prompt)
     return commentary.text
@@ -562,18 +819,7 @@ def generate_bill_eli5(bill: Bill, llm_model: BaseAIModel) -> str:
 
     prompt = format_prompt(
         {
-            "metadata": {
-                "title": bill.title,
-                "short_titles": bill.short_titles,
-                "date": bill.date,
-                "congress": bill.congress,
-                "session": bill.session,
-                "legislation_number": bill.legis_num,
-                "current_chamber": bill.current_chamber,
-                "is_appropriation": bill.is_appropriation,
-                "bill_version": bill.bill_version,
-                "bill_type": bill.bill_type,
-            },
+            "metadata": get_bill_metadata(bill),
             "summary": bill.summary,
             "issues": bill.issues,
             "money_commentary": bill.money_commentary,
@@ -586,22 +832,72 @@ def generate_bill_eli5(bill: Bill, llm_model: BaseAIModel) -> str:
     return eli5.text
 
 
-def filter_named_entities(bill: Bill, llm_model: BaseAIModel) -> list[str]:
+def filter_named_entities(
+    bill: Bill, llm_model: BaseAIModel, batch_size: int = DEFAULT_ENTITY_BATCH_SIZE
+) -> list[str]:
     """
-    Filter named entities from a bill with an LLM.
+    Filter named entities from a bill, deduplicating and matching them against the
+    gazetteer locally and only asking the LLM about the ambiguous remainder, in batches.
+
+    The raw spacy entities are filtered when the bill has them, so filtering again,
+    e.g., after a prompt change, gives the same result instead of filtering the
+    previous output.
+
+    Args:
+        bill: Bill.
+        llm_model: LLM model.
+        batch_size: Number of ambiguous entities per prompt.
+
+    Returns:
+        Named entities, most frequent first.
+    """
+    known_entities, ambiguous_entities = classify_entities(
+        bill.spacy_entities or bill.entities
+    )
+    if len(ambiguous_entities) == 0:
+        return known_entities
+
+    # filter every batch before raising, so a batch round records them all
+    relevant_keys = set().union(
+        *call_all(
+            functools.partial(
+                filter_entity_batch,
+                bill,
+                ambiguous_entities[offset : offset + batch_size],
+                llm_model,
+            )
+            for offset in range(0, len(ambiguous_entities), batch_size)
+        )
+    )
+
+    # confirm we only return ones that originally existed
+    return known_entities + [
+        entity
+        for entity in ambiguous_entities
+        if normalize_entity(entity) in relevant_keys
+    ]
+
+
+def filter_entity_batch(
+    bill: Bill, entities: list[str], llm_model: BaseAIModel
+) -> set[str]:
+    """
+    Ask the LLM which of a batch of ambiguous entities are relevant to a bill.
 
     Args:
         bill: Bill.
+        entities: Ambiguous entities.
         llm_model: LLM model.
 
     Returns:
-        Named entities.
+        Normalized keys of the relevant entities.
     """
     # set up basic prompt
     instructions = [
         "You are an expert attorney reviewing a bill from the United States Congress.",
         "Carefully review the bill metadata above in METADATA.",
-        "Carefully read the bill text above in TEXT.",
+        "Carefully read the bill summary above in SUMMARY.",
+        "Carefully read the list of issues above in ISSUES.",
         "Filter the named entities in ENTITIES above for relevance to the bill. Only include entities that are directly relevant to the bill.",
         "Return the list of relevant named entities as a JSON list of strings.",
         "Respond in JSON using the SCHEMA below.",
@@ -609,86 +905,64 @@ def filter_named_entities(bill: Bill, llm_model: BaseAIModel) -> list[str]:
 
     prompt = format_prompt(
         {
-            "entities": bill.entities,
-            "metadata": {
-                "title": bill.title,
-                "short_titles": bill.short_titles,
-                "date": bill.date,
-                "congress": bill.congress,
-                "session": bill.session,
-                "legislation_number": bill.legis_num,
-                "current_chamber": bill.current_chamber,
-                "is_appropriation": bill.is_appropriation,
-                "bill_version": bill.bill_version,
-                "bill_type": bill.bill_type,
-            },
+            "metadata": get_bill_metadata(bill),
             "summary": bill.summary,
             "issues": bill.issues,
+            "entities": entities,
             "instructions": format_instructions(instructions),
             "schema": """{"entities": list[str]}""",
         }
     )
 
-    # generate the summary
+    # generate the filtered entities
     response = llm_model.json(prompt)
-    entity_list = response.data.get("entities", [])
+    return {
+        normalize_entity(entity)
+        for entity in response.data.get("entities", [])
+        if isinstance(entity, str)
+    }
 
-    # confirm we only return ones that originally existed
-    original_entity_list = [entity.lower().strip() for entity in bill.entities]
-    return [
-        entity
-        for entity in entity_list
-        if entity.lower().strip() in original_entity_list
-    ]
 
-
-def extract_bill_keywords(bill: Bill, llm_model: BaseAIModel) -> list[str]:
+def extract_bill_keywords(
+    bill: Bill, llm_model: BaseAIModel, budget: Optional[PromptBudget] = None
+) -> list[str]:
     """
     Extract keywords from a bill with an LLM.
 
     Args:
         bill: Bill.
         llm_model: LLM model.
+        budget: Prompt budget for the bill.
 
     Returns:
         Keywords.
     """
+    # reuse the shared budget, and its reduced sections, unless a model the prompt
+    # may be routed to has a smaller context window
+    routed_context_window = min(
+        get_context_window(model_id)
+        for model_id in get_routed_model_ids(llm_model, "extract_bill_keywords")
+    )
+    if budget is None or budget.context_window > routed_context_window:
+        budget = get_prompt_budget(bill, llm_model, "extract_bill_keywords")
+
     # set up basic prompt
     instructions = [
         "You are an expert attorney tagging a bill from the United States Congress for search and indexing.",
         "Carefully review the bill metadata above in METADATA.",
-        "Carefully review the SUMMARY, ISSUES, and SECTIONS above.",
+        "Carefully review the SECTIONS, SUMMARY, and ISSUES above.",
         "List up to 10 keywords that would be relevant for search and indexing of this bill.",
         "Rank order the keywords by importance, starting from the most important keywords first."
         "Return the list of keywords as a JSON list of strings.",
         "Respond in JSON using the SCHEMA below.",
     ]
 
+    # keywords only need the section summaries, never the full text
     prompt = format_prompt(
         {
-            "metadata": {
-                "title": bill.title,
-                "short_titles": bill.short_titles,
-                "date": bill.date,
-                "congress": bill.congress,
-                "session": bill.session,
-                "legislation_number": bill.legis_num,
-                "current_chamber": bill.current_chamber,
-                "is_appropriation": bill.is_appropriation,
-                "bill_version": bill.bill_version,
-                "bill_type": bill.bill_type,
-            },
+            **get_bill_context(bill, llm_model, budget, mode="sections"),
             "summary": bill.summary,
             "issues": bill.issues,
-            "sections": [
-                {
-                    "enum": section.enum,
-                    "header": section.header,
-                    "summary": section.summary,
-                    "issues": section.issues,
-                }
-                for section in bill.sections
-            ],
             "instructions": format_instructions(instructions),
             "schema": """{"keywords": list[str]}""",
         }
@@ -700,3 +974,16 @@ def extract_bill_keywords(bill: Bill, llm_model: BaseAIModel) -> list[str]:
 
     # normalize before returning
     return [keyword.lower().strip() for keyword in keywords]
+
+
+# version of each bill-level prompt by the bill field it sets, for field provenance;
+# bump a version when its rendered prompt, including the shared bill context, changes
+BILL_PROMPT_VERSIONS = {
+    "summary": "summary-1",
+    "issues": "issues-1",
+    "commentary": "commentary-1",
+    "money_commentary": "money-commentary-2",
+    "eli5": "eli5-1",
+    "entities": "entities-2",
+    "keywords": "keywords-2",
+}
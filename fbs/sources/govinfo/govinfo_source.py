@@ -9,14 +9,14 @@ GovInfo source classes
 from __future__ import annotations
 
 # imports
-import datetime
 import gzip
 import hashlib
 import json
 import os
+import threading
 import time
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import Iterable, Iterator, List, Dict, Optional, Any
 
 # packages
 import httpx
@@ -24,8 +24,20 @@ import lxml.etree
 from alea_llm_client import BaseAIModel
 
 # project
+from fbs.llm.context import llm_call_context
+from fbs.llm.scheduler import DEFAULT_SCHEDULER
 from fbs.logger import LOGGER
-from fbs.sources.govinfo.govinfo_parser import parse_xml_bill
+from fbs.sources.govinfo.govinfo_cache import SectionCache
+from fbs.sources.govinfo.govinfo_parser import (
+    DEFAULT_SECTION_MODE,
+    analyze_bill,
+    get_bill_task_graph,
+    get_stale_fields,
+    parse_xml_bill_data,
+    recompute_bill,
+)
+from fbs.sources.govinfo.govinfo_codec import bill_from_record
+from fbs.sources.govinfo.govinfo_store import BillStore
 from fbs.sources.govinfo.govinfo_types import (
     CollectionSummary,
     SearchResponse,
@@ -33,12 +45,19 @@ from fbs.sources.govinfo.govinfo_types import (
     SummaryItem,
     Bill,
 )
+from fbs.utils.store import atomic_write_bytes, read_gz_bytes
 
 # set up default sorts parameters
 DEFAULT_SORTS = [
     {"field": "publishdate", "sortOrder": "ASC"},
 ]
 
+# minimum seconds between GovInfo fetches in one process
+DEFAULT_MIN_REQUEST_INTERVAL = 1.0
+
+# seconds over which the GovInfo rate limit resets
+RATE_LIMIT_WINDOW = 3600.0
+
 
 class GovInfoSource:
     """
@@ -62,6 +81,15 @@ class GovInfoSource:
         # set the base url
         self.base_url = "https://api.govinfo.gov"
 
+        # rate limit state from the last response, shared by the threads of a worker
+        self.rate_limit_limit: Optional[int] = None
+        self.rate_limit_remaining: Optional[int] = None
+        self.min_request_interval = kwargs.get(
+            "min_request_interval", DEFAULT_MIN_REQUEST_INTERVAL
+        )
+        self._last_request_time = 0.0
+        self._throttle_lock = threading.Lock()
+
         # get the client
         self.client: httpx.Client = self._init_httpx_client()
 
@@ -69,7 +97,14 @@ class GovInfoSource:
         self.govinfo_cache_path = Path.home() / ".cache" / "fbs" / "govinfo"
         self.govinfo_cache_path.mkdir(parents=True, exist_ok=True)
         self.bill_cache_path = Path.home() / ".cache" / "fbs" / "bills"
-        self.bill_cache_path.mkdir(parents=True, exist_ok=True)
+        self.bill_store = BillStore(self.bill_cache_path)
+        self.section_cache = SectionCache(Path.home() / ".cache" / "fbs" / "sections")
+
+        # set the shared llm scheduler
+        self.scheduler = kwargs.get("scheduler", DEFAULT_SCHEDULER)
+
+        # set the section llm mode
+        self.section_mode = kwargs.get("section_mode", DEFAULT_SECTION_MODE)
 
         # cache collection info at startup
         self.collections = self.get_collections().collections
@@ -101,9 +136,10 @@ class GovInfoSource:
 
     def close(self):
         """
-        Close the httpx clients.
+        Close the httpx clients and the bill store manifest.
         """
         self.client.close()
+        self.bill_store.close()
 
     def __del__(self):
         """
@@ -220,6 +256,35 @@ class GovInfoSource:
 
         return response
 
+    def _get_request_interval(self) -> float:
+        """
+        Get the seconds to wait between fetches, spreading the remaining requests of
+        the rate limit window evenly once they run low.
+
+        Returns:
+            float: Seconds between fetches.
+        """
+        if self.rate_limit_remaining is None:
+            return self.min_request_interval
+        return max(
+            self.min_request_interval,
+            RATE_LIMIT_WINDOW / max(1, self.rate_limit_remaining),
+        )
+
+    def _throttle(self) -> None:
+        """
+        Wait until the next GovInfo fetch is allowed.
+        """
+        with self._throttle_lock:
+            delay = (
+                self._last_request_time
+                + self._get_request_interval()
+                - time.monotonic()
+            )
+            if delay > 0:
+                time.sleep(delay)
+            self._last_request_time = time.monotonic()
+
     def _get(
         self,
         url: str,
@@ -240,23 +305,24 @@ class GovInfoSource:
         # check for cached path
         url_hash = hashlib.blake2b(url.encode()).hexdigest()
         url_cache_path = self.govinfo_cache_path / url_hash
-        if url_cache_path.exists():
-            with gzip.open(url_cache_path, "rb") as input_file:
-                LOGGER.info("Using cached response for %s", url)
-                return input_file.read()
+        cached_content = read_gz_bytes(url_cache_path)
+        if cached_content is not None:
+            LOGGER.info("Using cached response for %s", url)
+            return cached_content
 
         request_headers = dict(self.client.headers.copy())
         if headers:
             request_headers.update(headers)
 
+        # only real fetches are throttled, never cached responses
+        self._throttle()
         content = self._get_response(
             url=url, params=params, headers=request_headers
         ).content
 
         # cache the response
-        with gzip.open(url_cache_path, "wb") as output_file:
-            LOGGER.info("Caching response for %s", url)
-            output_file.write(content)
+        LOGGER.info("Caching response for %s", url)
+        atomic_write_bytes(url_cache_path, gzip.compress(content))
 
         return content
 
@@ -500,22 +566,8 @@ class GovInfoSource:
         # set the results
         results = []
         for result in response.get("results", []):
-            # set the result
-            results.append(
-                SearchResult(
-                    title=result.get("title"),
-                    packageId=result.get("packageId"),
-                    granuleId=result.get("granuleId"),
-                    collectionCode=result.get("collectionCode"),
-                    resultLink=result.get("resultLink"),
-                    relatedLink=result.get("relatedLink"),
-                    lastModified=result.get("lastModified"),
-                    dateIssued=result.get("dateIssued"),
-                    dateIngested=result.get("dateIngested"),
-                    governmentAuthor=result.get("governmentAuthor", []),
-                    download=result.get("download", {}),
-                )
-            )
+            # set the result, keeping undeclared keys in extra
+            results.append(SearchResult.from_dict(result))
 
         # set the search response
         search_response = SearchResponse(
@@ -529,7 +581,8 @@ class GovInfoSource:
 
     def get_result_link(self, url: str) -> bytes:
         """
-        Get the result link.
+        Get the result link, throttled against the GovInfo rate limit unless it is
+        cached.
 
         Args:
             url (str): The URL.
@@ -543,25 +596,97 @@ class GovInfoSource:
         # get the response
         return self._get(url)
 
-    def get_bill(self, bill_result: SearchResult, llm_model: BaseAIModel) -> Bill:
+    def get_bill_cache_path(self, package_id: str) -> Path:
         """
-        Get the bill.
+        Get the bill cache path for a package id.
+
+        Args:
+            package_id (str): The package id.
+
+        Returns:
+            Path: The cache path.
+        """
+        return self.bill_store.get_path(package_id)
+
+    def load_cached_bill(self, package_id: str) -> Optional[Bill]:
+        """
+        Load a bill from the cache.
+
+        Args:
+            package_id (str): The package id.
+
+        Returns:
+            Optional[Bill]: The cached bill, or None if it is not cached or corrupt.
+        """
+        # corrupt bills are quarantined and parsed again
+        bill_data = self.bill_store.read(package_id)
+        if bill_data is None:
+            return None
+
+        return bill_from_record(bill_data)
+
+    def iter_cached_versions(self, package_id: str) -> Iterator[Bill]:
+        """
+        Iterate over the other versions of a bill that are already in the cache.
+
+        Versions are selected from the manifest and loaded one at a time, so callers
+        that only keep part of each version never hold every version in memory.
+
+        Args:
+            package_id (str): The package id.
+
+        Returns:
+            Iterator[Bill]: The cached versions, oldest first.
+        """
+        for entry in self.bill_store.select_versions(package_id):
+            try:
+                version_bill = self.load_cached_bill(entry.package_id)
+            except Exception as e:
+                LOGGER.error("Error loading cached bill %s: %s", entry.package_id, e)
+                continue
+
+            if version_bill is not None:
+                LOGGER.info("Found cached version %s", entry.package_id)
+                yield version_bill
+
+    def save_bill(self, bill: Bill) -> None:
+        """
+        Save a bill to the cache and record it, including whether its LLM fields are
+        still pending, in the manifest.
+
+        Args:
+            bill (Bill): The bill, with its package id set.
+        """
+        # publish atomically under the bill's lock, so concurrent readers and workers
+        # on other machines never see a partially written bill
+        self.bill_store.write(bill.to_dict())
+
+    def get_pending_package_ids(self) -> List[str]:
+        """
+        Get the package ids of cached bills whose LLM fields are still pending.
+
+        Returns:
+            List[str]: Package ids, oldest first.
+        """
+        return [
+            entry.package_id for entry in self.bill_store.select(llm_status="pending")
+        ]
+
+    def get_bill_data(self, bill_result: SearchResult) -> Bill:
+        """
+        Get the bill without LLM analysis (phase one), so it can be published with
+        its statistics while the LLM fields are pending.
 
         Args:
             bill_result (SearchResult): The search result.
-            llm_model (BaseAIModel): The LLM model.
 
         Returns:
-            Bill: The bill.
+            Bill: The cached or newly parsed bill.
         """
         # check if we have the package id in cache
-        package_id_hash = hashlib.blake2b(bill_result.packageId.encode()).hexdigest()
-        package_id_cache_path = self.bill_cache_path / package_id_hash
-        if package_id_cache_path.exists():
-            with gzip.open(package_id_cache_path, "rt", encoding="utf-8") as input_file:
-                bill_data = json.loads(input_file.read())
-                bill_data["date"] = datetime.datetime.fromisoformat(bill_data["date"])
-                return Bill(**bill_data)
+        cached_bill = self.load_cached_bill(bill_result.packageId)
+        if cached_bill is not None:
+            return cached_bill
 
         # get relevant links and retrieve
         result_summary_link = bill_result.resultLink
@@ -569,14 +694,164 @@ class GovInfoSource:
         summary_data = json.loads(self.get_result_link(result_summary_link))
         xml_doc = lxml.etree.fromstring(self.get_result_link(result_xml_link))
 
-        # parse the bill data
-        bill_data = parse_xml_bill(
-            xml_doc=xml_doc, summary_data=summary_data, llm_model=llm_model
+        # parse the bill data, reusing unchanged sections from other cached versions
+        bill_data = parse_xml_bill_data(
+            xml_doc=xml_doc,
+            summary_data=summary_data,
+            prior_bills=self.iter_cached_versions(bill_result.packageId),
+            section_cache=self.section_cache,
         )
         bill_data.package_id = bill_result.packageId
 
-        # cache the bill data
-        with gzip.open(package_id_cache_path, "wt", encoding="utf-8") as output_file:
-            output_file.write(json.dumps(bill_data.to_dict()))
+        # cache the pending bill data
+        self.save_bill(bill_data)
 
         return bill_data
+
+    def analyze_cached_bill(self, package_id: str, llm_model: BaseAIModel) -> Bill:
+        """
+        Fill in the LLM fields of a cached bill (phase two).
+
+        Args:
+            package_id (str): The package id.
+            llm_model (BaseAIModel): The LLM model.
+
+        Returns:
+            Bill: The complete bill.
+
+        Raises:
+            ValueError: If the bill is not cached.
+        """
+        bill_data = self.load_cached_bill(package_id)
+        if bill_data is None:
+            raise ValueError(f"Bill {package_id} is not cached")
+        if bill_data.llm_status != "pending":
+            return bill_data
+        if bill_data.llm_model_ids:
+            LOGGER.info(
+                "Resuming analysis of bill %s after %s",
+                package_id,
+                ", ".join(bill_data.llm_model_ids),
+            )
+
+        # the summary response is cached from phase one
+        summary_data = self.get_summary_data(package_id)
+
+        # tag llm calls with the package id for fair scheduling across bills
+        with llm_call_context(package_id=package_id):
+            analyze_bill(
+                bill=bill_data,
+                summary_data=summary_data,
+                llm_model=llm_model,
+                section_cache=self.section_cache,
+                scheduler=self.scheduler,
+                section_mode=self.section_mode,
+                on_checkpoint=self.save_bill,
+            )
+
+        # cache the complete bill data
+        self.save_bill(bill_data)
+
+        return bill_data
+
+    def iter_cached_package_ids(self) -> Iterator[str]:
+        """
+        Iterate over the package ids of all cached bills.
+
+        Returns:
+            Iterator[str]: Package ids.
+        """
+        for entry in self.bill_store.select():
+            yield entry.package_id
+
+    def get_summary_data(self, package_id: str) -> dict:
+        """
+        Get the summary data of a bill, which is cached from parsing the bill.
+
+        Args:
+            package_id (str): The package id.
+
+        Returns:
+            dict: The summary data.
+        """
+        return json.loads(
+            self.get_result_link(self.get_url(f"/packages/{package_id}/summary"))
+        )
+
+    def get_stale_fields(
+        self, bill: Bill, llm_model: BaseAIModel, fields: Iterable[str] = ()
+    ) -> set[str]:
+        """
+        Get the derived fields of a cached bill that are out of date.
+
+        Args:
+            bill (Bill): The cached bill.
+            llm_model (BaseAIModel): The LLM model.
+            fields (Iterable[str]): Fields to recompute regardless of their provenance.
+
+        Returns:
+            set[str]: Stale field names.
+        """
+        graph = get_bill_task_graph(
+            bill, self.get_summary_data(bill.package_id), llm_model
+        )
+        return get_stale_fields(bill, graph, fields)
+
+    def recompute_cached_bill(
+        self, package_id: str, llm_model: BaseAIModel, fields: Iterable[str] = ()
+    ) -> set[str]:
+        """
+        Regenerate only the stale fields of a cached bill.
+
+        Args:
+            package_id (str): The package id.
+            llm_model (BaseAIModel): The LLM model.
+            fields (Iterable[str]): Fields to recompute regardless of their provenance.
+
+        Returns:
+            set[str]: The recomputed fields.
+
+        Raises:
+            ValueError: If the bill is not cached.
+        """
+        bill_data = self.load_cached_bill(package_id)
+        if bill_data is None:
+            raise ValueError(f"Bill {package_id} is not cached")
+
+        stale_fields = self.get_stale_fields(bill_data, llm_model, fields)
+        if not stale_fields:
+            return stale_fields
+
+        LOGGER.info(
+            "Recomputing %s for bill %s", ", ".join(sorted(stale_fields)), package_id
+        )
+        with llm_call_context(package_id=package_id):
+            recompute_bill(
+                bill=bill_data,
+                summary_data=self.get_summary_data(package_id),
+                llm_model=llm_model,
+                stale_fields=stale_fields,
+                section_cache=self.section_cache,
+                scheduler=self.scheduler,
+                section_mode=self.section_mode,
+                on_checkpoint=self.save_bill,
+            )
+
+        # cache the recomputed bill data
+        self.save_bill(bill_data)
+
+        return stale_fields
+
+    def get_bill(self, bill_result: SearchResult, llm_model: BaseAIModel) -> Bill:
+        """
+        Get the bill with both phases of processing.
+
+        Args:
+            bill_result (SearchResult): The search result.
+            llm_model (BaseAIModel): The LLM model.
+
+        Returns:
+            Bill: The bill.
+        """
+        self.get_bill_data(bill_result)
+        return self.analyze_cached_bill(bill_result.packageId, llm_model)
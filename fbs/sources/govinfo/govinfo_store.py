@@ -0,0 +1,519 @@
+"""
+Bill store partitioned by congress, bill type, and version, with a metadata manifest.
+
+Bills are stored as gzipped, schema-versioned records under
+congress/bill_type/version/<package id>.json.gz, and every write also updates a row in
+a SQLite manifest with the bill's metadata, content hash, size, and modification time.
+Consumers select bills by date, partition,
+status, or modification time from the manifest without opening any bill files.
+"""
+
+# imports
+import gzip
+import hashlib
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+# project
+from fbs.sources.govinfo.govinfo_codec import (
+    SchemaVersionError,
+    decode_record,
+    encode_record,
+)
+from fbs.sources.govinfo.govinfo_types import (
+    get_bill_prefix,
+    get_bill_slug,
+    parse_package_id,
+)
+from fbs.utils.store import (
+    LOCK_DIRECTORY_NAME,
+    atomic_write_bytes,
+    iter_store_paths,
+    key_lock,
+    quarantine_entry,
+    read_gz_bytes,
+)
+
+# default bill store path
+DEFAULT_BILLS_PATH = Path.home() / ".cache" / "fbs" / "bills"
+
+# suffix of bill files
+BILL_SUFFIX = ".json.gz"
+
+# partition for package ids that do not parse
+UNKNOWN_PARTITION = Path("unknown")
+
+# seconds to wait for the manifest lock
+DEFAULT_BUSY_TIMEOUT = 60.0
+
+# manifest columns, in table order
+MANIFEST_COLUMNS = (
+    "package_id",
+    "path",
+    "congress",
+    "bill_type",
+    "bill_version",
+    "legis_num",
+    "date",
+    "slug",
+    "llm_status",
+    "content_hash",
+    "size",
+    "mtime",
+)
+
+
+@dataclass
+class ManifestEntry:
+    """
+    Metadata of a stored bill.
+    """
+
+    package_id: str
+    path: str
+    congress: Optional[str]
+    bill_type: Optional[str]
+    bill_version: Optional[str]
+    legis_num: Optional[str]
+    date: Optional[str]
+    slug: Optional[str]
+    llm_status: Optional[str]
+    content_hash: str
+    size: int
+    mtime: float
+
+
+def get_manifest_path(bills_path: Path) -> Path:
+    """
+    Get the manifest path for a bill store, kept next to the store directory.
+
+    Args:
+        bills_path (Path): Bill store directory.
+
+    Returns:
+        Path: Manifest path.
+    """
+    return bills_path.parent / f"{bills_path.name}_manifest.sqlite"
+
+
+def get_bill_partition(package_id: str) -> Path:
+    """
+    Get the partition of a bill from its package id.
+
+    Args:
+        package_id (str): Package id, e.g., BILLS-118hr1234ih.
+
+    Returns:
+        Path: Relative partition path, e.g., 118/hr/ih.
+    """
+    package_info = parse_package_id(package_id)
+    if package_info is None:
+        return UNKNOWN_PARTITION
+    return Path(
+        package_info["congress"], package_info["bill_type"], package_info["version"]
+    )
+
+
+class BillStore:
+    """
+    Partitioned bill store with a SQLite manifest.
+
+    The manifest is a SQLite database with the default rollback journal, like the
+    work queue, and the bill locks live in the store directory, so the store can be
+    shared by workers on several machines.
+    """
+
+    def __init__(
+        self,
+        bills_path: Path = DEFAULT_BILLS_PATH,
+        manifest_path: Optional[Path] = None,
+        busy_timeout: float = DEFAULT_BUSY_TIMEOUT,
+    ):
+        """
+        Open the store, creating it if needed.
+
+        Args:
+            bills_path (Path): Bill store directory.
+            manifest_path (Optional[Path]): Manifest path, or None for the default
+                next to the store directory.
+            busy_timeout (float): Seconds to wait for the manifest lock.
+        """
+        self.bills_path = bills_path
+        self.bills_path.mkdir(parents=True, exist_ok=True)
+        self.lock_path = bills_path / LOCK_DIRECTORY_NAME
+        self.manifest_path = manifest_path or get_manifest_path(bills_path)
+        self.lock = threading.Lock()
+
+        self.connection = sqlite3.connect(
+            str(self.manifest_path),
+            timeout=busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        with self.lock:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS bills (
+                    package_id TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    congress TEXT,
+                    bill_type TEXT,
+                    bill_version TEXT,
+                    legis_num TEXT,
+                    date TEXT,
+                    slug TEXT,
+                    llm_status TEXT,
+                    content_hash TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL
+                )
+                """)
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS bills_date ON bills (date)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS bills_mtime ON bills (mtime)"
+            )
+
+    def close(self) -> None:
+        """
+        Close the manifest.
+        """
+        with self.lock:
+            self.connection.close()
+
+    def __enter__(self) -> "BillStore":
+        """
+        Enter the context manager.
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """
+        Close the manifest on exit.
+        """
+        self.close()
+
+    def get_path(self, package_id: str) -> Path:
+        """
+        Get the path of a bill in the store.
+
+        Args:
+            package_id (str): Package id.
+
+        Returns:
+            Path: Bill path.
+        """
+        return (
+            self.bills_path
+            / get_bill_partition(package_id)
+            / f"{package_id}{BILL_SUFFIX}"
+        )
+
+    def read(self, package_id: str) -> Optional[dict[str, Any]]:
+        """
+        Read a bill, removing it from the manifest if its file is missing or corrupt.
+
+        Args:
+            package_id (str): Package id.
+
+        Returns:
+            Optional[dict[str, Any]]: Bill data upgraded to the current schema, or None
+                if missing or corrupt.
+        """
+        path = self.get_path(package_id)
+        bill_data = self._read(path)
+        if (
+            bill_data is None
+            and not path.exists()
+            and self.get_entry(package_id) is not None
+        ):
+            # corrupt bills are quarantined, so they are missing by now too
+            self._remove(package_id)
+        return bill_data
+
+    def _read(self, path: Path) -> Optional[dict[str, Any]]:
+        """
+        Read and decode a bill file, quarantining it if it is corrupt.
+
+        Args:
+            path (Path): Bill path.
+
+        Returns:
+            Optional[dict[str, Any]]: Bill data, or None if missing or corrupt.
+
+        Raises:
+            SchemaVersionError: If the bill was written by a newer schema.
+        """
+        content = read_gz_bytes(path)
+        if content is None:
+            return None
+
+        try:
+            return decode_record(content)
+        except SchemaVersionError:
+            # newer records are valid, so they are never quarantined
+            raise
+        except ValueError as e:
+            quarantine_entry(path, f"{type(e).__name__}: {e}")
+            return None
+
+    def write(self, bill_data: dict[str, Any]) -> None:
+        """
+        Atomically write a bill under its lock and update the manifest.
+
+        Args:
+            bill_data (dict[str, Any]): Bill data with its package id set.
+        """
+        path = self.get_path(bill_data["package_id"])
+        with key_lock(path, self.lock_path):
+            self._write(path, bill_data)
+
+    def update(
+        self,
+        package_id: str,
+        function: Callable[[dict[str, Any]], Optional[dict[str, Any]]],
+    ) -> Optional[dict[str, Any]]:
+        """
+        Read, modify, and write a bill under its lock.
+
+        Args:
+            package_id (str): Package id.
+            function (Callable): Function of the bill data that returns the updated
+                data to write, or None to leave the bill unchanged.
+
+        Returns:
+            Optional[dict[str, Any]]: Updated bill data, or None if the bill is missing,
+                corrupt, or unchanged.
+        """
+        path = self.get_path(package_id)
+        with key_lock(path, self.lock_path):
+            bill_data = self.read(package_id)
+            if bill_data is None:
+                return None
+
+            updated_bill_data = function(bill_data)
+            if updated_bill_data is not None:
+                self._write(path, updated_bill_data)
+            return updated_bill_data
+
+    def _write(self, path: Path, bill_data: dict[str, Any]) -> None:
+        """
+        Write a bill and record it in the manifest; the caller holds the bill's lock.
+
+        Args:
+            path (Path): Bill path.
+            bill_data (dict[str, Any]): Bill data.
+        """
+        content = encode_record(bill_data)
+        atomic_write_bytes(path, gzip.compress(content))
+        self._record(
+            path, bill_data, hashlib.blake2b(content, digest_size=16).hexdigest()
+        )
+
+    def _record(self, path: Path, bill_data: dict[str, Any], content_hash: str) -> None:
+        """
+        Insert or replace the manifest row of a bill.
+
+        Args:
+            path (Path): Bill path.
+            bill_data (dict[str, Any]): Bill data.
+            content_hash (str): Hash of the serialized bill.
+        """
+        package_info = parse_package_id(bill_data["package_id"]) or {}
+        slug = None
+        if bill_data.get("legis_num") and bill_data.get("title") is not None:
+            slug = get_bill_slug(
+                bill_data["legis_num"],
+                bill_data["title"],
+                bill_data.get("bill_version", ""),
+            )
+
+        stat = path.stat()
+        row = (
+            bill_data["package_id"],
+            str(path.relative_to(self.bills_path)),
+            package_info.get("congress", bill_data.get("congress")),
+            package_info.get("bill_type", bill_data.get("bill_type")),
+            package_info.get("version", bill_data.get("bill_version")),
+            bill_data.get("legis_num"),
+            str(bill_data["date"])[:10] if bill_data.get("date") else None,
+            slug,
+            bill_data.get("llm_status"),
+            content_hash,
+            stat.st_size,
+            stat.st_mtime,
+        )
+        with self.lock:
+            self.connection.execute(
+                f"INSERT OR REPLACE INTO bills ({', '.join(MANIFEST_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in MANIFEST_COLUMNS)})",
+                row,
+            )
+
+    def _remove(self, package_id: str) -> None:
+        """
+        Remove a bill from the manifest.
+
+        Args:
+            package_id (str): Package id.
+        """
+        with self.lock:
+            self.connection.execute(
+                "DELETE FROM bills WHERE package_id = ?", (package_id,)
+            )
+
+    def get_entry(self, package_id: str) -> Optional[ManifestEntry]:
+        """
+        Get the manifest entry of a bill.
+
+        Args:
+            package_id (str): Package id.
+
+        Returns:
+            Optional[ManifestEntry]: Manifest entry, or None if the bill is not stored.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                f"SELECT {', '.join(MANIFEST_COLUMNS)} FROM bills WHERE package_id = ?",
+                (package_id,),
+            ).fetchone()
+        return ManifestEntry(*row) if row is not None else None
+
+    def select_versions(self, package_id: str) -> list[ManifestEntry]:
+        """
+        Select the other stored versions of a bill from the manifest.
+
+        Args:
+            package_id (str): Package id, e.g., BILLS-118hr1234ih.
+
+        Returns:
+            list[ManifestEntry]: Entries of the other versions, oldest first.
+        """
+        prefix = get_bill_prefix(package_id)
+        if prefix is None:
+            return []
+
+        # the version is letters only, so BILLS-118hr1234 never matches BILLS-118hr12345
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT {', '.join(MANIFEST_COLUMNS)} FROM bills "
+                "WHERE package_id GLOB ? AND package_id != ? "
+                "ORDER BY date, package_id",
+                (f"{prefix}[a-z]*", package_id),
+            ).fetchall()
+        return [ManifestEntry(*row) for row in rows]
+
+    def select(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        changed_since: Optional[float] = None,
+        congress: Optional[str] = None,
+        bill_type: Optional[str] = None,
+        bill_version: Optional[str] = None,
+        llm_status: Optional[str] = None,
+    ) -> list[ManifestEntry]:
+        """
+        Select bills from the manifest without opening them.
+
+        Args:
+            start_date (Optional[str]): First bill date (YYYY-MM-DD), inclusive.
+            end_date (Optional[str]): Last bill date (YYYY-MM-DD), inclusive.
+            changed_since (Optional[float]): Only bills written after this timestamp.
+            congress (Optional[str]): Congress, e.g., 118.
+            bill_type (Optional[str]): Bill type, e.g., hr.
+            bill_version (Optional[str]): Bill version code, e.g., ih.
+            llm_status (Optional[str]): LLM status, pending or complete.
+
+        Returns:
+            list[ManifestEntry]: Matching entries, oldest write first.
+        """
+        conditions = []
+        parameters: list[Any] = []
+        for condition, value in (
+            ("date >= ?", start_date),
+            ("date <= ?", end_date),
+            ("mtime > ?", changed_since),
+            ("congress = ?", congress),
+            ("bill_type = ?", bill_type),
+            ("bill_version = ?", bill_version),
+            ("llm_status = ?", llm_status),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+
+        query = f"SELECT {', '.join(MANIFEST_COLUMNS)} FROM bills"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY mtime"
+
+        with self.lock:
+            rows = self.connection.execute(query, parameters).fetchall()
+        return [ManifestEntry(*row) for row in rows]
+
+    def get_entry_path(self, entry: ManifestEntry) -> Path:
+        """
+        Get the absolute path of a manifest entry.
+
+        Args:
+            entry (ManifestEntry): Manifest entry.
+
+        Returns:
+            Path: Bill path.
+        """
+        return self.bills_path / entry.path
+
+    def iter_bills(
+        self, entries: Optional[Iterable[ManifestEntry]] = None
+    ) -> Iterator[tuple[ManifestEntry, dict[str, Any]]]:
+        """
+        Iterate over bills, skipping bills that are missing or corrupt.
+
+        Args:
+            entries (Optional[Iterable[ManifestEntry]]): Entries to read, or None for
+                all bills.
+
+        Returns:
+            Iterator[tuple[ManifestEntry, dict[str, Any]]]: Entries and bill data.
+        """
+        for entry in entries if entries is not None else self.select():
+            bill_data = self.read(entry.package_id)
+            if bill_data is not None:
+                yield entry, bill_data
+
+    def rebuild(self) -> int:
+        """
+        Rebuild the manifest from the bill files, moving any bills that are not in
+        their partition, e.g., from the old flat layout, into place.
+
+        Returns:
+            int: Number of bills in the manifest.
+        """
+        with self.lock:
+            self.connection.execute("DELETE FROM bills")
+
+        num_bills = 0
+        for path in list(iter_store_paths(self.bills_path)):
+            with key_lock(path, self.lock_path):
+                bill_data = self._read(path)
+            if bill_data is None or bill_data.get("package_id") is None:
+                continue
+
+            target_path = self.get_path(bill_data["package_id"])
+            if path == target_path:
+                content = encode_record(bill_data)
+                self._record(
+                    path,
+                    bill_data,
+                    hashlib.blake2b(content, digest_size=16).hexdigest(),
+                )
+            else:
+                self.write(bill_data)
+                path.unlink(missing_ok=True)
+            num_bills += 1
+
+        return num_bills
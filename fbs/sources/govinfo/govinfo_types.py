@@ -7,9 +7,8 @@ from __future__ import annotations
 # imports
 import datetime
 import re
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
-
+from dataclasses import MISSING, dataclass, field, fields
+from typing import Any, Callable, Dict, List, Optional
 
 # constants
 BILL_VERSION_CODES = {
@@ -57,6 +56,44 @@ BILL_VERSION_CODES = {
 }
 
 
+# package id format, e.g., BILLS-118hr1234ih
+PACKAGE_ID_PATTERN = re.compile(
+    r"^BILLS-(?P<congress>\d+)(?P<bill_type>[a-z]+?)(?P<number>\d+)(?P<version>[a-z]+)$"
+)
+
+
+def parse_package_id(package_id: str) -> Optional[Dict[str, str]]:
+    """
+    Parse a GovInfo bill package id into its congress, bill type, number, and version.
+
+    Args:
+        package_id: Package id, e.g., BILLS-118hr1234ih
+
+    Returns:
+        Dictionary with congress, bill_type, number, and version, or None if invalid.
+    """
+    match = PACKAGE_ID_PATTERN.match(package_id)
+    if match is None:
+        return None
+    return match.groupdict()
+
+
+def get_bill_prefix(package_id: str) -> Optional[str]:
+    """
+    Get the package id prefix shared by all versions of the same bill.
+
+    Args:
+        package_id: Package id, e.g., BILLS-118hr1234ih
+
+    Returns:
+        Package id without the version, e.g., BILLS-118hr1234, or None if invalid.
+    """
+    package_info = parse_package_id(package_id)
+    if package_info is None:
+        return None
+    return "BILLS-{congress}{bill_type}{number}".format(**package_info)
+
+
 def get_bill_slug(legis_num: str, title: str, version: str, max_chars: int = 64) -> str:
     """
     Generate a URL-safe slug from legislation number and title.
@@ -85,7 +122,81 @@ def get_bill_slug(legis_num: str, title: str, version: str, max_chars: int = 64)
     return slug
 
 
-@dataclass
+def generate_to_dict(
+    **field_encoders: Callable[[Any], Any],
+) -> Callable[[type], type]:
+    """
+    Generate the to_dict method of a dataclass from its fields.
+
+    The field names and encoders are read once per class, so to_dict does no
+    per-call introspection and never drifts from the schema when fields are added.
+
+    Args:
+        **field_encoders: Encoders by field name for fields that are not stored as is.
+
+    Returns:
+        Callable[[type], type]: Class decorator that adds to_dict.
+    """
+
+    def decorator(cls: type) -> type:
+        field_items = tuple(
+            (class_field.name, field_encoders.get(class_field.name))
+            for class_field in fields(cls)
+        )
+
+        def to_dict(self) -> dict:
+            return {
+                name: (
+                    getattr(self, name)
+                    if encoder is None
+                    else encoder(getattr(self, name))
+                )
+                for name, encoder in field_items
+            }
+
+        to_dict.__qualname__ = f"{cls.__qualname__}.to_dict"
+        to_dict.__doc__ = f"Convert the {cls.__name__} object to a dictionary."
+        cls.to_dict = to_dict
+        return cls
+
+    return decorator
+
+
+def split_extra_fields(
+    cls: type, data: Dict[str, Any]
+) -> tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Split API data into the declared fields of a dataclass and all other keys.
+
+    Declared fields without a default that are missing from the data are set to None,
+    since the API omits some of them.
+
+    Args:
+        cls (type): Dataclass with an extra field.
+        data (Dict[str, Any]): API data.
+
+    Returns:
+        tuple[Dict[str, Any], Dict[str, Any]]: Declared field values and extra values.
+    """
+    declared_fields = cls.__dataclass_fields__
+    values: Dict[str, Any] = {}
+    for class_field in fields(cls):
+        if class_field.name == "extra":
+            continue
+        if class_field.name in data:
+            values[class_field.name] = data[class_field.name]
+        elif class_field.default is MISSING and class_field.default_factory is MISSING:
+            values[class_field.name] = None
+
+    extra = {
+        key: value
+        for key, value in data.items()
+        if key not in declared_fields or key == "extra"
+    }
+    return values, extra
+
+
+@dataclass(slots=True)
 class SearchResult:
     """
     Represents a single search result from the GovInfo API.
@@ -106,25 +217,33 @@ class SearchResult:
     # all other fields are stored in this dictionary
     extra: Dict[str, Any] = field(default_factory=dict)
 
-    def __getattr__(self, name):
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SearchResult":
         """
-        Allows accessing items in the extra dict as if they were attributes of the class.
+        Create a SearchResult from API data, storing undeclared keys in extra.
+
+        Args:
+            data (Dict[str, Any]): API data.
+
+        Returns:
+            SearchResult: The SearchResult object.
         """
-        if name in self.extra:
-            return self.extra[name]
-        raise AttributeError(f"'SearchResult' object has no attribute '{name}'")
+        values, extra = split_extra_fields(cls, data)
+        return cls(**values, extra=extra)
 
-    def __setattr__(self, name, value):
+    def __getattr__(self, name):
         """
-        Allows setting items in the extra dict as if they were attributes of the class.
+        Allows reading items in the extra dict as if they were attributes of the class.
+
+        Declared fields are slots and never reach this method, so only undeclared
+        names pay for the lookup; from_dict stores undeclared keys in extra.
         """
-        if name in self.__annotations__ or name in self.__dict__:
-            super().__setattr__(name, value)
-        else:
-            self.extra[name] = value
+        if name != "extra" and name in self.extra:
+            return self.extra[name]
+        raise AttributeError(f"'SearchResult' object has no attribute '{name}'")
 
 
-@dataclass
+@dataclass(slots=True)
 class SearchResponse:
     """
     Represents a response from the GovInfo API search endpoint.
@@ -135,7 +254,7 @@ class SearchResponse:
     results: List[SearchResult] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class PackageInfo:
     """
     Represents a package of documents from the GovInfo API.
@@ -169,25 +288,33 @@ class PackageInfo:
         if isinstance(self.dateIssued, str):
             self.dateIssued = datetime.datetime.fromisoformat(self.dateIssued)
 
-    def __getattr__(self, name):
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PackageInfo":
         """
-        Allows accessing items in the extra dict as if they were attributes of the class.
+        Create a PackageInfo from API data, storing undeclared keys in extra.
+
+        Args:
+            data (Dict[str, Any]): API data.
+
+        Returns:
+            PackageInfo: The PackageInfo object.
         """
-        if name in self.extra:
-            return self.extra[name]
-        raise AttributeError(f"'PackageInfo' object has no attribute '{name}'")
+        values, extra = split_extra_fields(cls, data)
+        return cls(**values, extra=extra)
 
-    def __setattr__(self, name, value):
+    def __getattr__(self, name):
         """
-        Allows setting items in the extra dict as if they were attributes of the class.
+        Allows reading items in the extra dict as if they were attributes of the class.
+
+        Declared fields are slots and never reach this method, so only undeclared
+        names pay for the lookup; from_dict stores undeclared keys in extra.
         """
-        if name in self.__annotations__ or name in self.__dict__:
-            super().__setattr__(name, value)
-        else:
-            self.extra[name] = value
+        if name != "extra" and name in self.extra:
+            return self.extra[name]
+        raise AttributeError(f"'PackageInfo' object has no attribute '{name}'")
 
 
-@dataclass
+@dataclass(slots=True)
 class CollectionContainer:
     """
     Represents a collection of packages from the GovInfo API.
@@ -201,7 +328,7 @@ class CollectionContainer:
     packages: List[PackageInfo] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class GranuleMetadata:
     """
     Represents metadata for a granule from the GovInfo API.
@@ -214,7 +341,7 @@ class GranuleMetadata:
     md5: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class GranuleContainer:
     """
     Represents a container of granules from the GovInfo API.
@@ -229,7 +356,7 @@ class GranuleContainer:
     granules: List[GranuleMetadata] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class SummaryItem:
     """
     Represents a summary item for a collection from the GovInfo API.
@@ -241,7 +368,7 @@ class SummaryItem:
     granuleCount: int
 
 
-@dataclass
+@dataclass(slots=True)
 class CollectionSummary:
     """
     Represents a summary of collections from the GovInfo API.
@@ -250,7 +377,8 @@ class CollectionSummary:
     collections: List[SummaryItem] = field(default_factory=list)
 
 
-@dataclass
+@generate_to_dict()
+@dataclass(slots=True)
 class BillSection:
     """
     Represents a section of a bill from the GovInfo API.
@@ -283,38 +411,23 @@ class BillSection:
     issues: List[str] = field(default_factory=list)
     money_sentences: List[str] = field(default_factory=list)
 
-    def to_dict(self) -> dict:
-        """
-        Convert the BillSection object to a dictionary.
-        """
-        return {
-            "enum": self.enum,
-            "header": self.header,
-            "toc_id": self.toc_id,
-            "text": self.text,
-            "markdown": self.markdown,
-            "html": self.html,
-            "num_tokens": self.num_tokens,
-            "num_sentences": self.num_sentences,
-            "num_characters": self.num_characters,
-            "num_nouns": self.num_nouns,
-            "num_verbs": self.num_verbs,
-            "num_adjectives": self.num_adjectives,
-            "num_adverbs": self.num_adverbs,
-            "num_punctuations": self.num_punctuations,
-            "num_numbers": self.num_numbers,
-            "num_entities": self.num_entities,
-            "avg_token_length": self.avg_token_length,
-            "avg_sentence_length": self.avg_sentence_length,
-            "token_entropy": self.token_entropy,
-            "entities": self.entities,
-            "summary": self.summary,
-            "issues": self.issues,
-            "money_sentences": self.money_sentences,
-        }
-
-
-@dataclass
+    # section tree fields
+    content_hash: Optional[str] = None
+    parent_id: Optional[str] = None
+    nested_sections: List[Dict[str, Optional[str]]] = field(default_factory=list)
+
+    # nlp profile, prompt version, and model id of the derived fields
+    provenance: Dict[str, str] = field(default_factory=dict)
+
+    # metrics computed from the stored spacy annotations
+    metrics: Dict[str, Any] = field(default_factory=dict)
+
+
+@generate_to_dict(
+    date=lambda value: value.isoformat(),
+    sections=lambda value: [section.to_dict() for section in value],
+)
+@dataclass(slots=True)
 class Bill:
     # basic metadata fields
     title: str
@@ -351,6 +464,9 @@ class Bill:
     token_entropy: float
     entities: List[str] = field(default_factory=list)
     sections: List[BillSection] = field(default_factory=list)
+
+    # raw spacy entities, kept so the filtered entities can be regenerated
+    spacy_entities: List[str] = field(default_factory=list)
     money_sentences: List[str] = field(default_factory=list)
     short_titles: List[str] = field(default_factory=list)
 
@@ -365,53 +481,16 @@ class Bill:
     # other deferred fields
     package_id: Optional[str] = None
     llm_model_id: Optional[str] = None
+    llm_model_ids: Dict[str, str] = field(default_factory=dict)
 
-    def to_dict(self) -> dict:
-        """
-        Convert the Bill object to a dictionary.
-        """
-        return {
-            "title": self.title,
-            "short_titles": self.short_titles,
-            "publisher": self.publisher,
-            "date": self.date.isoformat(),
-            "congress": self.congress,
-            "session": self.session,
-            "legis_num": self.legis_num,
-            "current_chamber": self.current_chamber,
-            "is_appropriation": self.is_appropriation,
-            "bill_version": self.bill_version,
-            "bill_type": self.bill_type,
-            "package_id": self.package_id,
-            "text": self.text,
-            "markdown": self.markdown,
-            "html": self.html,
-            "num_pages": self.num_pages,
-            "num_sections": self.num_sections,
-            "num_tokens": self.num_tokens,
-            "num_sentences": self.num_sentences,
-            "num_characters": self.num_characters,
-            "num_nouns": self.num_nouns,
-            "num_verbs": self.num_verbs,
-            "num_adjectives": self.num_adjectives,
-            "num_adverbs": self.num_adverbs,
-            "num_punctuations": self.num_punctuations,
-            "num_numbers": self.num_numbers,
-            "num_entities": self.num_entities,
-            "avg_token_length": self.avg_token_length,
-            "avg_sentence_length": self.avg_sentence_length,
-            "token_entropy": self.token_entropy,
-            "entities": self.entities,
-            "sections": [section.to_dict() for section in self.sections],
-            "summary": self.summary,
-            "commentary": self.commentary,
-            "money_commentary": self.money_commentary,
-            "eli5": self.eli5,
-            "issues": self.issues,
-            "keywords": self.keywords,
-            "money_sentences": self.money_sentences,
-            "llm_model_id": self.llm_model_id,
-        }
+    # "pending" until the llm fields are filled in, "complete" afterwards
+    llm_status: str = "complete"
+
+    # provenance of the derived fields by field name, plus "stats" for the nlp stats
+    provenance: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    # metrics computed from the stored spacy annotations of the sections
+    metrics: Dict[str, Any] = field(default_factory=dict)
 
     def get_slug(self) -> str:
         """
@@ -0,0 +1,138 @@
+"""
+Minimal dependency-graph executor for running tasks concurrently.
+"""
+
+# imports
+import concurrent.futures
+from typing import Any, Callable, Iterable, Optional
+
+
+class TaskGraph:
+    """
+    A small DAG of named tasks with explicit inputs.
+
+    Tasks must be added after all of their inputs, which keeps the graph acyclic.
+    Each task is submitted as soon as all of its inputs have finished, and its result
+    is passed to the result callback as soon as it finishes.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty graph.
+        """
+        self.tasks: dict[str, tuple[Callable[[], Any], tuple[str, ...]]] = {}
+
+    def add(
+        self, name: str, function: Callable[[], Any], inputs: Iterable[str] = ()
+    ) -> None:
+        """
+        Add a task to the graph.
+
+        Args:
+            name: Task name.
+            function: Task function taking no arguments.
+            inputs: Names of the tasks that must finish before this task.
+
+        Raises:
+            ValueError: If the task already exists or an input is unknown.
+        """
+        if name in self.tasks:
+            raise ValueError(f"Duplicate task: {name}")
+
+        inputs = tuple(inputs)
+        for input_name in inputs:
+            if input_name not in self.tasks:
+                raise ValueError(f"Unknown input {input_name} for task {name}")
+
+        self.tasks[name] = (function, inputs)
+
+    def __contains__(self, name: str) -> bool:
+        """
+        Check whether a task is in the graph.
+        """
+        return name in self.tasks
+
+    def get_dependents(self, names: Iterable[str]) -> set[str]:
+        """
+        Get the tasks that depend on any of the named tasks, directly or indirectly.
+
+        Args:
+            names: Task names.
+
+        Returns:
+            set[str]: The named tasks and all of their dependents.
+        """
+        dependents = set(names)
+        # tasks are added after their inputs, so one pass in order is enough
+        for name, (_, inputs) in self.tasks.items():
+            if any(input_name in dependents for input_name in inputs):
+                dependents.add(name)
+        return dependents
+
+    def run(
+        self,
+        submit: Callable[..., concurrent.futures.Future],
+        on_result: Optional[Callable[[str, Any], None]] = None,
+        done: Iterable[str] = (),
+        keep_going: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Run the graph.
+
+        If a task fails, no further tasks are submitted, the tasks already running are
+        allowed to finish, and the first error is raised.  With keep_going, tasks that
+        do not depend on a failed task are still submitted before the error is raised.
+
+        Args:
+            submit: Function that submits a callable and returns a future, e.g.,
+                an executor's or scheduler's submit method.
+            on_result: Callback called in this thread with each task name and result
+                as soon as the task finishes.
+            done: Names of tasks whose results are already available and should be skipped.
+            keep_going: Whether to keep running the tasks unaffected by a failure.
+
+        Returns:
+            dict[str, Any]: Results by task name.
+        """
+        finished = set(done)
+        results: dict[str, Any] = {}
+        running: dict[concurrent.futures.Future, str] = {}
+        failed: set[str] = set()
+        error: Optional[BaseException] = None
+
+        while True:
+            # submit every task whose inputs have finished
+            if error is None or keep_going:
+                for name, (function, inputs) in self.tasks.items():
+                    if (
+                        name not in finished
+                        and name not in failed
+                        and name not in running.values()
+                        and all(input_name in finished for input_name in inputs)
+                    ):
+                        running[submit(function)] = name
+
+            if not running:
+                break
+
+            completed, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in completed:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    failed.add(name)
+                    if error is None:
+                        error = e
+                    continue
+
+                finished.add(name)
+                if on_result is not None:
+                    on_result(name, results[name])
+
+        if error is not None:
+            raise error
+
+        return results
@@ -0,0 +1,263 @@
+"""
+Local normalization, ranking, and gazetteer matching for named entities.
+"""
+
+# imports
+import re
+from collections import Counter
+from typing import Iterable
+
+# project
+from fbs.logger import LOGGER
+
+# maximum number of ambiguous entities to send to the LLM filter, by frequency
+DEFAULT_MAX_AMBIGUOUS_ENTITIES = 1000
+
+# number of ambiguous entities per LLM filter prompt
+DEFAULT_ENTITY_BATCH_SIZE = 200
+
+# entities that are only numbers, amounts, dates, or references carry no meaning alone
+NON_ENTITY_PATTERN = re.compile(
+    r"^(?:[\d\s$%.,:;/()\-–]+"
+    r"|(?:fiscal )?years?(?: \d{4})?(?: (?:and|through|to) \d{4})?"
+    r"|(?:january|february|march|april|may|june|july|august|september|october|november|december)[\s\d,]*"
+    r"|(?:first|second|third|fourth|fifth|sixth|seventh|eighth|ninth|tenth)"
+    r"|(?:section|sec\.|subsection|paragraph|subparagraph|clause|title|part|chapter) [\w().\-]+"
+    r"|[a-z]|\d+(?:st|nd|rd|th))$"
+)
+
+# known federal agencies, offices, and programs that are always relevant when mentioned
+GAZETTEER = (
+    "Congress",
+    "Senate",
+    "House of Representatives",
+    "Congressional Budget Office",
+    "CBO",
+    "Government Accountability Office",
+    "GAO",
+    "Library of Congress",
+    "Executive Office of the President",
+    "Office of Management and Budget",
+    "OMB",
+    "Department of Agriculture",
+    "USDA",
+    "Department of Commerce",
+    "Department of Defense",
+    "DOD",
+    "Department of Education",
+    "Department of Energy",
+    "DOE",
+    "Department of Health and Human Services",
+    "HHS",
+    "Department of Homeland Security",
+    "DHS",
+    "Department of Housing and Urban Development",
+    "HUD",
+    "Department of the Interior",
+    "Department of Justice",
+    "DOJ",
+    "Department of Labor",
+    "Department of State",
+    "Department of Transportation",
+    "DOT",
+    "Department of the Treasury",
+    "Department of Veterans Affairs",
+    "VA",
+    "Environmental Protection Agency",
+    "EPA",
+    "Federal Emergency Management Agency",
+    "FEMA",
+    "Federal Communications Commission",
+    "FCC",
+    "Federal Trade Commission",
+    "FTC",
+    "Federal Reserve",
+    "Federal Deposit Insurance Corporation",
+    "FDIC",
+    "Securities and Exchange Commission",
+    "SEC",
+    "Commodity Futures Trading Commission",
+    "Consumer Financial Protection Bureau",
+    "Internal Revenue Service",
+    "IRS",
+    "Social Security Administration",
+    "Small Business Administration",
+    "SBA",
+    "General Services Administration",
+    "GSA",
+    "Office of Personnel Management",
+    "OPM",
+    "National Aeronautics and Space Administration",
+    "NASA",
+    "National Science Foundation",
+    "NSF",
+    "National Institutes of Health",
+    "NIH",
+    "Centers for Disease Control and Prevention",
+    "CDC",
+    "Food and Drug Administration",
+    "FDA",
+    "Centers for Medicare & Medicaid Services",
+    "Medicare",
+    "Medicaid",
+    "Social Security",
+    "Supplemental Nutrition Assistance Program",
+    "SNAP",
+    "Children's Health Insurance Program",
+    "Federal Aviation Administration",
+    "FAA",
+    "Federal Highway Administration",
+    "Federal Bureau of Investigation",
+    "FBI",
+    "Central Intelligence Agency",
+    "CIA",
+    "Drug Enforcement Administration",
+    "U.S. Customs and Border Protection",
+    "U.S. Immigration and Customs Enforcement",
+    "Transportation Security Administration",
+    "TSA",
+    "Coast Guard",
+    "Army",
+    "Navy",
+    "Air Force",
+    "Marine Corps",
+    "Space Force",
+    "National Guard",
+    "Army Corps of Engineers",
+    "Forest Service",
+    "National Park Service",
+    "Bureau of Land Management",
+    "Fish and Wildlife Service",
+    "Bureau of Indian Affairs",
+    "Indian Health Service",
+    "Census Bureau",
+    "Bureau of Labor Statistics",
+    "Nuclear Regulatory Commission",
+    "Federal Energy Regulatory Commission",
+    "Export-Import Bank",
+    "Peace Corps",
+    "AmeriCorps",
+    "Amtrak",
+    "United States Postal Service",
+    "USPS",
+    "Smithsonian Institution",
+    "Internal Revenue Code",
+    "Social Security Act",
+)
+
+
+def clean_entity(entity: str) -> str:
+    """
+    Clean an entity for display by collapsing whitespace and removing a leading article,
+    trailing punctuation, and possessives.
+
+    Args:
+        entity: Entity text
+
+    Returns:
+        str: Cleaned entity text
+    """
+    entity = re.sub(r"\s+", " ", entity).strip()
+    entity = re.sub(r"^the ", "", entity, flags=re.IGNORECASE)
+    entity = re.sub(r"(?:'s|’s)$", "", entity)
+    return entity.strip(" .,;:'\"()[]")
+
+
+def normalize_entity(entity: str) -> str:
+    """
+    Normalize an entity for comparison by cleaning and case-folding it.
+
+    Args:
+        entity: Entity text
+
+    Returns:
+        str: Normalized entity key
+    """
+    return clean_entity(entity).casefold()
+
+
+# gazetteer entries that are also common words, names, abbreviations, or state codes,
+# e.g., VA for Virginia or Sec. for section, which still need review
+AMBIGUOUS_GAZETTEER = ("VA", "SEC", "DOE", "DOT", "SNAP")
+
+# normalized gazetteer keys that are accepted without review
+GAZETTEER_KEYS = frozenset(
+    normalize_entity(entity) for entity in GAZETTEER
+) - frozenset(normalize_entity(entity) for entity in AMBIGUOUS_GAZETTEER)
+
+
+def is_non_entity(key: str) -> bool:
+    """
+    Check whether a normalized entity is only a number, amount, date, or reference.
+
+    Args:
+        key: Normalized entity key
+
+    Returns:
+        bool: True if the entity should be dropped
+    """
+    return len(key) < 2 or NON_ENTITY_PATTERN.match(key) is not None
+
+
+def rank_entities(entities: Iterable[str]) -> list[tuple[str, int]]:
+    """
+    Deduplicate entities by their normalized key and rank them by frequency.
+
+    Each entity is represented by its most frequent surface form, and ties are broken
+    by first appearance.
+
+    Args:
+        entities: Entity texts, e.g., all spaCy entities of a bill
+
+    Returns:
+        list[tuple[str, int]]: Representative entity text and count, most frequent first
+    """
+    key_counts: Counter = Counter()
+    surface_counts: dict[str, Counter] = {}
+    for entity in entities:
+        key = normalize_entity(entity)
+        if not key:
+            continue
+        key_counts[key] += 1
+        surface_counts.setdefault(key, Counter())[clean_entity(entity)] += 1
+
+    # Counter.most_common keeps insertion order for ties
+    return [
+        (surface_counts[key].most_common(1)[0][0], count)
+        for key, count in key_counts.most_common()
+    ]
+
+
+def classify_entities(
+    entities: Iterable[str],
+    max_ambiguous: int = DEFAULT_MAX_AMBIGUOUS_ENTITIES,
+) -> tuple[list[str], list[str]]:
+    """
+    Split entities into known entities from the gazetteer and an ambiguous remainder
+    that needs review, dropping numbers, amounts, dates, and references.  Ambiguous
+    entities beyond the limit are the least frequent ones and are logged when dropped.
+
+    Args:
+        entities: Entity texts
+        max_ambiguous: Maximum number of ambiguous entities to keep, by frequency
+
+    Returns:
+        tuple[list[str], list[str]]: Known and ambiguous entities, most frequent first
+    """
+    known_entities, ambiguous_entities = [], []
+    for entity, _ in rank_entities(entities):
+        key = normalize_entity(entity)
+        if key in GAZETTEER_KEYS:
+            known_entities.append(entity)
+        elif not is_non_entity(key):
+            ambiguous_entities.append(entity)
+
+    if len(ambiguous_entities) > max_ambiguous:
+        LOGGER.warning(
+            "Dropped %d of %d ambiguous entities beyond the %d most frequent: %s",
+            len(ambiguous_entities) - max_ambiguous,
+            len(ambiguous_entities),
+            max_ambiguous,
+            ambiguous_entities[max_ambiguous:],
+        )
+    return known_entities, ambiguous_entities[:max_ambiguous]
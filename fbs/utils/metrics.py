@@ -0,0 +1,148 @@
+"""
+Metrics computed from stored spacy annotations rather than by running the pipeline.
+"""
+
+# imports
+import hashlib
+import inspect
+from collections import Counter
+from typing import Any, Callable, Iterable, Optional
+
+# packages
+from spacy.tokens import Doc
+
+# project
+from fbs.utils.readability import get_ari_raw
+
+# part-of-speech tags that carry lexical content
+CONTENT_POS = ("NOUN", "PROPN", "VERB", "ADJ", "ADV")
+
+# metric functions by name, each taking the docs of a section or bill
+DOC_METRICS: dict[str, Callable[[list[Doc]], Any]] = {}
+
+
+def register_metric(
+    name: str,
+) -> Callable[[Callable[[list[Doc]], Any]], Callable[[list[Doc]], Any]]:
+    """
+    Register a metric function under a name.
+
+    Args:
+        name: Metric name, used as the key in the metrics of bills and sections.
+
+    Returns:
+        Decorator that registers the metric function.
+    """
+
+    def decorator(function: Callable[[list[Doc]], Any]) -> Callable[[list[Doc]], Any]:
+        DOC_METRICS[name] = function
+        return function
+
+    return decorator
+
+
+def get_metric_version(name: str) -> str:
+    """
+    Get a version hash for a metric from its source code, so that changing a metric
+    marks its stored values as outdated.
+
+    Args:
+        name: Metric name.
+
+    Returns:
+        Metric version hash.
+    """
+    return hashlib.blake2b(
+        inspect.getsource(DOC_METRICS[name]).encode("utf-8"), digest_size=8
+    ).hexdigest()
+
+
+def compute_doc_metrics(
+    docs: list[Doc], names: Optional[Iterable[str]] = None
+) -> dict[str, Any]:
+    """
+    Compute metrics from annotated docs.
+
+    Args:
+        docs: Annotated docs.
+        names: Metric names, or None for all registered metrics.
+
+    Returns:
+        Metric values by name.
+    """
+    return {
+        name: DOC_METRICS[name](docs)
+        for name in (names if names is not None else DOC_METRICS)
+    }
+
+
+@register_metric("pos_ratios")
+def get_pos_ratios(docs: list[Doc]) -> dict[str, float]:
+    """
+    Get the share of tokens with each part-of-speech tag.
+
+    Args:
+        docs: Annotated docs.
+
+    Returns:
+        Ratio of tokens by part-of-speech tag.
+    """
+    pos_counts = Counter(token.pos_ for doc in docs for token in doc)
+    num_tokens = sum(pos_counts.values())
+    if num_tokens == 0:
+        return {}
+    return {pos: count / num_tokens for pos, count in pos_counts.most_common()}
+
+
+@register_metric("entity_types")
+def get_entity_types(docs: list[Doc]) -> dict[str, int]:
+    """
+    Count the named entities of each type.
+
+    Args:
+        docs: Annotated docs.
+
+    Returns:
+        Number of entities by entity label.
+    """
+    return dict(Counter(ent.label_ for doc in docs for ent in doc.ents).most_common())
+
+
+@register_metric("lexical_density")
+def get_lexical_density(docs: list[Doc]) -> float:
+    """
+    Get the share of content words among all words.
+
+    Args:
+        docs: Annotated docs.
+
+    Returns:
+        Lexical density.
+    """
+    words = [
+        token for doc in docs for token in doc if not (token.is_punct or token.is_space)
+    ]
+    if not words:
+        return 0.0
+    return sum(1 for token in words if token.pos_ in CONTENT_POS) / len(words)
+
+
+@register_metric("ari_raw")
+def get_docs_ari_raw(docs: list[Doc]) -> Optional[float]:
+    """
+    Get the Automated Readability Index raw score from the docs.
+
+    Args:
+        docs: Annotated docs.
+
+    Returns:
+        ARI raw score, or None for docs without tokens or sentences.
+    """
+    text_metrics = {
+        "num_characters": sum(len(doc.text) for doc in docs),
+        "num_tokens": sum(len(doc) for doc in docs),
+        "num_sentences": sum(1 for doc in docs for _ in doc.sents),
+    }
+    if text_metrics["num_tokens"] == 0 or text_metrics["num_sentences"] == 0:
+        return None
+    return get_ari_raw(text_metrics)
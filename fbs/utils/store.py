@@ -0,0 +1,237 @@
+"""
+Crash- and multi-writer-safe file store helpers for the caches under ~/.cache/fbs.
+
+Every write goes to a temporary file in the destination directory, is flushed and
+fsynced, and is then renamed over the destination, so readers only ever see a complete
+old or new entry.  Per-key advisory locks serialize read-modify-write updates across
+processes, and across machines when the store is on a shared filesystem, because the
+lock files live in the store itself.  Gzip entries carry a CRC32 and length trailer that is verified on every
+read, and entries that fail the check are moved to a quarantine directory instead of
+failing the reader.
+"""
+
+# imports
+import contextlib
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+# project
+from fbs.logger import LOGGER
+
+# default quarantine path for corrupt entries
+DEFAULT_QUARANTINE_PATH = Path.home() / ".cache" / "fbs" / "quarantine"
+
+# name of the directory that holds advisory lock files inside a store
+LOCK_DIRECTORY_NAME = ".locks"
+
+# gzip magic bytes
+GZIP_MAGIC = b"\x1f\x8b"
+
+# suffix of temporary files
+TEMPORARY_SUFFIX = ".tmp"
+
+
+def is_temporary_path(path: Path) -> bool:
+    """
+    Check whether a path is a temporary file of an unfinished write.
+
+    Args:
+        path (Path): Path.
+
+    Returns:
+        bool: True for temporary files.
+    """
+    return path.name.startswith(".") and path.name.endswith(TEMPORARY_SUFFIX)
+
+
+def iter_store_paths(root_path: Path) -> Iterator[Path]:
+    """
+    Iterate over the entries in a store directory, skipping unfinished writes and
+    lock files.
+
+    Args:
+        root_path (Path): Store directory.
+
+    Returns:
+        Iterator[Path]: Entry paths.
+    """
+    for path in root_path.rglob("*"):
+        if LOCK_DIRECTORY_NAME in path.relative_to(root_path).parts:
+            continue
+        if path.is_file() and not is_temporary_path(path):
+            yield path
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """
+    Write bytes to a path with a temporary file, fsync, and rename.
+
+    Args:
+        path (Path): Destination path.
+        data (bytes): Data.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_name(
+        f".{path.name}.{os.getpid()}.{threading.get_ident()}{TEMPORARY_SUFFIX}"
+    )
+    try:
+        with open(temporary_path, "wb") as output_file:
+            output_file.write(data)
+            output_file.flush()
+            os.fsync(output_file.fileno())
+        os.replace(temporary_path, path)
+    except BaseException:
+        temporary_path.unlink(missing_ok=True)
+        raise
+
+    # persist the rename itself
+    try:
+        directory_fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+    except OSError:
+        pass
+
+
+def write_json_gz(path: Path, data: Any) -> None:
+    """
+    Atomically write gzipped JSON data.
+
+    Args:
+        path (Path): Destination path.
+        data (Any): JSON-serializable data.
+    """
+    atomic_write_bytes(path, gzip.compress(json.dumps(data).encode("utf-8")))
+
+
+def quarantine_entry(
+    path: Path, reason: str, quarantine_path: Path = DEFAULT_QUARANTINE_PATH
+) -> None:
+    """
+    Move a corrupt entry to the quarantine directory.
+
+    Args:
+        path (Path): Entry path.
+        reason (str): Why the entry is corrupt.
+        quarantine_path (Path): Quarantine directory.
+    """
+    target_path = quarantine_path / path.parent.name / f"{path.name}.{int(time.time())}"
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.replace(path, target_path)
+        LOGGER.error(
+            "Quarantined corrupt entry %s to %s: %s", path, target_path, reason
+        )
+    except FileNotFoundError:
+        # another reader already quarantined it
+        pass
+
+
+def read_gz_bytes(
+    path: Path, quarantine_path: Path = DEFAULT_QUARANTINE_PATH
+) -> Optional[bytes]:
+    """
+    Read and verify a gzipped entry, quarantining it if it is corrupt.
+
+    Args:
+        path (Path): Entry path.
+        quarantine_path (Path): Quarantine directory.
+
+    Returns:
+        Optional[bytes]: Decompressed data, or None if missing or corrupt.
+    """
+    try:
+        raw_data = path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+    # decompressing the whole entry verifies the crc32 and length trailer
+    try:
+        return gzip.decompress(raw_data)
+    except (EOFError, OSError, zlib.error) as e:
+        quarantine_entry(path, f"{type(e).__name__}: {e}", quarantine_path)
+        return None
+
+
+def read_json_gz(
+    path: Path, quarantine_path: Path = DEFAULT_QUARANTINE_PATH
+) -> Optional[Any]:
+    """
+    Read and verify a gzipped JSON entry, quarantining it if it is corrupt.
+
+    Plain JSON entries written before the store used gzip are read as well.
+
+    Args:
+        path (Path): Entry path.
+        quarantine_path (Path): Quarantine directory.
+
+    Returns:
+        Optional[Any]: Entry data, or None if missing or corrupt.
+    """
+    try:
+        with open(path, "rb") as input_file:
+            is_gzip = input_file.read(2) == GZIP_MAGIC
+    except FileNotFoundError:
+        return None
+
+    if is_gzip:
+        data = read_gz_bytes(path, quarantine_path)
+        if data is None:
+            return None
+    else:
+        data = path.read_bytes()
+
+    try:
+        return json.loads(data)
+    except ValueError as e:
+        quarantine_entry(path, f"{type(e).__name__}: {e}", quarantine_path)
+        return None
+
+
+@contextlib.contextmanager
+def key_lock(path: Path, lock_path: Optional[Path] = None) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock on a store entry across processes.
+
+    Lock files are kept in a lock directory inside the store, which defaults to one
+    next to the entry, so every machine that shares the store also shares its locks.
+    Lock files are named by the entry path relative to the lock directory's parent,
+    so machines that mount the store at different paths agree on them.  On NFS, the
+    Linux client maps flock to byte-range locks, which NFSv4 supports.  The lock is
+    not reentrant.
+
+    Args:
+        path (Path): Entry path.
+        lock_path (Optional[Path]): Lock directory, e.g., <store>/.locks.
+
+    Returns:
+        Iterator[None]: Context manager holding the lock.
+    """
+    if lock_path is None:
+        lock_path = path.parent / LOCK_DIRECTORY_NAME
+    lock_path.mkdir(parents=True, exist_ok=True)
+
+    entry_path = path.absolute()
+    root_path = lock_path.absolute().parent
+    if entry_path.is_relative_to(root_path):
+        entry_path = entry_path.relative_to(root_path)
+    lock_name = hashlib.blake2b(
+        entry_path.as_posix().encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+    with open(lock_path / f"{lock_name}.lock", "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
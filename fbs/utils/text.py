@@ -0,0 +1,36 @@
+"""
+Text normalization and hashing utilities.
+"""
+
+# imports
+import hashlib
+import re
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for content comparison by collapsing whitespace.
+
+    Case is kept, since capitalization changes the NER and stats results that are
+    reused for matching content.
+
+    Args:
+        text: Text to normalize
+
+    Returns:
+        str: Normalized text
+    """
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def get_content_hash(text: str) -> str:
+    """
+    Get a stable hash of the normalized text.
+
+    Args:
+        text: Text to hash
+
+    Returns:
+        str: Hex digest of the normalized text
+    """
+    return hashlib.blake2b(normalize_text(text).encode("utf-8")).hexdigest()
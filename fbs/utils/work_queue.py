@@ -0,0 +1,390 @@
+"""
+Lease-based work queue stored in SQLite for running backfills across processes and
+machines.
+
+Workers claim units with an expiring lease and renew it with heartbeats while they
+work.  A unit whose worker crashes is claimed again once its lease expires, so work is
+never lost, and a unit is only marked done by the worker that holds its lease.
+
+The queue file can be local, for several worker processes on one machine, or on a
+shared filesystem for several machines.  SQLite relies on POSIX advisory locks, so a
+shared filesystem must support them (e.g., NFSv4 with locking enabled); the default
+rollback journal is used because WAL mode does not work over network filesystems.
+"""
+
+# imports
+import json
+import socket
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+# default queue path
+DEFAULT_QUEUE_PATH = Path.home() / ".cache" / "fbs" / "queue.sqlite"
+
+# default lease duration in seconds
+DEFAULT_LEASE_SECONDS = 600.0
+
+# default number of attempts before a unit is marked failed
+DEFAULT_MAX_ATTEMPTS = 3
+
+# seconds to wait for the database lock
+DEFAULT_BUSY_TIMEOUT = 60.0
+
+# unit statuses
+UNIT_STATUSES = ("pending", "leased", "done", "failed")
+
+
+def get_worker_id() -> str:
+    """
+    Get an id for this worker process that is unique across machines.
+
+    Returns:
+        str: Host name and process id.
+    """
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+@dataclass
+class WorkUnit:
+    """
+    A unit of work claimed from the queue.
+    """
+
+    unit_id: str
+    kind: str
+    payload: dict[str, Any]
+    attempts: int
+
+
+class WorkQueue:
+    """
+    SQLite work queue with expiring leases.
+    """
+
+    def __init__(
+        self,
+        queue_path: Path = DEFAULT_QUEUE_PATH,
+        busy_timeout: float = DEFAULT_BUSY_TIMEOUT,
+    ):
+        """
+        Open the queue, creating it if needed.
+
+        Args:
+            queue_path (Path): Path to the SQLite database.
+            busy_timeout (float): Seconds to wait for the database lock.
+        """
+        self.queue_path = queue_path
+        self.queue_path.parent.mkdir(parents=True, exist_ok=True)
+        self.busy_timeout = busy_timeout
+        self.lock = threading.Lock()
+
+        # autocommit mode, with explicit transactions for claims
+        self.connection = sqlite3.connect(
+            str(queue_path),
+            timeout=busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        with self.lock:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS units (
+                    unit_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    owner TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    updated REAL NOT NULL
+                )
+                """)
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS units_status ON units (status, lease_expires)"
+            )
+
+    def close(self) -> None:
+        """
+        Close the queue.
+        """
+        with self.lock:
+            self.connection.close()
+
+    def add(self, kind: str, payloads: Iterable[tuple[str, dict[str, Any]]]) -> int:
+        """
+        Add units to the queue, ignoring units that already exist.
+
+        Args:
+            kind (str): Unit kind.
+            payloads (Iterable[tuple[str, dict[str, Any]]]): Unit ids and payloads.
+
+        Returns:
+            int: Number of units added.
+        """
+        now = time.time()
+        with self.lock:
+            cursor = self.connection.executemany(
+                "INSERT OR IGNORE INTO units (unit_id, kind, payload, updated) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (unit_id, kind, json.dumps(payload), now)
+                    for unit_id, payload in payloads
+                ],
+            )
+            return cursor.rowcount
+
+    def claim(
+        self,
+        owner: str,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ) -> Optional[WorkUnit]:
+        """
+        Claim the oldest pending unit, or a leased unit whose lease expired.
+
+        Expired units that already used max_attempts, e.g., because they crash every
+        worker that claims them, are marked failed instead of being claimed again.
+
+        Args:
+            owner (str): Worker id.
+            lease_seconds (float): Lease duration in seconds.
+            max_attempts (int): Attempts before an expired unit is marked failed.
+
+        Returns:
+            Optional[WorkUnit]: The claimed unit, or None if there is no work.
+        """
+        now = time.time()
+        with self.lock:
+            # take the write lock before reading so two workers never claim the same unit
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.execute(
+                    "UPDATE units SET status = 'failed', owner = NULL, "
+                    "lease_expires = NULL, error = 'lease expired', updated = ? "
+                    "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    (now, now, max_attempts),
+                )
+                row = self.connection.execute(
+                    "SELECT unit_id, kind, payload, attempts FROM units "
+                    "WHERE status = 'pending' "
+                    "OR (status = 'leased' AND lease_expires < ?) "
+                    "ORDER BY updated LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    self.connection.execute("COMMIT")
+                    return None
+
+                unit_id, kind, payload, attempts = row
+                self.connection.execute(
+                    "UPDATE units SET status = 'leased', owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated = ? WHERE unit_id = ?",
+                    (owner, now + lease_seconds, now, unit_id),
+                )
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+        return WorkUnit(unit_id, kind, json.loads(payload), attempts + 1)
+
+    def _update_leased(self, unit_id: str, owner: str, assignments: str, *args) -> bool:
+        """
+        Update a unit only if the owner still holds its lease.
+
+        Args:
+            unit_id (str): Unit id.
+            owner (str): Worker id.
+            assignments (str): SQL assignments.
+            *args: Assignment parameters.
+
+        Returns:
+            bool: True if the owner held the lease.
+        """
+        with self.lock:
+            cursor = self.connection.execute(
+                f"UPDATE units SET {assignments}, updated = ? "
+                "WHERE unit_id = ? AND owner = ? AND status = 'leased'",
+                (*args, time.time(), unit_id, owner),
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(
+        self, unit_id: str, owner: str, lease_seconds: float = DEFAULT_LEASE_SECONDS
+    ) -> bool:
+        """
+        Renew the lease on a unit.
+
+        Args:
+            unit_id (str): Unit id.
+            owner (str): Worker id.
+            lease_seconds (float): Lease duration in seconds from now.
+
+        Returns:
+            bool: True if the lease was renewed, False if it was lost.
+        """
+        return self._update_leased(
+            unit_id, owner, "lease_expires = ?", time.time() + lease_seconds
+        )
+
+    def complete(self, unit_id: str, owner: str) -> bool:
+        """
+        Mark a unit done.
+
+        Args:
+            unit_id (str): Unit id.
+            owner (str): Worker id.
+
+        Returns:
+            bool: True if the owner held the lease.
+        """
+        return self._update_leased(
+            unit_id, owner, "status = 'done', lease_expires = NULL, error = NULL"
+        )
+
+    def fail(
+        self,
+        unit_id: str,
+        owner: str,
+        error: str,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ) -> bool:
+        """
+        Release a unit after an error, marking it failed after max_attempts.
+
+        Args:
+            unit_id (str): Unit id.
+            owner (str): Worker id.
+            error (str): Error message.
+            max_attempts (int): Attempts before the unit is marked failed.
+
+        Returns:
+            bool: True if the owner held the lease.
+        """
+        return self._update_leased(
+            unit_id,
+            owner,
+            "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "owner = NULL, lease_expires = NULL, error = ?",
+            max_attempts,
+            error,
+        )
+
+    def release(self, unit_id: str, owner: str) -> bool:
+        """
+        Release a unit without counting the attempt, e.g., on shutdown.
+
+        Args:
+            unit_id (str): Unit id.
+            owner (str): Worker id.
+
+        Returns:
+            bool: True if the owner held the lease.
+        """
+        return self._update_leased(
+            unit_id,
+            owner,
+            "status = 'pending', owner = NULL, lease_expires = NULL, "
+            "attempts = attempts - 1",
+        )
+
+    def retry_failed(self) -> int:
+        """
+        Return failed units to the queue with their attempts reset.
+
+        Returns:
+            int: Number of units returned.
+        """
+        with self.lock:
+            cursor = self.connection.execute(
+                "UPDATE units SET status = 'pending', attempts = 0, updated = ? "
+                "WHERE status = 'failed'",
+                (time.time(),),
+            )
+            return cursor.rowcount
+
+    def get_counts(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> dict[str, int]:
+        """
+        Count the units by status, counting expired leases as pending, or as failed
+        once they used max_attempts.
+
+        Args:
+            max_attempts (int): Attempts before an expired unit is marked failed.
+
+        Returns:
+            dict[str, int]: Number of units by status.
+        """
+        counts = {status: 0 for status in UNIT_STATUSES}
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT CASE WHEN status = 'leased' AND lease_expires < ? "
+                "THEN CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END "
+                "ELSE status END, COUNT(*) FROM units GROUP BY 1",
+                (time.time(), max_attempts),
+            ).fetchall()
+        counts.update(dict(rows))
+        return counts
+
+
+class LeaseHeartbeat:
+    """
+    Background thread that renews the lease on a unit while it is being worked on.
+    """
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        unit: WorkUnit,
+        owner: str,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    ):
+        """
+        Initialize the heartbeat.
+
+        Args:
+            queue (WorkQueue): Work queue.
+            unit (WorkUnit): Claimed unit.
+            owner (str): Worker id.
+            lease_seconds (float): Lease duration in seconds.
+        """
+        self.queue = queue
+        self.unit = unit
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.lease_lost = False
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        """
+        Renew the lease a few times per lease period until stopped.
+        """
+        while not self.stopped.wait(self.lease_seconds / 3):
+            try:
+                if not self.queue.heartbeat(
+                    self.unit.unit_id, self.owner, self.lease_seconds
+                ):
+                    self.lease_lost = True
+                    return
+            except sqlite3.Error:
+                # keep trying; the lease only lapses if every renewal fails
+                continue
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        """
+        Start renewing the lease.
+        """
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """
+        Stop renewing the lease.
+        """
+        self.stopped.set()
+        self.thread.join()
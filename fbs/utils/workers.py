@@ -0,0 +1,430 @@
+"""
+Process pool with worker recycling and a resident memory watchdog.
+
+Long-running parsing keeps large models and document trees in memory, and process RSS
+grows over time.  Each worker is recycled after a maximum number of tasks, and a
+watchdog kills any worker whose RSS crosses a ceiling and requeues its task on a fresh
+worker.
+"""
+
+# imports
+import collections
+import multiprocessing
+import multiprocessing.connection
+import multiprocessing.context
+import os
+import resource
+import sys
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+# project
+from fbs.logger import LOGGER
+
+# default number of tasks before a worker is recycled
+DEFAULT_MAX_TASKS_PER_WORKER = 50
+
+# default resident memory ceiling per worker
+DEFAULT_MAX_WORKER_RSS = 4 * 1024**3
+
+# default number of attempts for a task whose worker is killed
+DEFAULT_MAX_ATTEMPTS = 2
+
+# default interval between watchdog checks in seconds
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+def get_peak_rss() -> int:
+    """
+    Get the peak resident memory of the current process.
+
+    Returns:
+        int: Peak RSS in bytes.
+    """
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def get_process_rss(pid: int) -> Optional[int]:
+    """
+    Get the current resident memory of a process from /proc.
+
+    Args:
+        pid (int): Process id.
+
+    Returns:
+        Optional[int]: RSS in bytes, or None if /proc is not available.
+    """
+    try:
+        with open(f"/proc/{pid}/statm", "rt") as input_file:
+            resident_pages = int(input_file.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def run_worker(
+    connection: multiprocessing.connection.Connection,
+    function: Callable[[Any], Any],
+    initializer: Optional[Callable[..., None]],
+    initargs: tuple,
+) -> None:
+    """
+    Worker process loop: run tasks received on the connection until told to stop.
+
+    Args:
+        connection: Connection to the pool.
+        function: Task function.
+        initializer: Function called once when the worker starts.
+        initargs: Initializer arguments.
+    """
+    if initializer is not None:
+        initializer(*initargs)
+
+    while True:
+        task = connection.recv()
+        if task is None:
+            break
+
+        try:
+            result, error = function(task), None
+        except Exception as e:
+            result, error = None, f"{type(e).__name__}: {e}"
+        connection.send((result, error, get_peak_rss()))
+
+
+class Worker:
+    """
+    A worker process and the task it is running.
+    """
+
+    def __init__(
+        self,
+        context: multiprocessing.context.BaseContext,
+        function: Callable[[Any], Any],
+        initializer: Optional[Callable[..., None]],
+        initargs: tuple,
+    ):
+        """
+        Start a worker process.
+
+        Args:
+            context: Multiprocessing context.
+            function: Task function.
+            initializer: Function called once when the worker starts.
+            initargs: Initializer arguments.
+        """
+        self.connection, worker_connection = context.Pipe()
+        self.process = context.Process(
+            target=run_worker,
+            args=(worker_connection, function, initializer, initargs),
+            daemon=True,
+        )
+        self.process.start()
+        worker_connection.close()
+
+        self.task: Any = None
+        self.attempt = 0
+        self.num_tasks = 0
+        self.peak_rss = 0
+
+    @property
+    def is_busy(self) -> bool:
+        """
+        Whether the worker is running a task.
+        """
+        return self.task is not None
+
+    def submit(self, task: Any, attempt: int) -> None:
+        """
+        Send a task to the worker.
+
+        Args:
+            task: Task.
+            attempt: Attempt number of the task.
+        """
+        self.task = task
+        self.attempt = attempt
+        self.connection.send(task)
+
+    def stop(self) -> None:
+        """
+        Ask the worker to exit after its current task and wait for it.
+        """
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=10)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+    def kill(self) -> None:
+        """
+        Kill the worker immediately.
+        """
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class WorkerPool:
+    """
+    Pool of worker processes that run one task at a time each.
+
+    Workers are recycled after max_tasks_per_worker tasks or when their RSS crosses
+    max_rss_bytes after a task.  While a task is running, the watchdog checks the RSS of
+    each worker every poll_interval seconds, kills any worker over the ceiling, and
+    requeues its task up to max_attempts times.  Worker RSS is read from /proc, so the
+    watchdog only runs on Linux; recycling by task count works everywhere.
+    """
+
+    def __init__(
+        self,
+        function: Callable[[Any], Any],
+        num_workers: int,
+        initializer: Optional[Callable[..., None]] = None,
+        initargs: tuple = (),
+        max_tasks_per_worker: Optional[int] = DEFAULT_MAX_TASKS_PER_WORKER,
+        max_rss_bytes: Optional[int] = DEFAULT_MAX_WORKER_RSS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ):
+        """
+        Initialize the pool; workers are started when tasks are run.
+
+        Args:
+            function: Top-level task function taking a single task argument.
+            num_workers: Number of worker processes.
+            initializer: Top-level function called once when each worker starts.
+            initargs: Initializer arguments.
+            max_tasks_per_worker: Tasks before a worker is recycled, or None.
+            max_rss_bytes: RSS ceiling per worker in bytes, or None.
+            max_attempts: Attempts for a task whose worker is killed or dies.
+            poll_interval: Interval between watchdog checks in seconds.
+        """
+        self.function = function
+        self.num_workers = num_workers
+        self.initializer = initializer
+        self.initargs = initargs
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_rss_bytes = max_rss_bytes
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+
+        # spawn workers so they do not inherit the threads and models of the parent
+        self.context = multiprocessing.get_context("spawn")
+        self.workers: list[Worker] = []
+
+        # stats
+        self.num_started = 0
+        self.num_recycled = 0
+        self.num_killed = 0
+        self.num_requeued = 0
+        self.peak_rss = 0
+
+    def _start_worker(self) -> Worker:
+        """
+        Start a worker and add it to the pool.
+
+        Returns:
+            Worker: The new worker.
+        """
+        worker = Worker(self.context, self.function, self.initializer, self.initargs)
+        self.workers.append(worker)
+        self.num_started += 1
+        return worker
+
+    def _retire_worker(self, worker: Worker, kill: bool = False) -> None:
+        """
+        Stop or kill a worker and remove it from the pool.
+
+        Args:
+            worker: Worker.
+            kill: Whether to kill the worker instead of letting it exit.
+        """
+        self.workers.remove(worker)
+        LOGGER.info(
+            "Worker %d ran %d tasks with peak RSS %d MB",
+            worker.process.pid,
+            worker.num_tasks,
+            worker.peak_rss // 1024**2,
+        )
+        if kill:
+            worker.kill()
+        else:
+            worker.stop()
+
+    def run(self, tasks: Iterable[Any]) -> Iterator[tuple[Any, Any, Optional[str]]]:
+        """
+        Run tasks on the workers, yielding results as they finish.
+
+        Tasks are pulled from the iterable lazily, so it can be a generator.
+
+        Args:
+            tasks: Picklable tasks.
+
+        Returns:
+            Iterator of (task, result, error) tuples, with error None on success.
+        """
+        task_iterator = iter(tasks)
+        requeued_tasks: collections.deque[tuple[Any, int]] = collections.deque()
+        tasks_exhausted = False
+
+        try:
+            while True:
+                # hand out tasks to idle workers, starting workers up to the pool size
+                while requeued_tasks or not tasks_exhausted:
+                    idle_workers = [w for w in self.workers if not w.is_busy]
+                    if not idle_workers and len(self.workers) >= self.num_workers:
+                        break
+
+                    if requeued_tasks:
+                        task, attempt = requeued_tasks.popleft()
+                    else:
+                        try:
+                            task, attempt = next(task_iterator), 1
+                        except StopIteration:
+                            tasks_exhausted = True
+                            break
+
+                    worker = idle_workers[0] if idle_workers else self._start_worker()
+                    worker.submit(task, attempt)
+
+                busy_workers = [worker for worker in self.workers if worker.is_busy]
+                if not busy_workers:
+                    break
+
+                # wait for results, waking up periodically for the watchdog
+                ready_connections = multiprocessing.connection.wait(
+                    [worker.connection for worker in busy_workers],
+                    timeout=self.poll_interval,
+                )
+                for worker in busy_workers:
+                    if worker.connection in ready_connections:
+                        yield from self._receive(worker, requeued_tasks)
+                    elif self.max_rss_bytes is not None:
+                        yield from self._check_rss(worker, requeued_tasks)
+        finally:
+            self.close()
+
+    def _receive(
+        self, worker: Worker, requeued_tasks: collections.deque
+    ) -> Iterator[tuple[Any, Any, Optional[str]]]:
+        """
+        Receive a result from a worker and recycle the worker if needed.
+
+        Args:
+            worker: Worker with a result or a closed connection.
+            requeued_tasks: Queue of tasks to run again.
+
+        Returns:
+            Iterator of finished (task, result, error) tuples.
+        """
+        task, attempt = worker.task, worker.attempt
+        try:
+            result, error, peak_rss = worker.connection.recv()
+        except (EOFError, OSError):
+            # the worker died, e.g., from the kernel oom killer
+            LOGGER.warning("Worker %d died running %s", worker.process.pid, task)
+            self._retire_worker(worker, kill=True)
+            yield from self._requeue(task, attempt, "worker died", requeued_tasks)
+            return
+
+        worker.task = None
+        worker.num_tasks += 1
+        worker.peak_rss = max(worker.peak_rss, peak_rss)
+        self.peak_rss = max(self.peak_rss, peak_rss)
+        yield task, result, error
+
+        # recycle the worker after too many tasks or if it is over the ceiling
+        rss = get_process_rss(worker.process.pid)
+        if (
+            self.max_tasks_per_worker is not None
+            and worker.num_tasks >= self.max_tasks_per_worker
+        ) or (
+            self.max_rss_bytes is not None
+            and rss is not None
+            and rss > self.max_rss_bytes
+        ):
+            self._retire_worker(worker)
+            self.num_recycled += 1
+
+    def _check_rss(
+        self, worker: Worker, requeued_tasks: collections.deque
+    ) -> Iterator[tuple[Any, Any, Optional[str]]]:
+        """
+        Kill a busy worker whose RSS is over the ceiling and requeue its task.
+
+        Args:
+            worker: Busy worker.
+            requeued_tasks: Queue of tasks to run again.
+
+        Returns:
+            Iterator of (task, None, error) tuples for tasks out of attempts.
+        """
+        rss = get_process_rss(worker.process.pid)
+        if rss is None or rss <= self.max_rss_bytes:
+            return
+
+        LOGGER.warning(
+            "Killing worker %d at %d MB RSS running %s",
+            worker.process.pid,
+            rss // 1024**2,
+            worker.task,
+        )
+        task, attempt = worker.task, worker.attempt
+        self.peak_rss = max(self.peak_rss, rss)
+        self._retire_worker(worker, kill=True)
+        self.num_killed += 1
+        yield from self._requeue(task, attempt, "worker exceeded RSS", requeued_tasks)
+
+    def _requeue(
+        self,
+        task: Any,
+        attempt: int,
+        reason: str,
+        requeued_tasks: collections.deque,
+    ) -> Iterator[tuple[Any, Any, Optional[str]]]:
+        """
+        Requeue a task whose worker was lost, or fail it after max_attempts.
+
+        Args:
+            task: Task.
+            attempt: Attempt number that failed.
+            reason: Why the worker was lost.
+            requeued_tasks: Queue of tasks to run again.
+
+        Returns:
+            Iterator of a (task, None, error) tuple if the task is out of attempts.
+        """
+        if attempt >= self.max_attempts:
+            yield task, None, f"{reason} after {attempt} attempts"
+            return
+
+        requeued_tasks.append((task, attempt + 1))
+        self.num_requeued += 1
+
+    def get_stats(self) -> dict[str, int]:
+        """
+        Get worker pool statistics.
+
+        Returns:
+            dict[str, int]: Worker counts and the peak worker RSS in MB.
+        """
+        return {
+            "workers_started": self.num_started,
+            "workers_recycled": self.num_recycled,
+            "workers_killed": self.num_killed,
+            "tasks_requeued": self.num_requeued,
+            "peak_worker_rss_mb": self.peak_rss // 1024**2,
+        }
+
+    def close(self) -> None:
+        """
+        Stop all workers.
+        """
+        for worker in list(self.workers):
+            self._retire_worker(worker, kill=worker.is_busy)
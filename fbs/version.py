@@ -0,0 +1,26 @@
+"""
+Code version recorded in the provenance of derived fields.
+"""
+
+# imports
+from importlib.metadata import PackageNotFoundError, version
+
+# distribution name from pyproject.toml
+PACKAGE_NAME = "federal-bill-statistics"
+
+
+def get_code_version() -> str:
+    """
+    Get the installed version of the package.
+
+    Returns:
+        str: Package version, or "unknown" when running from an uninstalled tree.
+    """
+    try:
+        return version(PACKAGE_NAME)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+# code version of this process
+CODE_VERSION = get_code_version()
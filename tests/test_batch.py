@@ -0,0 +1,118 @@
+"""
+Tests for batch-API execution with the fake batch API.
+"""
+
+# imports
+import concurrent.futures
+
+# packages
+import pytest
+
+# project
+from fbs.llm.batch import (
+    BatchClient,
+    BatchJobStore,
+    BatchRecordingModel,
+    PendingBatchRequest,
+    call_all,
+    poll_jobs,
+    submit_requests,
+)
+from fbs.llm.cache import CachedAIModel
+from fbs.llm.fake import FakeAIModel, FakeBatchAPI
+from fbs.utils.dag import TaskGraph
+
+
+@pytest.fixture
+def batch_setup(tmp_path):
+    store = BatchJobStore(tmp_path / "batch")
+    llm_cache = CachedAIModel(
+        BatchRecordingModel(FakeAIModel(model="gpt-4o"), store),
+        cache_path=tmp_path / "llm",
+    )
+    api = FakeBatchAPI(FakeAIModel(text="answer", data={"answer": 42}), num_polls=2)
+    client = BatchClient(base_url="https://batch.test/v1", transport=api.transport)
+    yield store, llm_cache, client
+    client.close()
+
+
+def test_batch_round_trip(batch_setup):
+    store, llm_cache, client = batch_setup
+
+    with pytest.raises(PendingBatchRequest):
+        llm_cache.chat("chat prompt")
+    with pytest.raises(PendingBatchRequest):
+        llm_cache.json("json prompt")
+    assert len(store.get_requests()) == 2
+
+    assert submit_requests(store, client) == 1
+    assert store.get_requests() == []
+
+    # recording a submitted request again does not duplicate it
+    with pytest.raises(PendingBatchRequest):
+        llm_cache.chat("chat prompt")
+    assert store.get_requests() == []
+
+    assert poll_jobs(store, client, llm_cache) == 1
+    assert poll_jobs(store, client, llm_cache) == 0
+
+    assert llm_cache.chat("chat prompt").text == "answer"
+    assert llm_cache.json("json prompt").data == {"answer": 42}
+
+
+def test_store_loads_state_once_per_round(batch_setup, monkeypatch):
+    store, llm_cache, client = batch_setup
+    num_loads = 0
+    load_state = store.load_state
+
+    def counting_load_state():
+        nonlocal num_loads
+        num_loads += 1
+        return load_state()
+
+    monkeypatch.setattr(store, "load_state", counting_load_state)
+    for index in range(20):
+        with pytest.raises(PendingBatchRequest):
+            llm_cache.chat(f"prompt {index}")
+    assert num_loads == 1
+
+    store.reload()
+    with pytest.raises(PendingBatchRequest):
+        llm_cache.chat("another prompt")
+    assert num_loads == 2
+
+
+def test_call_all_records_every_request(batch_setup):
+    store, llm_cache, _ = batch_setup
+
+    with pytest.raises(PendingBatchRequest):
+        call_all(
+            [
+                lambda: llm_cache.chat("summary prompt"),
+                lambda: llm_cache.chat("audit prompt"),
+            ]
+        )
+    assert len(store.get_requests()) == 2
+
+
+def test_task_graph_keep_going_runs_independent_tasks(batch_setup):
+    store, llm_cache, _ = batch_setup
+    graph = TaskGraph()
+    graph.add("summary", lambda: llm_cache.chat("summary prompt"))
+    graph.add("issues", lambda: "issues")
+    graph.add("commentary", lambda: llm_cache.chat("commentary prompt"), ("issues",))
+    graph.add("eli5", lambda: llm_cache.chat("eli5 prompt"), ("summary",))
+
+    def submit(function):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(function())
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    with pytest.raises(PendingBatchRequest):
+        graph.run(submit, keep_going=True)
+
+    # summary and commentary are recorded, eli5 waits for the summary
+    assert len(store.get_requests()) == 2
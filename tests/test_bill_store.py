@@ -0,0 +1,42 @@
+"""
+Tests for the partitioned bill store and its manifest.
+"""
+
+# project
+from fbs.sources.govinfo.govinfo_store import BillStore
+
+
+def get_bill_data(package_id: str, date: str) -> dict:
+    return {"package_id": package_id, "date": date, "text": package_id}
+
+
+def test_select_versions_matches_bill_prefix(tmp_path):
+    with BillStore(tmp_path / "bills") as bill_store:
+        for package_id, date in (
+            ("BILLS-118hr1234rh", "2024-03-01"),
+            ("BILLS-118hr1234ih", "2024-01-01"),
+            ("BILLS-118hr1234eh", "2024-02-01"),
+            ("BILLS-118hr12345ih", "2024-01-01"),
+            ("BILLS-118s1234is", "2024-01-01"),
+        ):
+            bill_store.write(get_bill_data(package_id, date))
+
+        entries = bill_store.select_versions("BILLS-118hr1234rh")
+        assert [entry.package_id for entry in entries] == [
+            "BILLS-118hr1234ih",
+            "BILLS-118hr1234eh",
+        ]
+
+
+def test_read_only_removes_missing_manifest_entries(tmp_path):
+    with BillStore(tmp_path / "bills") as bill_store:
+        assert bill_store.read("BILLS-118hr1ih") is None
+        assert bill_store.get_entry("BILLS-118hr1ih") is None
+
+        bill_store.write(get_bill_data("BILLS-118hr1ih", "2024-01-01"))
+        assert bill_store.read("BILLS-118hr1ih")["text"] == "BILLS-118hr1ih"
+        assert bill_store.get_entry("BILLS-118hr1ih") is not None
+
+        bill_store.get_path("BILLS-118hr1ih").unlink()
+        assert bill_store.read("BILLS-118hr1ih") is None
+        assert bill_store.get_entry("BILLS-118hr1ih") is None
@@ -0,0 +1,33 @@
+"""
+Tests for LLM cache size accounting and eviction.
+"""
+
+# project
+from fbs.llm import cache
+from fbs.llm.cache import CachedAIModel
+from fbs.llm.fake import FakeAIModel
+
+
+def test_overwrite_does_not_inflate_size(tmp_path):
+    cached_model = CachedAIModel(FakeAIModel(), cache_path=tmp_path)
+    cached_model.put("ab" * 32, text="answer")
+    size_bytes = cached_model.size_bytes
+    assert size_bytes > 0
+
+    cached_model.put("ab" * 32, text="answer")
+    assert cached_model.size_bytes == size_bytes
+
+
+def test_evict_skips_entries_removed_by_other_processes(tmp_path, monkeypatch):
+    cached_model = CachedAIModel(FakeAIModel(), cache_path=tmp_path, max_bytes=1)
+    iter_store_paths = cache.iter_store_paths
+
+    def iter_store_paths_with_vanished(root_path):
+        # another process evicted this entry after it was listed
+        yield root_path / "cd" / "vanished"
+        yield from iter_store_paths(root_path)
+
+    monkeypatch.setattr(cache, "iter_store_paths", iter_store_paths_with_vanished)
+    cached_model.put("ab" * 32, text="answer")
+    assert cached_model.evictions == 1
+    assert cached_model.size_bytes == 0
@@ -0,0 +1,57 @@
+"""
+Tests for computing metrics from stored section annotations.
+"""
+
+# packages
+import spacy
+from spacy.tokens import DocBin
+
+# project
+from fbs.commands.compute_metrics import update_bill_metrics
+from fbs.sources.govinfo.govinfo_cache import SectionCache
+from fbs.utils.metrics import DOC_METRICS
+
+
+def get_bill_data() -> dict:
+    return {
+        "sections": [
+            {"content_hash": content_hash, "provenance": {"nlp_profile": "test"}}
+            for content_hash in ("a" * 64, "b" * 64)
+        ]
+    }
+
+
+def put_docs(section_cache: SectionCache, content_hash: str) -> None:
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    doc_bin = DocBin(store_user_data=False)
+    doc_bin.add(nlp("The Secretary shall report to Congress."))
+    section_cache.put_docs(content_hash, "test", doc_bin)
+
+
+def test_missing_annotations_are_not_recomputed_until_available(tmp_path):
+    section_cache = SectionCache(tmp_path)
+    metric_names = sorted(DOC_METRICS)
+    put_docs(section_cache, "a" * 64)
+
+    counts = {"sections": 0, "missing": 0}
+    bill_data = update_bill_metrics(
+        get_bill_data(), metric_names, section_cache, counts
+    )
+    assert counts == {"sections": 1, "missing": 1}
+    assert "metrics" not in bill_data
+    assert bill_data["provenance"]["metrics"]["missing_sections"] == [
+        ["b" * 64, "test"]
+    ]
+
+    # nothing changed, so the bill is not rewritten
+    counts = {"sections": 0, "missing": 0}
+    assert update_bill_metrics(bill_data, metric_names, section_cache, counts) is None
+
+    # the missing section was annotated, so the bill-level metrics are computed
+    put_docs(section_cache, "b" * 64)
+    counts = {"sections": 0, "missing": 0}
+    bill_data = update_bill_metrics(bill_data, metric_names, section_cache, counts)
+    assert counts == {"sections": 2, "missing": 0}
+    assert set(bill_data["metrics"]) >= set(metric_names)
+    assert bill_data["provenance"]["metrics"]["missing_sections"] == []
@@ -0,0 +1,73 @@
+"""
+Tests for local entity classification and batched LLM entity filtering.
+"""
+
+# imports
+import types
+
+# project
+from fbs.llm.fake import FakeAIModel
+from fbs.sources.govinfo.govinfo_prompts import filter_named_entities
+from fbs.utils.entities import classify_entities
+
+
+def get_bill(entities: list[str]) -> types.SimpleNamespace:
+    return types.SimpleNamespace(
+        entities=list(entities),
+        spacy_entities=list(entities),
+        title="Widget Act",
+        short_titles=[],
+        date="2024-01-01",
+        congress=118,
+        session=1,
+        num_pages=1,
+        legis_num="S. 1",
+        current_chamber="SENATE",
+        is_appropriation=False,
+        bill_version="is",
+        bill_type="s",
+        summary="A bill about widgets.",
+        issues=[],
+    )
+
+
+def test_ambiguous_gazetteer_entries_need_review():
+    known, ambiguous = classify_entities(
+        ["Department of Veterans Affairs", "VA", "Sec.", "EPA", "2024"]
+    )
+    assert known == ["Department of Veterans Affairs", "EPA"]
+    assert ambiguous == ["VA", "Sec"]
+
+
+def test_classify_entities_logs_dropped_entities(caplog):
+    entities = [f"Widget Board {index}" for index in range(5)]
+    _, ambiguous = classify_entities(entities, max_ambiguous=3)
+    assert ambiguous == entities[:3]
+    assert "Dropped 2 of 5 ambiguous entities" in caplog.text
+
+
+def test_filter_named_entities_batches_every_entity():
+    entities = [f"Widget Board {index}" for index in range(5)]
+    llm_model = FakeAIModel(data={"entities": ["Widget Board 1", "Widget Board 4"]})
+    assert filter_named_entities(get_bill(entities), llm_model, batch_size=2) == [
+        "Widget Board 1",
+        "Widget Board 4",
+    ]
+    assert llm_model.num_calls == 3
+
+
+def test_filter_named_entities_twice_gives_same_result():
+    entities = ["Widget Board", "Gadget Office", "Widget Board", "EPA"]
+    bill = get_bill(entities)
+
+    # the first prompt keeps one entity, the second prompt keeps another
+    bill.entities = filter_named_entities(
+        bill, FakeAIModel(data={"entities": ["Widget Board"]})
+    )
+    assert bill.entities == ["EPA", "Widget Board"]
+
+    llm_model = FakeAIModel(data={"entities": ["Widget Board", "Gadget Office"]})
+    first_entities = filter_named_entities(bill, llm_model)
+    bill.entities = first_entities
+    assert filter_named_entities(bill, llm_model) == first_entities
+    assert "Gadget Office" in first_entities
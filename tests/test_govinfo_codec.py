@@ -0,0 +1,27 @@
+"""
+Tests for encoding and upgrading bill records.
+"""
+
+# packages
+import numpy
+
+# project
+from fbs.sources.govinfo.govinfo_codec import (
+    SCHEMA_VERSION,
+    decode_record,
+    encode_record,
+)
+
+
+def test_numpy_stats_round_trip():
+    record = {"text": "abc", "token_entropy": numpy.float64(1.5), "sections": []}
+    decoded = decode_record(encode_record(record))
+    assert decoded["token_entropy"] == 1.5
+    assert decoded["schema_version"] == SCHEMA_VERSION
+
+
+def test_unversioned_record_is_upgraded():
+    decoded = decode_record(b'{"text": "abc", "sections": [{"text": "ab"}]}')
+    assert decoded["num_characters"] == 3
+    assert decoded["sections"][0]["num_characters"] == 2
+    assert decoded["schema_version"] == SCHEMA_VERSION
@@ -0,0 +1,68 @@
+"""
+Tests for routing undeclared GovInfo API keys to extra and converting bills to dicts.
+"""
+
+# imports
+import datetime
+from dataclasses import fields
+
+# packages
+import pytest
+
+# project
+from fbs.sources.govinfo.govinfo_codec import bill_from_record
+from fbs.sources.govinfo.govinfo_types import Bill, PackageInfo, SearchResult
+
+
+def test_search_result_from_dict_keeps_extra_keys():
+    result = SearchResult.from_dict(
+        {
+            "title": "A bill",
+            "packageId": "BILLS-118hr1ih",
+            "collectionCode": "BILLS",
+            "dateIssued": "2024-01-01",
+            "congress": "118",
+        }
+    )
+
+    assert result.packageId == "BILLS-118hr1ih"
+    assert result.granuleId is None
+    assert result.governmentAuthor == []
+    assert result.extra == {"congress": "118"}
+    assert result.congress == "118"
+
+    with pytest.raises(AttributeError):
+        result.missing
+
+
+def test_package_info_from_dict_keeps_extra_keys():
+    package_info = PackageInfo.from_dict(
+        {
+            "packageId": "BILLS-118hr1ih",
+            "docClass": "hr",
+            "title": "A bill",
+            "congress": "118",
+            "lastModified": "2024-01-02T00:00:00Z",
+            "dateIssued": "2024-01-01",
+            "pages": "12",
+        }
+    )
+
+    assert package_info.lastModified.year == 2024
+    assert package_info.session is None
+    assert package_info.pages == "12"
+    assert package_info.extra == {"pages": "12"}
+
+
+def test_bill_to_dict_round_trips():
+    record = {bill_field.name: 0 for bill_field in fields(Bill)}
+    record.update(
+        date="2024-01-01T00:00:00",
+        sections=[],
+        provenance={},
+        llm_model_ids={},
+        metrics={},
+    )
+    bill = bill_from_record(record)
+    assert bill.date == datetime.datetime(2024, 1, 1)
+    assert bill.to_dict() == record
@@ -0,0 +1,78 @@
+"""
+Tests for deadlines, hedged requests, and failover with the fake model.
+"""
+
+# packages
+import pytest
+
+# project
+from fbs.llm.cache import CachedAIModel, get_cache_key
+from fbs.llm.context import llm_call_context, record_llm_model_ids
+from fbs.llm.fake import FakeAIModel
+from fbs.llm.hedging import DeadlineExceededError, HedgedAIModel
+from fbs.llm.scheduler import LLMScheduler, ScheduledAIModel
+
+
+def test_deadline_exceeded():
+    hedged_model = HedgedAIModel(
+        FakeAIModel(latencies=(0.5,)), deadline=0.05, hedge_percentile=None
+    )
+    with pytest.raises(DeadlineExceededError):
+        hedged_model.chat("prompt")
+    assert hedged_model.get_stats()["timeouts"] == 1
+
+
+def test_hedged_request_wins_and_is_scheduled():
+    scheduler = LLMScheduler()
+    llm_model = FakeAIModel(latencies=(0.0, 0.0, 0.0, 1.0, 0.0), text="answer")
+    hedged_model = HedgedAIModel(
+        llm_model,
+        hedge_model=ScheduledAIModel(llm_model, scheduler),
+        deadline=5.0,
+        hedge_min_samples=3,
+    )
+
+    with llm_call_context(prompt_name="test"):
+        for _ in range(4):
+            assert hedged_model.chat("prompt").text == "answer"
+
+    stats = hedged_model.get_stats()
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+    assert len(scheduler._window) == 1
+
+
+def test_failover_is_scheduled_and_recorded():
+    scheduler = LLMScheduler()
+    hedged_model = HedgedAIModel(
+        FakeAIModel(model="primary", latencies=(None,)),
+        fallback_model=ScheduledAIModel(
+            FakeAIModel(model="fallback", text="fallback answer"), scheduler
+        ),
+        hedge_percentile=None,
+    )
+
+    with record_llm_model_ids(set()) as model_ids:
+        assert hedged_model.chat("prompt").text == "fallback answer"
+    assert model_ids == {"fallback"}
+    assert hedged_model.get_stats()["failovers"] == 1
+    assert len(scheduler._window) == 1
+
+
+def test_failover_is_cached_under_the_fallback_key(tmp_path):
+    llm_cache = CachedAIModel(
+        HedgedAIModel(
+            FakeAIModel(model="primary", latencies=(None,)),
+            fallback_model=FakeAIModel(model="fallback", text="fallback answer"),
+            hedge_percentile=None,
+        ),
+        cache_path=tmp_path,
+    )
+
+    with record_llm_model_ids(set()) as model_ids:
+        llm_cache.chat("prompt")
+    assert model_ids == {"fallback"}
+    assert llm_cache.get(get_cache_key("primary", "chat", ("prompt",), {})) is None
+    assert llm_cache.get(get_cache_key("fallback", "chat", ("prompt",), {})).text == (
+        "fallback answer"
+    )
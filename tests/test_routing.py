@@ -0,0 +1,70 @@
+"""
+Tests for prompt budgets of routed prompts.
+"""
+
+# imports
+import types
+
+# packages
+import pytest
+
+# project
+from fbs.llm.budget import MODEL_CONTEXT_WINDOWS
+from fbs.llm.fake import FakeAIModel
+from fbs.llm.routing import RoutedAIModel, get_routed_model_ids
+from fbs.sources.govinfo import govinfo_prompts
+from fbs.sources.govinfo.govinfo_prompts import extract_bill_keywords, get_prompt_budget
+
+
+def test_routed_model_ids():
+    router = RoutedAIModel(FakeAIModel(model="primary"), FakeAIModel(model="fast"))
+    assert get_routed_model_ids(router, "extract_bill_keywords") == ("fast",)
+    assert get_routed_model_ids(router, "summarize_bill") == ("primary",)
+
+    router.max_fast_tokens = 1000
+    assert get_routed_model_ids(router, "extract_bill_keywords") == ("fast", "primary")
+
+
+def test_routed_prompt_budget_uses_smallest_context_window(monkeypatch):
+    monkeypatch.setitem(MODEL_CONTEXT_WINDOWS, "primary", 200000)
+    monkeypatch.setitem(MODEL_CONTEXT_WINDOWS, "fast", 32000)
+    router = RoutedAIModel(
+        FakeAIModel(model="primary"), FakeAIModel(model="fast"), max_fast_tokens=1000
+    )
+    bill = types.SimpleNamespace(markdown="text", sections=[])
+
+    assert get_prompt_budget(bill, router).context_window == 200000
+    budget = get_prompt_budget(bill, router, "extract_bill_keywords")
+    assert budget.model_id == "fast"
+    assert budget.context_window == 32000
+
+
+budget_bill = types.SimpleNamespace(markdown="text", sections=[])
+
+
+def get_keyword_budget(monkeypatch, router, budget):
+    class BudgetSelected(Exception):
+        pass
+
+    def get_bill_context(bill, llm_model, keyword_budget, mode=None):
+        raise BudgetSelected(keyword_budget)
+
+    monkeypatch.setattr(govinfo_prompts, "get_bill_context", get_bill_context)
+    with pytest.raises(BudgetSelected) as exc_info:
+        extract_bill_keywords(budget_bill, router, budget)
+    return exc_info.value.args[0]
+
+
+def test_keywords_reuse_shared_budget_unless_routed_window_is_smaller(monkeypatch):
+    monkeypatch.setitem(MODEL_CONTEXT_WINDOWS, "primary", 200000)
+    monkeypatch.setitem(MODEL_CONTEXT_WINDOWS, "fast", 200000)
+    router = RoutedAIModel(
+        FakeAIModel(model="primary"), FakeAIModel(model="fast"), max_fast_tokens=1000
+    )
+    budget = get_prompt_budget(budget_bill, router)
+    assert get_keyword_budget(monkeypatch, router, budget) is budget
+
+    monkeypatch.setitem(MODEL_CONTEXT_WINDOWS, "fast", 32000)
+    keyword_budget = get_keyword_budget(monkeypatch, router, budget)
+    assert keyword_budget is not budget
+    assert keyword_budget.context_window == 32000
@@ -0,0 +1,44 @@
+"""
+Tests for store locks and entry iteration.
+"""
+
+# imports
+import fcntl
+
+# project
+from fbs.utils.store import (
+    LOCK_DIRECTORY_NAME,
+    iter_store_paths,
+    key_lock,
+    write_json_gz,
+)
+
+
+def test_lock_files_live_in_store_and_are_skipped(tmp_path):
+    store_path = tmp_path / "store"
+    entry_path = store_path / "a" / "entry.json.gz"
+    write_json_gz(entry_path, {"key": "value"})
+
+    lock_path = store_path / LOCK_DIRECTORY_NAME
+    with key_lock(entry_path, lock_path):
+        (lock_file_path,) = lock_path.iterdir()
+        # the lock is held, so a second process could not take it
+        with open(lock_file_path, "a") as lock_file:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                acquired = True
+            except BlockingIOError:
+                acquired = False
+        assert not acquired
+
+    assert list(iter_store_paths(store_path)) == [entry_path]
+
+
+def test_lock_names_do_not_depend_on_mount_path(tmp_path):
+    lock_names = []
+    for mount_path in (tmp_path / "mount-1", tmp_path / "mount-2"):
+        lock_path = mount_path / LOCK_DIRECTORY_NAME
+        with key_lock(mount_path / "a" / "entry.json.gz", lock_path):
+            pass
+        lock_names.append([path.name for path in lock_path.iterdir()])
+    assert lock_names[0] == lock_names[1]
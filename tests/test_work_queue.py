@@ -0,0 +1,140 @@
+"""
+Tests for work queue leases, heartbeats, and attempt limits.
+"""
+
+# imports
+import multiprocessing
+import time
+
+# packages
+import pytest
+
+# project
+from fbs.utils.work_queue import LeaseHeartbeat, WorkQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    work_queue = WorkQueue(tmp_path / "queue.sqlite")
+    work_queue.add("date", [("unit-1", {"date": "2024-01-01"})])
+    yield work_queue
+    work_queue.close()
+
+
+def test_expired_lease_is_claimed_again(queue):
+    unit = queue.claim("worker-1", lease_seconds=0.01)
+    assert unit.attempts == 1
+    assert queue.claim("worker-2") is None
+
+    time.sleep(0.05)
+    reclaimed = queue.claim("worker-2")
+    assert reclaimed.unit_id == unit.unit_id
+    assert reclaimed.attempts == 2
+    assert queue.get_counts()["leased"] == 1
+
+
+def test_expired_lease_fails_after_max_attempts(queue):
+    for owner in ("worker-1", "worker-2"):
+        assert queue.claim(owner, lease_seconds=0.01, max_attempts=2) is not None
+        time.sleep(0.05)
+
+    assert queue.get_counts(max_attempts=2)["failed"] == 1
+    assert queue.claim("worker-3", max_attempts=2) is None
+    assert queue.get_counts(max_attempts=2)["failed"] == 1
+
+    assert queue.retry_failed() == 1
+    assert queue.claim("worker-3", max_attempts=2).attempts == 1
+
+
+def test_complete_requires_lease_owner(queue):
+    unit = queue.claim("worker-1", lease_seconds=0.01)
+    time.sleep(0.05)
+    queue.claim("worker-2")
+
+    assert not queue.complete(unit.unit_id, "worker-1")
+    assert not queue.fail(unit.unit_id, "worker-1", "error")
+    assert queue.complete(unit.unit_id, "worker-2")
+    assert queue.get_counts()["done"] == 1
+
+
+def test_heartbeat_renews_lease(queue):
+    unit = queue.claim("worker-1", lease_seconds=1.0)
+    with LeaseHeartbeat(queue, unit, "worker-1", lease_seconds=1.0) as heartbeat:
+        time.sleep(2.5)
+        assert queue.claim("worker-2") is None
+    assert not heartbeat.lease_lost
+    assert queue.complete(unit.unit_id, "worker-1")
+
+
+def test_heartbeat_detects_lost_lease(queue):
+    unit = queue.claim("worker-1", lease_seconds=1.0)
+    with LeaseHeartbeat(queue, unit, "worker-1", lease_seconds=1.0) as heartbeat:
+        # another worker takes over, e.g., after this one stalled past its lease
+        queue.release(unit.unit_id, "worker-1")
+        assert queue.claim("worker-2") is not None
+        heartbeat.thread.join(timeout=10.0)
+    assert heartbeat.lease_lost
+    assert not queue.complete(unit.unit_id, "worker-1")
+
+
+def run_worker(queue_path, owner, completed):
+    worker_queue = WorkQueue(queue_path)
+    while (unit := worker_queue.claim(owner, lease_seconds=30.0)) is not None:
+        if worker_queue.complete(unit.unit_id, owner):
+            completed.put(unit.unit_id)
+    worker_queue.close()
+
+
+def run_stalled_worker(queue_path, claimed):
+    worker_queue = WorkQueue(queue_path)
+    claimed.put(worker_queue.claim("stalled", lease_seconds=3.0).unit_id)
+    time.sleep(60.0)
+
+
+def test_worker_processes_complete_each_unit_once(tmp_path):
+    queue_path = tmp_path / "queue.sqlite"
+    work_queue = WorkQueue(queue_path)
+    unit_ids = [f"unit-{index}" for index in range(40)]
+    work_queue.add("date", [(unit_id, {}) for unit_id in unit_ids])
+
+    context = multiprocessing.get_context("spawn")
+    completed = context.Queue()
+    processes = [
+        context.Process(
+            target=run_worker, args=(queue_path, f"worker-{index}", completed)
+        )
+        for index in range(4)
+    ]
+    for process in processes:
+        process.start()
+    completed_ids = [completed.get(timeout=60.0) for _ in unit_ids]
+    for process in processes:
+        process.join(timeout=60.0)
+        assert process.exitcode == 0
+
+    assert sorted(completed_ids) == sorted(unit_ids)
+    assert completed.empty()
+    assert work_queue.get_counts()["done"] == len(unit_ids)
+    work_queue.close()
+
+
+def test_killed_worker_unit_is_claimed_again(tmp_path):
+    queue_path = tmp_path / "queue.sqlite"
+    work_queue = WorkQueue(queue_path)
+    work_queue.add("date", [("unit-1", {})])
+
+    context = multiprocessing.get_context("spawn")
+    claimed = context.Queue()
+    process = context.Process(target=run_stalled_worker, args=(queue_path, claimed))
+    process.start()
+    assert claimed.get(timeout=60.0) == "unit-1"
+    process.kill()
+    process.join()
+
+    assert work_queue.claim("worker-2") is None
+    time.sleep(3.5)
+    unit = work_queue.claim("worker-2")
+    assert unit.unit_id == "unit-1"
+    assert unit.attempts == 2
+    assert work_queue.complete(unit.unit_id, "worker-2")
+    work_queue.close()